@@ -10,19 +10,87 @@ Real opportunities between the two most important chains:
 This finds REAL arbitrage, whale moves, and alpha between these chains.
 """
 
-import requests
+import argparse
 import json
 import time
-from datetime import datetime, timedelta
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from datetime import datetime
+from dataclasses import dataclass, field
 from typing import List, Dict
 import statistics
+import threading
 
-# Real AMP playground API
-PLAYGROUND_BASE = "https://playground.amp.thegraph.com"
-DATASETS_API = f"{PLAYGROUND_BASE}/api/trpc/datasets.list"
+from config import MIN_ARBITRAGE_BPS, MIN_LIQUIDATION_AMOUNT, MIN_WHALE_AMOUNT
+from dataset_catalog import load_catalog
+from ingestion import get_ingestor, swap_feed, transactions_feed
+from liquidations import LiquidationIndex, PositionBook, price_grid, reference_positions
+from metrics import (HUNT_OPPORTUNITIES, HUNT_SECONDS, STRATEGY_FAILURES, STRATEGY_OPPORTUNITIES,
+                     STRATEGY_SECONDS)
+from opportunity_book import OpportunityBook
+from profiling import profile_runs
+from uniswap_pricing import get_latest_prices, join_spreads, spread_bps
+from whale_tracker import WhaleTracker, get_whale_tracker
 
-@dataclass
+# Deadline for each strategy when hunting in parallel (seconds)
+STRATEGY_TIMEOUT = 10
+TOP_DISPLAYED = 8  # Opportunities listed by display_focused_dashboard
+
+# Real tokens that exist on both chains
+CROSS_CHAIN_TOKENS = [
+    {
+        'symbol': 'USDC',
+        'decimals': 6,
+        'eth_contract': '0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48',
+        'base_contract': '0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913',
+        'eth_price': 1.0008,
+        'base_price': 0.9995,
+        'daily_volume': 150000000
+    },
+    {
+        'symbol': 'WETH',
+        'decimals': 18,
+        'eth_contract': '0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2',
+        'base_contract': '0x4200000000000000000000000000000000000006',
+        'eth_price': 3456.78,
+        'base_price': 3461.45,
+        'daily_volume': 85000000
+    },
+    {
+        'symbol': 'cbETH',
+        'decimals': 18,
+        'eth_contract': '0xBe9895146f7AF43049ca1c1AE358B0541Ea49704',
+        'base_contract': '0x2Ae3F1Ec7F1F5012CFEab0185bfc7aa3cf0DEc22',
+        'eth_price': 3678.90,
+        'base_price': 3672.15,
+        'daily_volume': 25000000
+    }
+]
+
+# {lowercase contract: (symbol, decimals)} per chain, for pricing swap rows
+CHAIN_TOKENS = {
+    chain: {t[contract].lower(): (t['symbol'], t['decimals']) for t in CROSS_CHAIN_TOKENS}
+    for chain, contract in (('ethereum', 'eth_contract'), ('base', 'base_contract'))
+}
+
+# Aggregate liquidation risk used until live lending positions are loaded
+ETH_LIQUIDATION_RISKS = [
+    {
+        'protocol': 'Aave V2',
+        'total_at_risk': 125000000,  # $125M at risk
+        'trigger_price': 3200,  # ETH price that triggers cascade
+        'positions_count': 847,
+        'avg_liquidation_bonus': 0.08
+    },
+    {
+        'protocol': 'Compound V2',
+        'total_at_risk': 89000000,
+        'trigger_price': 3150,
+        'positions_count': 623,
+        'avg_liquidation_bonus': 0.05
+    }
+]
+
+@dataclass(slots=True)
 class AlphaOpportunity:
     type: str
     chain: str
@@ -33,45 +101,59 @@ class AlphaOpportunity:
     data: dict
     timestamp: datetime
 
+@dataclass
+class HuntResult:
+    opportunities: List[AlphaOpportunity]
+    timings: Dict[str, float] = field(default_factory=dict)  # Seconds per strategy
+    missing: List[str] = field(default_factory=list)  # Strategies that timed out or failed
+    errors: Dict[str, str] = field(default_factory=dict)
+
 class EthBaseAlphaHunter:
+    # Strategy methods run by every hunt, in display order
+    STRATEGIES = (
+        'find_eth_base_arbitrage',
+        'track_base_whale_activity',
+        'detect_eth_liquidation_cascade',
+        'find_base_ecosystem_plays',
+        'analyze_eth_gas_arbitrage',
+    )
+    
     def __init__(self):
+        self.catalog = None
         self.eth_datasets = []
         self.base_datasets = []
         self.opportunities = []
+        self.pool_prices = {}  # Chain -> LatestPairPrices fed by the Uniswap V3 event__swap feed
+        self.lending_positions = {}  # Position id -> Aave / Compound position row (see liquidations.PositionBook)
+        self.liquidation_index = LiquidationIndex()  # The same positions by liquidation price
+        self._position_book = None  # PositionBook of lending_positions, rebuilt after they change
+        self._reference_ids = ()  # lending_positions seeded from ETH_LIQUIDATION_RISKS
+        self._positions_lock = threading.RLock()
+        self.book = OpportunityBook()  # The latest hunt's opportunities, ranked and keyed by stable ID
         
     def load_real_datasets(self):
         """Load actual ETH and Base datasets only"""
         print("🔍 Loading ETH Mainnet + Base Mainnet Datasets...")
         
         try:
-            params = {
-                'batch': '1',
-                'input': '{"0":{"json":null,"meta":{"values":["undefined"],"v":1}}}'
-            }
-            
-            response = requests.get(DATASETS_API, params=params, timeout=30)
-            if response.status_code == 200:
-                data = response.json()
-                datasets = data[0]['result']['data']['json']['datasets']
+            # Cached, indexed catalog; refreshed in the background when stale
+            catalog = load_catalog()
+            if catalog is not None:
+                self.catalog = catalog
                 
                 # Filter for ETH and Base mainnet only
-                for dataset in datasets:
-                    chains = dataset.get('indexing_chains', [])
-                    name = dataset.get('name', '')
-                    
-                    if 'ethereum-mainnet' in chains:
-                        self.eth_datasets.append(dataset)
-                    elif 'base-mainnet' in chains:
-                        self.base_datasets.append(dataset)
+                self.eth_datasets = catalog.query(chain='ethereum-mainnet')
+                self.base_datasets = [d for d in catalog.query(chain='base-mainnet')
+                                      if 'ethereum-mainnet' not in d.get('indexing_chains', [])]
                 
                 print(f"✅ Ethereum Mainnet: {len(self.eth_datasets)} datasets")
                 print(f"✅ Base Mainnet: {len(self.base_datasets)} datasets")
                 
                 # Show key datasets
-                eth_protocols = [d['name'] for d in self.eth_datasets if any(p in d['name'].lower() 
-                                for p in ['uniswap', 'aave', 'sushiswap', 'compound'])]
-                base_protocols = [d['name'] for d in self.base_datasets if any(p in d['name'].lower() 
-                                 for p in ['uniswap', 'aerodrome', 'aave', 'defi'])]
+                eth_protocols = [d['name'] for d in catalog.query(
+                    chain='ethereum-mainnet', protocol=['uniswap', 'aave', 'sushiswap', 'compound'])]
+                base_protocols = [d['name'] for d in catalog.query(
+                    chain='base-mainnet', protocol=['uniswap', 'aerodrome', 'aave', 'defi'])]
                 
                 print(f"🦄 ETH Protocols: {', '.join(eth_protocols[:5])}")
                 print(f"🔵 Base Protocols: {', '.join(base_protocols[:5])}")
@@ -82,62 +164,122 @@ class EthBaseAlphaHunter:
             print(f"❌ Error: {e}")
             return False
 
+    def load_swap_rows(self):
+        """Ingest new Uniswap swap blocks on both chains into the latest pool prices"""
+        if self.catalog is None:
+            return
+        
+        ingestor = get_ingestor()
+        for chain in ('ethereum', 'base'):
+            dataset = self.catalog.first(protocol='uniswap', chain=chain)
+            if dataset is None:
+                continue
+            feed = swap_feed(dataset)
+            prices = get_latest_prices(feed.key, CHAIN_TOKENS[chain])
+            ingestor.subscribe(feed, prices.consume)
+            added = ingestor.sync(feed)
+            self.pool_prices[chain] = prices
+            print(f"📥 {feed.key}: +{added} rows ({len(prices)} pairs priced)")
+
+    def load_whale_flows(self):
+        """Stream new Base transactions touching watched whales through the process-wide tracker"""
+        if self.catalog is None:
+            return
+        
+        dataset = self.catalog.first(protocol='base_mainnet')
+        if dataset is None:
+            return
+        
+        ingestor = get_ingestor()
+        tracker = get_whale_tracker()
+        feed = transactions_feed(dataset, tracker.addresses)
+        ingestor.subscribe(feed, tracker.consume)
+        added = ingestor.sync(feed)
+        print(f"📥 {feed.key}: +{added} transactions ({tracker.matches} whale hits so far)")
+
+    def update_lending_positions(self, rows=(), removed=()):
+        """Apply position changes: rows (with an 'id') are inserted or replaced, removed ids dropped
+        
+        The rows are indexed as one batch (LiquidationIndex.update_book), so an
+        initial load of every position is one vectorized pass. The first live
+        rows replace the reference positions.
+        """
+        rows = list({row['id']: row for row in rows}.values())
+        removed = list(removed)
+        with self._positions_lock:
+            if rows and self._reference_ids:
+                removed.extend(self._reference_ids)
+                self._reference_ids = ()
+            for position_id in removed:
+                self.lending_positions.pop(position_id, None)
+            for row in rows:
+                self.lending_positions[row['id']] = row
+            book = PositionBook.from_rows(rows)
+            self.liquidation_index.update_book(book, [row['id'] for row in rows], removed)
+            # A load that replaced everything already is the whole book
+            self._position_book = book if len(book) == len(self.lending_positions) else None
+
+    def load_reference_positions(self):
+        """Seed lending_positions with ETH_LIQUIDATION_RISKS until live positions are loaded"""
+        rows = [dict(row, id=f"reference:{i}")
+                for i, row in enumerate(reference_positions(ETH_LIQUIDATION_RISKS))]
+        with self._positions_lock:
+            self.update_lending_positions(rows)
+            self._reference_ids = tuple(row['id'] for row in rows)
+
+    def position_book(self):
+        """lending_positions as a PositionBook, converted once per change rather than per hunt"""
+        with self._positions_lock:
+            if self._position_book is None:
+                self._position_book = PositionBook.from_rows(self.lending_positions.values())
+            return self._position_book
+
     def find_eth_base_arbitrage(self):
         """Find arbitrage opportunities between ETH and Base"""
         print("\n💰 HUNTING ETH ↔ BASE ARBITRAGE...")
         
         opportunities = []
         
-        # Real tokens that exist on both chains
-        cross_chain_tokens = [
-            {
-                'symbol': 'USDC',
-                'eth_contract': '0xA0b86a33E6441e8e421c7c7c4b8b7e1b4b8b7e1b',
-                'base_contract': '0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913',
-                'eth_price': 1.0008,
-                'base_price': 0.9995,
-                'daily_volume': 150000000
-            },
-            {
-                'symbol': 'WETH',
-                'eth_contract': '0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2',
-                'base_contract': '0x4200000000000000000000000000000000000006',
-                'eth_price': 3456.78,
-                'base_price': 3461.45,
-                'daily_volume': 85000000
-            },
-            {
-                'symbol': 'cbETH',
-                'eth_contract': '0xBe9895146f7AF43049ca1c1AE358B0541Ea49704',
-                'base_contract': '0x2Ae3F1Ec7F1F5012CFEab0185bfc7aa3cf0DEc22',
-                'eth_price': 3678.90,
-                'base_price': 3672.15,
-                'daily_volume': 25000000
-            }
-        ]
-        
-        for token in cross_chain_tokens:
-            price_diff = abs(token['eth_price'] - token['base_price'])
-            profit_bps = (price_diff / min(token['eth_price'], token['base_price'])) * 10000
+        # Live Uniswap V3 pool prices once swaps are ingested, reference quotes otherwise
+        eth_prices = self.pool_prices.get('ethereum')
+        base_prices = self.pool_prices.get('base')
+        
+        if eth_prices and base_prices:
+            quotes = join_spreads(eth_prices.prices(), base_prices.prices())
+        else:
+            spreads = spread_bps([t['eth_price'] for t in CROSS_CHAIN_TOKENS],
+                                 [t['base_price'] for t in CROSS_CHAIN_TOKENS])
+            quotes = [{
+                'pair': token['symbol'],
+                'eth_price': token['eth_price'],
+                'base_price': token['base_price'],
+                'profit_bps': float(profit_bps),
+                'volume': token['daily_volume']
+            } for token, profit_bps in zip(CROSS_CHAIN_TOKENS, spreads)]
+        
+        for quote in quotes:
+            profit_bps = quote['profit_bps']
             
-            if profit_bps > 8:  # > 0.08% profit (covers gas + bridge fees)
-                direction = "ETH→Base" if token['eth_price'] > token['base_price'] else "Base→ETH"
-                buy_chain = "Base" if token['eth_price'] > token['base_price'] else "Ethereum"
-                sell_chain = "Ethereum" if token['eth_price'] > token['base_price'] else "Base"
+            if profit_bps > MIN_ARBITRAGE_BPS:  # > 0.08% profit (covers gas + bridge fees)
+                direction = "ETH→Base" if quote['eth_price'] > quote['base_price'] else "Base→ETH"
+                buy_chain = "Base" if quote['eth_price'] > quote['base_price'] else "Ethereum"
+                sell_chain = "Ethereum" if quote['eth_price'] > quote['base_price'] else "Base"
+                
+                data = {
+                    'token': quote['pair'],
+                    'profit_bps': profit_bps,
+                    'direction': direction
+                }
+                data.update({k: quote[k] for k in ('volume', 'swaps', 'eth_block', 'base_block') if k in quote})
                 
                 alpha = AlphaOpportunity(
                     type="CROSS_CHAIN_ARBITRAGE",
                     chain=f"{buy_chain}→{sell_chain}",
                     confidence=0.92,
                     profit_potential=profit_bps / 10000,
-                    description=f"{token['symbol']} arbitrage: {profit_bps:.1f}bps profit ({direction})",
-                    action=f"Buy {token['symbol']} on {buy_chain}, sell on {sell_chain}",
-                    data={
-                        'token': token['symbol'],
-                        'profit_bps': profit_bps,
-                        'volume': token['daily_volume'],
-                        'direction': direction
-                    },
+                    description=f"{quote['pair']} arbitrage: {profit_bps:.1f}bps profit ({direction})",
+                    action=f"Buy {quote['pair']} on {buy_chain}, sell on {sell_chain}",
+                    data=data,
                     timestamp=datetime.now()
                 )
                 opportunities.append(alpha)
@@ -150,39 +292,65 @@ class EthBaseAlphaHunter:
         
         opportunities = []
         
-        # Base whales are easier to track due to lower noise
-        base_whale_moves = [
-            {
-                'whale': '0x3cd751e6b0078be393132286c442345e5dc49699',  # Coinbase institutional
-                'action': 'MASSIVE_USDC_DEPOSIT',
-                'amount_usd': 15000000,
-                'token': 'USDC',
-                'likely_intent': 'Preparing for large Base ecosystem buy',
-                'confidence': 0.89
-            },
-            {
-                'whale': '0x40ec5B33f54e0E8A33A975908C5BA1c14e5BbbDf',  # Base ecosystem whale
-                'action': 'AERODROME_POSITION',
-                'amount_usd': 3200000,
-                'token': 'AERO',
-                'likely_intent': 'Governance play or major announcement coming',
-                'confidence': 0.76
+        tracker = get_whale_tracker()
+        tracker.advance()
+        signals = tracker.active_signals()
+        intents = {}
+        
+        if not tracker.matches:
+            # No live transactions yet: run reference moves through the same tracker logic
+            base_whale_moves = [
+                {
+                    'whale': '0x3cd751e6b0078be393132286c442345e5dc49699',  # Coinbase institutional
+                    'action': 'MASSIVE_USDC_DEPOSIT',
+                    'amount_usd': 15000000,
+                    'token': 'USDC',
+                    'likely_intent': 'Preparing for large Base ecosystem buy',
+                    'confidence': 0.89
+                },
+                {
+                    'whale': '0x40ec5B33f54e0E8A33A975908C5BA1c14e5BbbDf',  # Base ecosystem whale
+                    'action': 'AERODROME_POSITION',
+                    'amount_usd': 3200000,
+                    'token': 'AERO',
+                    'likely_intent': 'Governance play or major announcement coming',
+                    'confidence': 0.76
+                }
+            ]
+            reference = WhaleTracker()
+            reference.consume({
+                'from_address': move['whale'],
+                'amount_usd': move['amount_usd'],
+                'block_timestamp': time.time() - 8 * 60
+            } for move in base_whale_moves)
+            reference.advance()
+            signals = reference.active_signals()
+            intents = {move['whale'].lower(): move for move in base_whale_moves}
+        
+        for signal in signals:
+            move = intents.get(signal.address, {})
+            data = {
+                'whale': signal.address,
+                'window': signal.window,
+                'amount_usd': signal.amount_usd,
+                'transactions': signal.transactions,
+                'last_transaction': signal.last_transaction
             }
-        ]
-        
-        for move in base_whale_moves:
-            if move['amount_usd'] > 1000000:  # $1M+ moves only
-                alpha = AlphaOpportunity(
-                    type="BASE_WHALE_SIGNAL",
-                    chain="Base",
-                    confidence=move['confidence'],
-                    profit_potential=0.25,  # 25% potential following whale
-                    description=f"${move['amount_usd']:,} {move['token']} move by Base whale",
-                    action=f"FOLLOW: {move['likely_intent']}",
-                    data=move,
-                    timestamp=datetime.now() - timedelta(minutes=8)
-                )
-                opportunities.append(alpha)
+            data.update(move)
+            
+            token = move.get('token', 'ETH')
+            intent = move.get('likely_intent') or f"{signal.transactions} whale transactions in {signal.window}"
+            alpha = AlphaOpportunity(
+                type="BASE_WHALE_SIGNAL",
+                chain="Base",
+                confidence=move.get('confidence', min(0.95, 0.7 + signal.amount_usd / (MIN_WHALE_AMOUNT * 50))),
+                profit_potential=0.25,  # 25% potential following whale
+                description=f"${signal.amount_usd:,.0f} {token} move by Base whale ({signal.window})",
+                action=f"FOLLOW: {intent}",
+                data=data,
+                timestamp=signal.timestamp.astimezone().replace(tzinfo=None)
+            )
+            opportunities.append(alpha)
         
         return opportunities
 
@@ -192,43 +360,47 @@ class EthBaseAlphaHunter:
         
         opportunities = []
         
-        # ETH has the biggest liquidations
-        eth_liquidation_risks = [
-            {
-                'protocol': 'Aave V2',
-                'total_at_risk': 125000000,  # $125M at risk
-                'trigger_price': 3200,  # ETH price that triggers cascade
-                'current_eth_price': 3456,
-                'positions_count': 847,
-                'avg_liquidation_bonus': 0.08
-            },
-            {
-                'protocol': 'Compound V2',
-                'total_at_risk': 89000000,
-                'trigger_price': 3150,
-                'current_eth_price': 3456,
-                'positions_count': 623,
-                'avg_liquidation_bonus': 0.05
-            }
-        ]
+        current_eth_price = 3456
+        
+        with self._positions_lock:
+            if not self.lending_positions:
+                # ETH has the biggest liquidations; reference positions until live ones are loaded
+                self.load_reference_positions()
+            book = self.position_book()
+        index = self.liquidation_index
+        
+        # Every position at every price from a 30% crash up to today's price
+        curve = book.simulate(price_grid(current_eth_price))
+        shock_price = current_eth_price * 0.85  # Within 15% of liquidation
         
-        for risk in eth_liquidation_risks:
-            distance_to_liquidation = (risk['current_eth_price'] - risk['trigger_price']) / risk['current_eth_price']
+        for protocol in curve.protocols:
+            trigger_price = curve.trigger_price(MIN_LIQUIDATION_AMOUNT, protocol)
+            if trigger_price is None or trigger_price < shock_price:
+                continue
             
-            if distance_to_liquidation < 0.15:  # Within 15% of liquidation
-                potential_profit = risk['total_at_risk'] * risk['avg_liquidation_bonus']
-                
-                alpha = AlphaOpportunity(
-                    type="ETH_LIQUIDATION_CASCADE",
-                    chain="Ethereum",
-                    confidence=0.85,
-                    profit_potential=potential_profit / 1000000,  # Normalize
-                    description=f"${risk['total_at_risk']:,} at risk in {risk['protocol']} if ETH hits ${risk['trigger_price']}",
-                    action=f"PREPARE: ${potential_profit:,.0f} liquidation profit potential",
-                    data=risk,
-                    timestamp=datetime.now()
-                )
-                opportunities.append(alpha)
+            # What is at risk at the quoted price; the bonus is what a full shock would pay
+            risk = index.at_risk(trigger_price, protocol)
+            potential_profit = curve.at(shock_price, protocol)['bonus_usd']
+            
+            alpha = AlphaOpportunity(
+                type="ETH_LIQUIDATION_CASCADE",
+                chain="Ethereum",
+                confidence=0.85,
+                profit_potential=potential_profit / 1000000,  # Normalize
+                description=f"${risk['debt_at_risk']:,.0f} at risk in {protocol} if ETH hits ${trigger_price:,.0f}",
+                action=f"PREPARE: ${potential_profit:,.0f} liquidation profit potential",
+                data={
+                    'protocol': protocol,
+                    'total_at_risk': risk['debt_at_risk'],
+                    'liquidatable_usd': risk['liquidatable_usd'],
+                    'trigger_price': trigger_price,
+                    'current_eth_price': current_eth_price,
+                    'shock_price': shock_price,
+                    'positions_count': risk['positions']
+                },
+                timestamp=datetime.now()
+            )
+            opportunities.append(alpha)
         
         return opportunities
 
@@ -315,13 +487,18 @@ class EthBaseAlphaHunter:
         return opportunities
 
     def rank_opportunities(self, opportunities):
-        """Rank by profit potential * confidence"""
-        return sorted(opportunities, 
-                     key=lambda x: x.confidence * x.profit_potential, 
-                     reverse=True)
+        """Rank this hunt's opportunities by profit potential * confidence
+        
+        self.book lives as long as the hunter. Each opportunity is upserted by
+        its stable ID (an unchanged score keeps its place in the heaps), and
+        IDs this hunt no longer reports are dropped. Returns the full ranking.
+        """
+        reported = {self.book.add(opp) for opp in opportunities}
+        self.book.retain(reported)
+        return self.book.top()
 
-    def display_focused_dashboard(self, opportunities):
-        """Display ETH-Base focused dashboard"""
+    def display_focused_dashboard(self, opportunities, top=None):
+        """Display ETH-Base focused dashboard (top: the best few to list, default opportunities[:8])"""
         print("\n" + "="*80)
         print("🎯 ETH-BASE ALPHA HUNTER - MAINNET ONLY 🎯")
         print("="*80)
@@ -341,7 +518,8 @@ class EthBaseAlphaHunter:
         
         print(f"\n🔥 TOP OPPORTUNITIES:")
         
-        for i, opp in enumerate(opportunities[:8], 1):  # Top 8
+        top = opportunities[:TOP_DISPLAYED] if top is None else top
+        for i, opp in enumerate(top, 1):
             chain_emoji = "⚡" if opp.chain == "Ethereum" else "🔵" if opp.chain == "Base" else "🌉"
             confidence_bar = "█" * int(opp.confidence * 10) + "░" * (10 - int(opp.confidence * 10))
             profit_emoji = "🚀" if opp.profit_potential > 0.5 else "💰" if opp.profit_potential > 0.1 else "📈"
@@ -364,8 +542,60 @@ class EthBaseAlphaHunter:
         print(f"   ⚡ ETH Opportunities: {len(eth_opps)}")
         print(f"   🔵 Base Opportunities: {len(base_opps)}")
 
-    def run_focused_hunt(self):
-        """Run ETH-Base focused alpha hunt"""
+    def _timed_strategy(self, name):
+        """Run one strategy, returning (opportunities, seconds, error)"""
+        start = time.perf_counter()
+        try:
+            opportunities = getattr(self, name)()
+        except Exception as e:
+            return None, time.perf_counter() - start, str(e)
+        return opportunities, time.perf_counter() - start, None
+
+    def _record_strategy(self, result, name, opportunities, elapsed, error):
+        result.timings[name] = elapsed
+        STRATEGY_SECONDS.observe(elapsed, strategy=name)
+        if error is not None:
+            result.missing.append(name)
+            result.errors[name] = error
+            STRATEGY_FAILURES.inc(strategy=name)
+            STRATEGY_OPPORTUNITIES.set(0, strategy=name)  # Contributed nothing to this hunt
+        else:
+            result.opportunities.extend(opportunities)
+            STRATEGY_OPPORTUNITIES.set(len(opportunities), strategy=name)
+
+    def run_strategies_sequential(self, result):
+        """Run each strategy in turn, isolating failures"""
+        for name in self.STRATEGIES:
+            self._record_strategy(result, name, *self._timed_strategy(name))
+
+    def run_strategies_parallel(self, result, strategy_timeouts=None):
+        """Run all strategies concurrently, each against its own deadline
+        
+        A strategy that raises or misses its deadline is reported in
+        result.missing; the others still contribute to the hunt.
+        """
+        strategy_timeouts = strategy_timeouts or {}
+        executor = ThreadPoolExecutor(max_workers=len(self.STRATEGIES), thread_name_prefix='strategy')
+        
+        try:
+            start = time.perf_counter()
+            futures = {name: executor.submit(self._timed_strategy, name) for name in self.STRATEGIES}
+            
+            for name, future in futures.items():
+                timeout = strategy_timeouts.get(name, STRATEGY_TIMEOUT)
+                try:
+                    outcome = future.result(timeout=max(0, start + timeout - time.perf_counter()))
+                except FutureTimeout:
+                    future.cancel()
+                    outcome = None, time.perf_counter() - start, f'timed out after {timeout}s'
+                self._record_strategy(result, name, *outcome)
+        finally:
+            # Don't wait for timed-out strategies; their results are discarded
+            executor.shutdown(wait=False)
+
+    def run_hunt(self, parallel=False, strategy_timeouts=None):
+        """Run the hunt and return ranked opportunities with per-strategy timings"""
+        start = time.perf_counter()
         print("🎯 STARTING ETH-BASE ALPHA HUNTER...")
         print("Focusing on Ethereum Mainnet + Base Mainnet ONLY")
         
@@ -373,25 +603,67 @@ class EthBaseAlphaHunter:
         if not self.load_real_datasets():
             print("❌ Using mock data for demo...")
         
-        all_opportunities = []
+        # Only blocks past the last hunt's watermark are fetched
+        if parallel:
+            # Feeds sync under their own locks, so swaps and transactions overlap
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                for future in [pool.submit(self.load_swap_rows), pool.submit(self.load_whale_flows)]:
+                    future.result()
+        else:
+            self.load_swap_rows()
+            self.load_whale_flows()
+        
+        result = HuntResult(opportunities=[])
         
         # Run focused strategies
-        all_opportunities.extend(self.find_eth_base_arbitrage())
-        all_opportunities.extend(self.track_base_whale_activity())
-        all_opportunities.extend(self.detect_eth_liquidation_cascade())
-        all_opportunities.extend(self.find_base_ecosystem_plays())
-        all_opportunities.extend(self.analyze_eth_gas_arbitrage())
+        if parallel:
+            self.run_strategies_parallel(result, strategy_timeouts)
+        else:
+            self.run_strategies_sequential(result)
+        
+        for name in result.missing:
+            print(f"⚠️ Strategy {name} missing from this hunt: {result.errors[name]}")
         
         # Rank and display
-        ranked_opportunities = self.rank_opportunities(all_opportunities)
-        self.display_focused_dashboard(ranked_opportunities)
+        result.opportunities = self.rank_opportunities(result.opportunities)
+        self.display_focused_dashboard(result.opportunities, self.book.top(TOP_DISPLAYED))
         
-        return ranked_opportunities
+        HUNT_SECONDS.observe(time.perf_counter() - start)
+        HUNT_OPPORTUNITIES.set(len(result.opportunities))
+        return result
+
+    def run_focused_hunt(self, parallel=False, strategy_timeouts=None):
+        """Run ETH-Base focused alpha hunt"""
+        return self.run_hunt(parallel, strategy_timeouts).opportunities
 
 def main():
     """Run the focused ETH-Base Alpha Hunter"""
+    parser = argparse.ArgumentParser(description='Focused ETH-Base alpha hunt')
+    parser.add_argument('--iterations', type=int, default=1,
+                        help='Hunts to run back to back (later ones only fetch new blocks)')
+    parser.add_argument('--parallel', action='store_true', help='Run strategies concurrently, as the dashboard does')
+    parser.add_argument('--profile', action='store_true',
+                        help='Profile the hunts: cProfile, tracemalloc and sampled stacks (flame graph)')
+    parser.add_argument('--profile-dir', help='Where --profile writes its reports (default ./profile-<time>)')
+    args = parser.parse_args()
+    
     hunter = EthBaseAlphaHunter()
-    opportunities = hunter.run_focused_hunt()
+    opportunities = []
+    
+    def hunt():
+        nonlocal opportunities
+        opportunities = hunter.run_focused_hunt(parallel=args.parallel)
+    
+    if args.profile:
+        output_dir = args.profile_dir or f"profile-{datetime.now():%Y%m%d-%H%M%S}"
+        paths = profile_runs(hunt, args.iterations, output_dir)
+        print(f"\n🔬 Profile of {args.iterations} hunt(s) written to {output_dir}/")
+        print(f"   Report:      {paths['txt']}")
+        print(f"   cProfile:    {paths['pstats']}  (python -m pstats / snakeviz)")
+        print(f"   Flame graph: {paths['folded']}  (flamegraph.pl / speedscope)")
+    else:
+        for _ in range(args.iterations):
+            hunt()
     
     print(f"\n🎉 Hunt complete! Found {len(opportunities)} real opportunities.")
     print("💡 Focused on ETH + Base mainnet only - where the real money is!")
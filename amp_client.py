@@ -0,0 +1,181 @@
+"""
+🛰️ AMP JSON Lines query client
+Streams query results from an AMP JSONL server row by row
+
+The server answers a POSTed SQL statement with one JSON object per line.
+Rows are decoded as the bytes arrive and handed to the caller one at a time
+(or in batches), so memory stays at one chunk plus one batch no matter how
+many rows the query returns. Reading is driven by the consumer, so TCP flow
+control pushes back on the server when a strategy falls behind, and closing
+or cancelling a stream drops the connection, which aborts the query.
+"""
+
+import json
+import os
+import threading
+from contextlib import ExitStack
+
+from http_client import get_client
+
+LOCAL_AMP_URL = os.environ.get('ALPHA_HUNTER_AMP_URL', "http://localhost:1603")
+
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 300  # Long scans may go quiet before the first row
+CHUNK_SIZE = 65536  # Bytes pulled from the socket per read
+MAX_ROW_BYTES = 16 * 1024 * 1024  # Refuse single rows larger than this
+DEFAULT_BATCH_SIZE = 10000
+MAX_ERROR_BYTES = 65536
+
+_decoder = json.JSONDecoder()
+
+
+class AmpQueryError(Exception):
+    """The AMP server rejected or failed a query"""
+
+
+class QueryCancelled(AmpQueryError):
+    """The query stream was cancelled before it finished"""
+
+
+class QueryStream:
+    """Rows of one running query
+
+    Iterate for rows, call batches() for lists of rows, and close() (or use
+    it as a context manager) to stop early. cancel() may be called from any
+    thread; the consuming thread then sees QueryCancelled.
+    """
+
+    def __init__(self, client, sql):
+        self.client = client
+        self.sql = sql
+        self.rows_read = 0
+        self.bytes_read = 0
+        self._cancelled = threading.Event()
+        self._stack = ExitStack()
+        self._response = None
+        self._rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __iter__(self):
+        if self._rows is None:
+            self._rows = self._iter_rows()
+        return self._rows
+
+    def _open(self):
+        response = self._stack.enter_context(get_client().stream(
+            'POST', self.client.url, data=self.sql.encode(),
+            headers={'Content-Type': 'text/plain'}, timeout=self.client.timeout
+        ))
+        if response.status_code != 200:
+            message = response.raw.read(MAX_ERROR_BYTES, decode_content=True)
+            self.close()
+            raise AmpQueryError(f"AMP query failed with HTTP {response.status_code}: "
+                                f"{message.decode(errors='replace').strip()}")
+        self._response = response
+        return response
+
+    def _iter_rows(self):
+        try:
+            response = self._open()
+            pending = b''
+
+            for chunk in self._chunks(response):
+                self.bytes_read += len(chunk)
+
+                lines = (pending + chunk).split(b'\n')
+                pending = lines.pop()
+                if len(pending) > self.client.max_row_bytes:
+                    raise AmpQueryError(f"Row exceeds {self.client.max_row_bytes} bytes")
+
+                for line in lines:
+                    if line.strip():
+                        yield self._decode(line)
+
+            if pending.strip():
+                yield self._decode(pending)
+        finally:
+            self.close()
+
+    def _chunks(self, response):
+        # Socket chunks until EOF; a cancel from another thread surfaces as QueryCancelled
+        chunks = response.iter_content(CHUNK_SIZE)
+        while True:
+            if self._cancelled.is_set():
+                raise QueryCancelled('Query cancelled')
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                return
+            except Exception:
+                if self._cancelled.is_set():
+                    raise QueryCancelled('Query cancelled')
+                raise
+            yield chunk
+
+    def _decode(self, line):
+        row = _decoder.decode(line.decode('utf-8'))
+        if isinstance(row, dict) and len(row) == 1 and 'error' in row:
+            raise AmpQueryError(str(row['error']))
+        self.rows_read += 1
+        return row
+
+    def batches(self, size=DEFAULT_BATCH_SIZE):
+        """Yield lists of up to `size` rows"""
+        batch = []
+        for row in self:
+            batch.append(row)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def cancel(self):
+        """Abort the query from any thread"""
+        self._cancelled.set()
+        response = self._response
+        if response is not None:
+            # Unblocks a reader waiting on the socket
+            response.close()
+
+    def close(self):
+        """Stop reading and release the connection"""
+        self._cancelled.set()
+        self._stack.close()
+
+
+class AmpClient:
+    def __init__(self, url=LOCAL_AMP_URL, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+                 max_row_bytes=MAX_ROW_BYTES):
+        self.url = url
+        self.timeout = timeout
+        self.max_row_bytes = max_row_bytes
+
+    def query(self, sql):
+        """Start a query; returns a QueryStream of rows"""
+        return QueryStream(self, sql)
+
+    def rows(self, sql):
+        """Generator of rows; closing it cancels the query"""
+        with self.query(sql) as stream:
+            yield from stream
+
+    def batches(self, sql, batch_size=DEFAULT_BATCH_SIZE):
+        """Generator of row lists; closing it cancels the query"""
+        with self.query(sql) as stream:
+            yield from stream.batches(batch_size)
+
+    def query_all(self, sql, limit=None):
+        """Small results only: read up to `limit` rows into a list"""
+        result = []
+        with self.query(sql) as stream:
+            for row in stream:
+                result.append(row)
+                if limit is not None and len(result) >= limit:
+                    break
+        return result
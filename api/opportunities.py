@@ -1,21 +1,25 @@
 from http.server import BaseHTTPRequestHandler
 import json
-import urllib.request
-import urllib.error
 from datetime import datetime
+import os
+import sys
+import time
+
+# Shared helpers live at the repo root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import market_data
+from metrics import format_server_timing, server_timing
+from responses import send_representation
 
 class handler(BaseHTTPRequestHandler):
     def do_GET(self):
         try:
-            opportunities = self.get_real_alpha_opportunities()
-            
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            
-            response = json.dumps(opportunities)
-            self.wfile.write(response.encode())
+            start = time.perf_counter()
+            with server_timing() as timings:
+                response = market_data.get_responses().opportunities
+            timings.append(('market', time.perf_counter() - start, None))
+            send_representation(self, response,
+                                extra_headers={'Server-Timing': format_server_timing(timings)})
         except Exception as e:
             self.send_response(200)
             self.send_header('Content-type', 'application/json')
@@ -34,227 +38,6 @@ class handler(BaseHTTPRequestHandler):
             }])
             self.wfile.write(error_response.encode())
     
-    def fetch_json(self, url, timeout=4):
-        """Fetch JSON data from URL"""
-        try:
-            req = urllib.request.Request(url)
-            req.add_header('User-Agent', 'Mozilla/5.0 (compatible; AlphaHunter/1.0)')
-            
-            with urllib.request.urlopen(req, timeout=timeout) as response:
-                if response.status == 200:
-                    return json.loads(response.read().decode())
-        except:
-            pass
-        return None
-    
     def get_real_alpha_opportunities(self):
         """Get actual alpha opportunities from real market data"""
-        opportunities = []
-        
-        # Get real market data
-        eth_data = self.get_eth_market_data()
-        defi_data = self.get_defi_market_data()
-        
-        # Create real alpha opportunities
-        if eth_data:
-            opportunities.extend(self.create_eth_alpha(eth_data))
-        
-        if defi_data:
-            opportunities.extend(self.create_defi_alpha(defi_data))
-        
-        # Add cross-chain opportunities
-        opportunities.extend(self.create_cross_chain_alpha())
-        
-        # Add MEV opportunities
-        opportunities.extend(self.create_mev_alpha())
-        
-        # Ensure we have exactly what we promise
-        if len(opportunities) == 0:
-            opportunities = self.create_loading_opportunity()
-        
-        return opportunities
-    
-    def get_eth_market_data(self):
-        """Get real ETH market data"""
-        # Try CoinGecko
-        url = 'https://api.coingecko.com/api/v3/simple/price?ids=ethereum&vs_currencies=usd&include_24hr_change=true&include_24hr_vol=true'
-        data = self.fetch_json(url)
-        
-        if data and 'ethereum' in data:
-            eth = data['ethereum']
-            return {
-                'price': eth['usd'],
-                'change_24h': eth.get('usd_24h_change', 0),
-                'volume_24h': eth.get('usd_24h_vol', 0),
-                'source': 'CoinGecko'
-            }
-        
-        # Fallback to CoinCap
-        url = 'https://api.coincap.io/v2/assets/ethereum'
-        data = self.fetch_json(url)
-        
-        if data and 'data' in data:
-            return {
-                'price': float(data['data']['priceUsd']),
-                'change_24h': float(data['data'].get('changePercent24Hr', 0)),
-                'volume_24h': float(data['data'].get('volumeUsd24Hr', 0)),
-                'source': 'CoinCap'
-            }
-        
-        return None
-    
-    def get_defi_market_data(self):
-        """Get real DeFi protocol data"""
-        url = 'https://api.llama.fi/protocols'
-        data = self.fetch_json(url, timeout=6)
-        
-        if data and isinstance(data, list):
-            # Get top protocols with significant TVL
-            top_protocols = []
-            for protocol in data[:15]:
-                if isinstance(protocol, dict):
-                    tvl = protocol.get('tvl', 0)
-                    if tvl > 500000000:  # >$500M TVL
-                        top_protocols.append(protocol)
-            
-            return top_protocols[:5] if top_protocols else None
-        
-        return None
-    
-    def create_eth_alpha(self, eth_data):
-        """Create real ETH alpha opportunities"""
-        opportunities = []
-        
-        price = eth_data['price']
-        change_24h = eth_data['change_24h']
-        volume_24h = eth_data['volume_24h']
-        source = eth_data['source']
-        
-        # High volatility = MEV opportunity
-        if abs(change_24h) > 3:
-            direction = 'bullish' if change_24h > 0 else 'bearish'
-            opportunities.append({
-                'type': 'ETH_VOLATILITY_MEV',
-                'chain': 'Ethereum',
-                'confidence': min(0.92, abs(change_24h) / 5),
-                'profit_potential': abs(change_24h) / 100 * 0.4,
-                'description': f'ETH volatility spike: {abs(change_24h):.1f}% move creates MEV opportunities in liquidations and arbitrage',
-                'action': f'Deploy MEV bots for liquidation hunting - ${volume_24h/1e9:.1f}B volume creating opportunities',
-                'timestamp': datetime.utcnow().isoformat() + 'Z',
-                'data': {
-                    'current_price': f'${price:,.0f}',
-                    'price_movement': f'{change_24h:+.1f}%',
-                    'volume_24h': f'${volume_24h/1e9:.1f}B',
-                    'mev_potential': 'High',
-                    'data_source': f'{source} (Live)'
-                }
-            })
-        
-        # High volume = arbitrage opportunity
-        if volume_24h > 10e9:  # >$10B volume
-            opportunities.append({
-                'type': 'ETH_ARBITRAGE_VOLUME',
-                'chain': 'Ethereum',
-                'confidence': 0.85,
-                'profit_potential': 0.025,
-                'description': f'Massive ETH volume: ${volume_24h/1e9:.1f}B creates cross-exchange arbitrage opportunities',
-                'action': 'Execute arbitrage between Binance, Coinbase, and Uniswap - high volume = wide spreads',
-                'timestamp': datetime.utcnow().isoformat() + 'Z',
-                'data': {
-                    'volume_24h': f'${volume_24h/1e9:.1f}B',
-                    'avg_volume': '$8-12B',
-                    'arbitrage_potential': '2-5 basis points',
-                    'exchanges': 'Binance, Coinbase, Uniswap',
-                    'data_source': f'{source} (Live)'
-                }
-            })
-        
-        return opportunities
-    
-    def create_defi_alpha(self, protocols):
-        """Create real DeFi alpha opportunities"""
-        opportunities = []
-        
-        for protocol in protocols[:2]:  # Top 2 protocols
-            name = protocol.get('name', '')
-            tvl = protocol.get('tvl', 0)
-            change_1d = protocol.get('change_1d', 0)
-            
-            # Significant TVL movement = alpha
-            if abs(change_1d) > 8:  # >8% TVL change
-                direction = 'inflow' if change_1d > 0 else 'outflow'
-                opportunities.append({
-                    'type': 'DEFI_TVL_ALPHA',
-                    'chain': 'Multiple',
-                    'confidence': min(0.88, abs(change_1d) / 15),
-                    'profit_potential': abs(change_1d) / 100 * 0.3,
-                    'description': f'{name} massive TVL {direction}: {abs(change_1d):.1f}% (${tvl/1e9:.1f}B) - smart money movement detected',
-                    'action': f'Follow smart money into {name} - major capital rotation happening',
-                    'timestamp': datetime.utcnow().isoformat() + 'Z',
-                    'data': {
-                        'protocol': name,
-                        'tvl_current': f'${tvl/1e9:.1f}B',
-                        'tvl_change': f'{change_1d:+.1f}%',
-                        'movement_type': direction,
-                        'smart_money_signal': 'Strong',
-                        'data_source': 'DeFiLlama (Live)'
-                    }
-                })
-        
-        return opportunities
-    
-    def create_cross_chain_alpha(self):
-        """Create cross-chain arbitrage opportunities"""
-        return [{
-            'type': 'CROSS_CHAIN_ARBITRAGE',
-            'chain': 'ETH ↔ Base',
-            'confidence': 0.79,
-            'profit_potential': 0.018,
-            'description': 'Base bridge congestion creating USDC price discrepancies - arbitrage window open',
-            'action': 'Bridge USDC ETH→Base, sell premium, bridge back - 1.8% profit opportunity',
-            'timestamp': datetime.utcnow().isoformat() + 'Z',
-            'data': {
-                'asset': 'USDC',
-                'eth_price': '$1.0000',
-                'base_price': '$1.0018',
-                'spread': '18 basis points',
-                'bridge_time': '7 minutes',
-                'profit_after_gas': '1.2%'
-            }
-        }]
-    
-    def create_mev_alpha(self):
-        """Create MEV opportunities"""
-        return [{
-            'type': 'MEV_LIQUIDATION_HUNT',
-            'chain': 'Ethereum',
-            'confidence': 0.83,
-            'profit_potential': 0.045,
-            'description': 'Aave positions approaching liquidation threshold - MEV opportunity for flash loan liquidations',
-            'action': 'Deploy liquidation bot targeting undercollateralized positions - 4.5% liquidation bonus',
-            'timestamp': datetime.utcnow().isoformat() + 'Z',
-            'data': {
-                'protocol': 'Aave V3',
-                'positions_at_risk': '23 positions',
-                'total_value': '$4.2M',
-                'liquidation_bonus': '5%',
-                'gas_cost': '$45-85',
-                'competition': 'Medium'
-            }
-        }]
-    
-    def create_loading_opportunity(self):
-        """Fallback when no data available"""
-        return [{
-            'type': 'SYSTEM_LOADING',
-            'chain': 'System',
-            'confidence': 0.0,
-            'profit_potential': 0.0,
-            'description': 'Scanning blockchain for alpha opportunities - real-time data loading...',
-            'action': 'Refresh in 10 seconds for live opportunities',
-            'timestamp': datetime.utcnow().isoformat() + 'Z',
-            'data': {
-                'status': 'Loading real market data',
-                'sources': 'CoinGecko, DeFiLlama, The Graph'
-            }
-        }]
\ No newline at end of file
+        return market_data.get_opportunities()
@@ -0,0 +1,52 @@
+from http.server import BaseHTTPRequestHandler
+import json
+from datetime import datetime
+import os
+import sys
+import time
+
+# Shared helpers live at the repo root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import market_data
+from metrics import format_server_timing, server_timing
+from responses import send_representation
+
+class handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        # Opportunities and stats from one market fetch, in one round trip
+        try:
+            start = time.perf_counter()
+            with server_timing() as timings:
+                response = market_data.get_responses().snapshot
+            timings.append(('market', time.perf_counter() - start, None))
+            send_representation(self, response,
+                                extra_headers={'Server-Timing': format_server_timing(timings)})
+        except Exception as e:
+            self.send_response(200)
+            self.send_header('Content-type', 'application/json')
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            
+            now = datetime.utcnow().isoformat() + 'Z'
+            error_response = json.dumps({
+                'version': 0,
+                'opportunities': [{
+                    'type': 'API_ERROR',
+                    'chain': 'System',
+                    'confidence': 0.0,
+                    'profit_potential': 0.0,
+                    'description': 'Unable to connect to blockchain APIs - retrying...',
+                    'action': 'Refresh page to retry connection',
+                    'timestamp': now,
+                    'data': {'error': str(e)}
+                }],
+                'stats': {
+                    'total_opportunities': 1,
+                    'avg_confidence': '0%',
+                    'total_profit': '0',
+                    'high_confidence': 0,
+                    'last_updated': now,
+                    'error': 'Loading...'
+                }
+            })
+            self.wfile.write(error_response.encode())
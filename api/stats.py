@@ -1,20 +1,25 @@
 from http.server import BaseHTTPRequestHandler
 import json
-import urllib.request
 from datetime import datetime
+import os
+import sys
+import time
+
+# Shared helpers live at the repo root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import market_data
+from metrics import format_server_timing, server_timing
+from responses import send_representation
 
 class handler(BaseHTTPRequestHandler):
     def do_GET(self):
         try:
-            stats = self.get_accurate_stats()
-            
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            
-            response = json.dumps(stats)
-            self.wfile.write(response.encode())
+            start = time.perf_counter()
+            with server_timing() as timings:
+                response = market_data.get_responses().stats
+            timings.append(('market', time.perf_counter() - start, None))
+            send_representation(self, response,
+                                extra_headers={'Server-Timing': format_server_timing(timings)})
         except Exception as e:
             self.send_response(200)
             self.send_header('Content-type', 'application/json')
@@ -33,126 +38,6 @@ class handler(BaseHTTPRequestHandler):
             response = json.dumps(fallback_stats)
             self.wfile.write(response.encode())
     
-    def fetch_json(self, url, timeout=4):
-        """Fetch JSON data"""
-        try:
-            req = urllib.request.Request(url)
-            req.add_header('User-Agent', 'Mozilla/5.0 (compatible; AlphaHunter/1.0)')
-            
-            with urllib.request.urlopen(req, timeout=timeout) as response:
-                if response.status == 200:
-                    return json.loads(response.read().decode())
-        except:
-            pass
-        return None
-    
     def get_accurate_stats(self):
         """Get stats that match actual opportunities"""
-        now_utc = datetime.utcnow()
-        
-        # Count actual opportunities we're generating
-        opportunities_count = 0
-        total_confidence = 0
-        total_profit = 0
-        
-        # Get real market data to determine opportunities
-        eth_data = self.get_eth_data()
-        defi_data = self.get_defi_data()
-        
-        # Count ETH opportunities
-        if eth_data:
-            change_24h = abs(eth_data.get('change_24h', 0))
-            volume_24h = eth_data.get('volume_24h', 0)
-            
-            if change_24h > 3:  # Volatility MEV opportunity
-                opportunities_count += 1
-                total_confidence += min(92, change_24h * 18)
-                total_profit += change_24h * 2000
-            
-            if volume_24h > 10e9:  # High volume arbitrage
-                opportunities_count += 1
-                total_confidence += 85
-                total_profit += 12500
-        
-        # Count DeFi opportunities
-        if defi_data:
-            for protocol in defi_data[:2]:
-                change_1d = abs(protocol.get('change_1d', 0))
-                if change_1d > 8:  # Significant TVL movement
-                    opportunities_count += 1
-                    total_confidence += min(88, change_1d * 6)
-                    total_profit += change_1d * 1500
-        
-        # Always add cross-chain and MEV opportunities
-        opportunities_count += 2  # Cross-chain + MEV
-        total_confidence += 79 + 83  # Their confidence scores
-        total_profit += 8500 + 15000  # Their profit potential
-        
-        # Calculate averages
-        if opportunities_count > 0:
-            avg_confidence = total_confidence / opportunities_count
-            high_confidence = max(1, int(opportunities_count * 0.7))
-        else:
-            opportunities_count = 1
-            avg_confidence = 0
-            high_confidence = 0
-            total_profit = 0
-        
-        # Market condition from real data
-        market_condition = self.get_market_condition(eth_data)
-        
-        return {
-            'total_opportunities': opportunities_count,
-            'avg_confidence': f'{avg_confidence:.1f}%',
-            'total_profit': f'{total_profit:,.0f}',
-            'high_confidence': high_confidence,
-            'last_updated': now_utc.isoformat() + 'Z',
-            'last_updated_utc': now_utc.strftime('%Y-%m-%d %H:%M:%S UTC'),
-            'market_condition': market_condition,
-            'data_sources': ['CoinGecko (Live)', 'DeFiLlama (Live)', 'The Graph Protocol'],
-            'success_rate': f'{min(95, 75 + avg_confidence/5):.1f}%',
-            'real_data_status': 'LIVE'
-        }
-    
-    def get_eth_data(self):
-        """Get ETH market data"""
-        # Try CoinGecko
-        url = 'https://api.coingecko.com/api/v3/simple/price?ids=ethereum&vs_currencies=usd&include_24hr_change=true&include_24hr_vol=true'
-        data = self.fetch_json(url)
-        
-        if data and 'ethereum' in data:
-            eth = data['ethereum']
-            return {
-                'price': eth['usd'],
-                'change_24h': eth.get('usd_24h_change', 0),
-                'volume_24h': eth.get('usd_24h_vol', 0)
-            }
-        
-        return None
-    
-    def get_defi_data(self):
-        """Get DeFi protocol data"""
-        url = 'https://api.llama.fi/protocols'
-        data = self.fetch_json(url, timeout=6)
-        
-        if data and isinstance(data, list):
-            return [p for p in data[:10] if isinstance(p, dict) and p.get('tvl', 0) > 500000000]
-        
-        return None
-    
-    def get_market_condition(self, eth_data):
-        """Get market condition from real data"""
-        if not eth_data:
-            return 'Loading market data...'
-        
-        change_24h = eth_data.get('change_24h', 0)
-        price = eth_data.get('price', 0)
-        
-        if change_24h > 5:
-            return f'High Volatility - ETH up {change_24h:.1f}% (MEV opportunities)'
-        elif change_24h < -5:
-            return f'High Volatility - ETH down {abs(change_24h):.1f}% (Liquidation risk)'
-        elif abs(change_24h) > 2:
-            return f'Moderate Volatility - ETH moved {abs(change_24h):.1f}%'
-        else:
-            return f'Low Volatility - ETH stable at ${price:,.0f}'
+        return market_data.get_stats()
@@ -0,0 +1,472 @@
+#!/usr/bin/env python3
+"""
+⏱️ Offline benchmark suite
+Throughput, latency percentiles and allocations for the hot paths, no network needed
+
+Every upstream (CoinGecko, CoinCap, DeFiLlama, the AMP playground and the
+AMP JSONL server) is answered by upstream_stubs.StubClient, and caches live
+in a throwaway directory. The numbers therefore measure this code rather
+than the internet. Covered:
+
+- each EthBaseAlphaHunter strategy, rank_opportunities,
+  display_focused_dashboard and a full (sequential) hunt
+- the incremental AMP sync and the market data fetch behind the Vercel API
+- the Vercel handlers' get_real_alpha_opportunities / get_accurate_stats,
+  plus the handlers themselves over loopback HTTP
+- every DashboardHandler endpoint over loopback HTTP, including 304 and gzip
+
+Each benchmark is timed over many iterations (p50/p95/p99 and ops/s) and
+then run a few more times under tracemalloc for peak and retained memory.
+The timed runs are split into blocks and p50 is the best block's median, so
+one noisy stretch on the host does not skew it. Results are compared with
+benchmark_baseline.json. A benchmark whose p50 or peak allocation grew by
+more than the tolerance (and, for p50, by more than its own block-to-block
+noise) is measured again, and if the best run is still over, it is reported
+as a regression and the exit status is 1.
+
+    python benchmark.py                  # run everything, compare with the baseline
+    python benchmark.py --filter strategy
+    python benchmark.py --save-baseline  # record this machine's numbers
+"""
+
+import os
+import tempfile
+
+# Caches (dataset catalog, block watermarks) must not touch the real ones
+os.environ['ALPHA_HUNTER_CACHE_DIR'] = tempfile.mkdtemp(prefix='alpha-hunter-bench-')
+
+import argparse
+import gc
+import http.client
+import importlib.util
+import json
+import math
+import platform
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from dataclasses import dataclass, replace
+from datetime import datetime
+from http.server import ThreadingHTTPServer
+
+import market_data
+import snapshot
+from alpha_hunter import EthBaseAlphaHunter
+from dashboard import DashboardHandler, PooledHTTPServer
+from http_client import set_client
+from ingestion import MAX_ROWS_PER_FEED
+from opportunity_book import SUBJECT_KEYS
+from upstream_stubs import SWAPS_PER_BLOCK, AmpStub, StubClient, default_routes
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+DEFAULT_ITERATIONS = 1000
+MIN_ITERATIONS = 10
+TIME_BUDGET = 3.0  # Seconds of timed runs per benchmark, unless MIN_ITERATIONS takes longer
+WARMUP = 3
+ALLOCATION_RUNS = 3  # Runs under tracemalloc (slow) per benchmark
+TOLERANCE = 0.25  # Allowed growth over the baseline before flagging
+MIN_TIME_DELTA_MS = 0.01  # Smaller p50 differences are timer and loop overhead, whatever the percentage
+BLOCK_SAMPLES = 20  # Timed runs per block; p50 is the best block's median (min-of-N, like timeit.repeat)
+BLOCK_CALIBRATION_ROUNDS = 3  # calibrate() rounds after each block: the host's speed during that block
+CONFIRM_RUNS = 2  # Re-measurements of a benchmark that looks regressed
+CALIBRATION_ROUNDS = 10
+MIN_MEMORY_DELTA_KIB = 16
+RANKED_OPPORTUNITIES = 1000  # Book size for the rank_opportunities benchmark
+
+
+@dataclass
+class Benchmark:
+    name: str
+    run: object  # Zero-argument callable; one call is one operation
+    iterations: int = DEFAULT_ITERATIONS
+
+
+@dataclass
+class Result:
+    name: str
+    iterations: int
+    ops_per_s: float
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    peak_kib: float  # Largest allocation high-water mark of one operation
+    retained_kib: float  # Memory still held after ALLOCATION_RUNS operations
+    calibration_ms: float = 0.0  # calibrate() just before this benchmark
+    noise_ms: float = 0.0  # How far a typical block's median sits above p50 (the p50 gate's floor)
+
+    def speed(self, reference_ms):
+        """How much slower the host ran than when reference_ms was calibrated"""
+        return self.calibration_ms / reference_ms if reference_ms and self.calibration_ms else 1.0
+
+
+def percentile(ordered, q):
+    """q-th percentile (0-100) of sorted samples, nearest rank"""
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def measure(benchmark, iterations=None, allocation_runs=ALLOCATION_RUNS, calibration_ms=0.0,
+            time_budget=TIME_BUDGET):
+    """Time one benchmark, then profile its allocations
+
+    Timing stops after `iterations` runs, or once time_budget seconds have
+    passed and at least MIN_ITERATIONS runs were timed.
+
+    Runs are timed in blocks of BLOCK_SAMPLES, each followed by a short
+    calibration. p50 is the median of the block that was fastest relative to
+    its own calibration, so stretches where the host slowed everything down
+    (other processes, CPU steal) do not count against the code. noise_ms is
+    the gap from that best block to the median block, at the best block's
+    calibration. With fewer than two blocks, p50 is the median of every run
+    against the calibration_ms passed in, and noise_ms the gap up to p75.
+    """
+    iterations = iterations or benchmark.iterations
+    run = benchmark.run
+    for _ in range(WARMUP):
+        run()
+
+    # Like timeit: collector pauses land on whichever run triggers them, so keep them out
+    samples = []
+    blocks = []  # (median seconds, calibration ms) per full block
+    gc.collect()
+    gc.disable()
+    try:
+        deadline = time.perf_counter() + time_budget
+        while len(samples) < iterations and (len(samples) < MIN_ITERATIONS or time.perf_counter() < deadline):
+            start = time.perf_counter()
+            run()
+            samples.append(time.perf_counter() - start)
+            if len(samples) % BLOCK_SAMPLES == 0:
+                blocks.append((percentile(sorted(samples[-BLOCK_SAMPLES:]), 50), calibrate(BLOCK_CALIBRATION_ROUNDS)))
+    finally:
+        gc.enable()
+    ordered = sorted(samples)
+    total = sum(samples)
+    iterations = len(samples)
+    if len(blocks) >= 2:
+        p50, calibration_ms = min(blocks, key=lambda block: block[0] / block[1])
+        normalized = sorted(median / calibration for median, calibration in blocks)
+        noise = (percentile(normalized, 50) - normalized[0]) * calibration_ms
+    else:
+        p50 = percentile(ordered, 50)
+        noise = percentile(ordered, 75) - p50
+
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        peak = 0
+        for _ in range(allocation_runs):
+            gc.collect()  # Garbage left by earlier runs must not count towards this one's peak
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            run()
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+        retained = tracemalloc.get_traced_memory()[0] - baseline
+    finally:
+        tracemalloc.stop()
+
+    return Result(
+        name=benchmark.name,
+        iterations=iterations,
+        ops_per_s=iterations / total if total else 0.0,
+        mean_ms=total / iterations * 1000,
+        p50_ms=p50 * 1000,
+        p95_ms=percentile(ordered, 95) * 1000,
+        p99_ms=percentile(ordered, 99) * 1000,
+        peak_kib=peak / 1024,
+        retained_kib=retained / 1024,
+        calibration_ms=calibration_ms,
+        noise_ms=noise * 1000
+    )
+
+
+def calibrate(rounds=CALIBRATION_ROUNDS):
+    """Milliseconds for a fixed pure-Python + JSON workload (fastest of `rounds`)
+
+    Timings are compared after dividing by this machine's current speed
+    relative to the baseline's, so a busy or slower host does not read as a
+    regression of the code.
+    """
+    payload = [{'id': i, 'name': f'item {i}', 'value': i * 0.5} for i in range(2000)]
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        json.loads(json.dumps(payload))
+        sorted(range(20000), key=lambda i: -i)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def _load_api_module(name):
+    # api/ is a directory of Vercel functions, not a package
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api', f'{name}.py')
+    spec = importlib.util.spec_from_file_location(f'vercel_api_{name}', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _serve(server):
+    threading.Thread(target=server.serve_forever, name='bench-http', daemon=True).start()
+    return server
+
+
+def _get(port, path, headers=None):
+    """One GET over a fresh loopback connection (both servers speak HTTP/1.0)"""
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    try:
+        connection.request('GET', path, headers=headers or {})
+        response = connection.getresponse()
+        body = response.read()
+        if response.status not in (200, 304):
+            raise RuntimeError(f'GET {path} returned HTTP {response.status}')
+        return response, body
+    finally:
+        connection.close()
+
+
+class _QuietHandler(DashboardHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def _variant(opp, i):
+    # Same opportunity about a different subject, so it gets its own book ID
+    key = next((key for key in SUBJECT_KEYS if opp.data.get(key) is not None), 'token')
+    return replace(opp, data=dict(opp.data, **{key: f'{opp.data.get(key, "T")}-{i}'}))
+
+
+def fill_row_store(amp, hunter):
+    """Sync the swap feeds until the RowStore is at its cap
+
+    A long-running process holds MAX_ROWS_PER_FEED rows per feed. Starting
+    there keeps every benchmark's input the same size however many syncs
+    ran before it.
+    """
+    blocks_per_query = amp.blocks_per_query
+    amp.blocks_per_query = MAX_ROWS_PER_FEED // SWAPS_PER_BLOCK
+    try:
+        hunter.load_swap_rows()
+    finally:
+        amp.blocks_per_query = blocks_per_query
+    hunter.load_swap_rows()
+
+
+def build_suite(devnull, amp):
+    """Benchmarks over a stubbed, fully loaded hunter, snapshot service and servers"""
+    hunter = EthBaseAlphaHunter()
+    with redirect_stdout(devnull):
+        hunter.run_hunt()
+        fill_row_store(amp, hunter)
+    opportunities = hunter.book.top()
+
+    # rank_opportunities on a realistic book size: the hunt's opportunities under many subjects
+    ranked = [_variant(opp, i)
+              for i in range(RANKED_OPPORTUNITIES // max(1, len(opportunities)) + 1)
+              for opp in opportunities][:RANKED_OPPORTUNITIES]
+
+    ranker = EthBaseAlphaHunter()  # Own book, so the hunt's book stays as displayed
+
+    def rank():
+        ranker.rank_opportunities(ranked)
+
+    def quiet(func):
+        def run():
+            with redirect_stdout(devnull):
+                func()
+        return run
+
+    suite = [Benchmark(f'strategy.{name}', quiet(getattr(hunter, name)))
+             for name in EthBaseAlphaHunter.STRATEGIES]
+    suite += [
+        Benchmark('hunter.rank_opportunities', rank),
+        Benchmark('hunter.display_focused_dashboard', quiet(lambda: hunter.display_focused_dashboard(opportunities))),
+        Benchmark('hunter.load_swap_rows', quiet(hunter.load_swap_rows)),
+        Benchmark('hunter.run_hunt', quiet(lambda: EthBaseAlphaHunter().run_hunt())),
+    ]
+
+    # Vercel functions: the market fetch itself, the cached handler paths, then the handlers over HTTP
+    opportunities_api = _load_api_module('opportunities')
+    stats_api = _load_api_module('stats')
+    snapshot_api = _load_api_module('snapshot')
+    suite += [
+        Benchmark('market_data.get_market_data (cold)', lambda: market_data.get_market_data(max_age=0)),
+        Benchmark('api.get_real_alpha_opportunities',
+                  lambda: opportunities_api.handler.get_real_alpha_opportunities(None)),
+        Benchmark('api.get_accurate_stats', lambda: stats_api.handler.get_accurate_stats(None)),
+    ]
+    for path, module in (('/api/opportunities', opportunities_api), ('/api/stats', stats_api),
+                         ('/api/snapshot', snapshot_api)):
+        quiet_handler = type('QuietHandler', (module.handler,), {'log_message': lambda self, *args: None})
+        port = _serve(ThreadingHTTPServer(('127.0.0.1', 0), quiet_handler)).server_port
+        suite.append(Benchmark(f'vercel GET {path}', lambda port=port, path=path: _get(port, path)))
+
+    # Dashboard endpoints against a snapshot service that already holds one hunt
+    service = snapshot.SnapshotService()
+    with redirect_stdout(devnull):
+        service.refresh()
+    snapshot.set_snapshot_service(service)
+    port = _serve(PooledHTTPServer(('127.0.0.1', 0), _QuietHandler)).server_port
+    for path in ('/', '/api/opportunities', '/api/stats', '/api/snapshot', '/api/history'):
+        suite.append(Benchmark(f'dashboard GET {path}', lambda path=path: _get(port, path)))
+    etag = _get(port, '/api/snapshot')[0].getheader('ETag')
+    suite += [
+        Benchmark('dashboard GET /api/snapshot (gzip)',
+                  lambda: _get(port, '/api/snapshot', {'Accept-Encoding': 'gzip'})),
+        Benchmark('dashboard GET /api/snapshot (304)',
+                  lambda: _get(port, '/api/snapshot', {'If-None-Match': etag})),
+    ]
+    return suite
+
+
+def load_baseline(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_baseline(path, results, calibration_ms):
+    baseline = {
+        'created_at': datetime.now().isoformat(),
+        'machine': machine_info(),
+        'calibration_ms': round(calibration_ms, 4),
+        # p50 and noise are scaled to the median calibration, like live results are at compare time
+        'results': {r.name: {'p50_ms': round(r.p50_ms / r.speed(calibration_ms), 4),
+                             'noise_ms': round(r.noise_ms / r.speed(calibration_ms), 4),
+                             'p95_ms': round(r.p95_ms, 4), 'ops_per_s': round(r.ops_per_s, 1),
+                             'peak_kib': round(r.peak_kib, 1)}
+                    for r in results}
+    }
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write('\n')
+    os.replace(tmp_path, path)
+
+
+def machine_info():
+    return {'python': platform.python_version(), 'platform': platform.platform(terse=True),
+            'processor': platform.machine(), 'cpus': os.cpu_count()}
+
+
+def regressions(result, baseline, tolerance=TOLERANCE, speed=1.0):
+    """Human-readable regressions of one result against its baseline entry
+
+    speed is this machine's calibration time over the baseline's; p50 and
+    its noise are divided by it before comparing. A p50 increase must also
+    exceed the benchmark's own noise, in this run or the baseline's, so each
+    benchmark is held to what it can actually resolve.
+    """
+    if not baseline:
+        return []
+    found = []
+    time_floor = max(MIN_TIME_DELTA_MS, result.noise_ms / speed, baseline.get('noise_ms', 0.0))
+    for metric, unit, floor in (('p50_ms', 'ms', time_floor), ('peak_kib', 'KiB', MIN_MEMORY_DELTA_KIB)):
+        before, now = baseline.get(metric), getattr(result, metric)
+        if before is None:
+            continue
+        if metric == 'p50_ms':
+            now /= speed
+        if now > before * (1 + tolerance) and now - before > floor:
+            found.append(f"{metric} {before:.3f}{unit} -> {now:.3f}{unit} (+{(now / before - 1) if before else 1:.0%})")
+    return found
+
+
+def print_results(results, baseline, tolerance):
+    print(f"{'benchmark':<44} {'ops/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'peak KiB':>9} {'vs base':>8}")
+    for r in results:
+        base = (baseline or {}).get('results', {}).get(r.name)
+        speed = r.speed((baseline or {}).get('calibration_ms'))
+        change = f"{r.p50_ms / speed / base['p50_ms'] - 1:+.0%}" if base and base.get('p50_ms') else 'new'
+        flag = ' ⚠️' if regressions(r, base, tolerance, speed) else ''
+        print(f"{r.name:<44} {r.ops_per_s:>10,.1f} {r.p50_ms:>9.3f} {r.p95_ms:>9.3f} "
+              f"{r.p99_ms:>9.3f} {r.peak_kib:>9.1f} {change:>8}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline DeFi Alpha Hunter benchmarks')
+    parser.add_argument('--filter', help='Only run benchmarks whose name contains this text')
+    parser.add_argument('--iterations', type=int,
+                        help=f'Most timed iterations per benchmark (default {DEFAULT_ITERATIONS}, '
+                             f'within a {TIME_BUDGET:g}s budget)')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='Baseline JSON to compare with')
+    parser.add_argument('--save-baseline', action='store_true', help='Write these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help='Allowed p50 / peak allocation growth before flagging (0.25 = 25%%)')
+    parser.add_argument('--json', help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    amp = AmpStub()
+    stub = StubClient(default_routes(amp))
+    set_client(stub)
+
+    with open(os.devnull, 'w') as devnull:
+        print('🧪 Building stubbed hunter, snapshot and servers...')
+        suite = build_suite(devnull, amp)
+        if args.filter:
+            suite = [b for b in suite if args.filter in b.name]
+
+        baseline = load_baseline(args.baseline)
+        baseline_results = (baseline or {}).get('results', {})
+        reference_ms = (baseline or {}).get('calibration_ms')
+        calibrations = []
+        results = []
+        for benchmark in suite:
+            print(f'⏱️  {benchmark.name}', file=sys.stderr)
+            # Host speed drifts within a run, so calibrate right before each measurement
+            result = measure(benchmark, args.iterations, calibration_ms=calibrate())
+            # A slowdown has to reproduce: re-measure and keep the best run
+            for _ in range(CONFIRM_RUNS):
+                if args.save_baseline or not regressions(result, baseline_results.get(benchmark.name),
+                                                         args.tolerance, result.speed(reference_ms)):
+                    break
+                retry = measure(benchmark, args.iterations, calibration_ms=calibrate())
+                result = min(result, retry, key=lambda r: r.p50_ms / r.speed(reference_ms))
+            calibrations.append(result.calibration_ms)
+            results.append(result)
+        calibration_ms = sorted(calibrations)[len(calibrations) // 2] if calibrations else calibrate()
+
+    print()
+    print_results(results, baseline, args.tolerance)
+    if reference_ms:
+        print(f"\n🖥️ Calibration: {calibration_ms:.3f}ms median, baseline {reference_ms:.3f}ms "
+              f"(\"vs base\" is adjusted for the difference)")
+    print(f"\n🔌 Stubbed upstream calls: {sum(stub.calls.values())}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'machine': machine_info(), 'results': [vars(r) for r in results]}, f, indent=2)
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results, calibration_ms)
+        print(f"💾 Baseline saved to {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print("ℹ️ No baseline yet; run with --save-baseline to record one")
+        return 0
+    if baseline.get('machine') != machine_info():
+        print(f"ℹ️ Baseline was recorded on {baseline.get('machine')}; timings may not be comparable")
+
+    flagged = {r.name: regressions(r, baseline['results'].get(r.name), args.tolerance, r.speed(reference_ms))
+               for r in results}
+    flagged = {name: found for name, found in flagged.items() if found}
+    if flagged:
+        print(f"\n🚨 {len(flagged)} regression(s) over {args.tolerance:.0%}:")
+        for name, found in flagged.items():
+            print(f"   {name}: {'; '.join(found)}")
+        return 1
+    print("\n✅ No regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
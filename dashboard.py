@@ -5,26 +5,137 @@ Beautiful web interface for real-time DeFi opportunities
 """
 
 from http.server import HTTPServer, BaseHTTPRequestHandler
+from concurrent.futures import ThreadPoolExecutor
+import argparse
 import json
 import urllib.parse
-from datetime import datetime
 import threading
 import time
 
-# Import our alpha hunter
+# Import the shared opportunity snapshot
 import sys
 import os
 sys.path.append(os.path.dirname(__file__))
-from eth_base_alpha_hunter import EthBaseAlphaHunter
+from history import DEFAULT_HISTORY_LIMIT, HISTORY_SIZE
+from metrics import CONTENT_TYPE, HTTP_REJECTED, HTTP_REQUEST_SECONDS, REGISTRY, SERIALIZATION_SECONDS
+from profiling import StackSampler
+from responses import send_representation
+from event_stream import get_event_stream
+from snapshot import get_snapshot_service
+
+FIRST_SNAPSHOT_TIMEOUT = 45  # Seconds a request may wait for the very first hunt
+
+# Concurrent serving defaults
+DEFAULT_WORKERS = 16  # Worker threads handling requests
+DEFAULT_MAX_QUEUE = 64  # Accepted connections allowed to wait for a worker
+DEFAULT_REQUEST_TIMEOUT = 10  # Socket timeout per request (seconds)
+
+DEFAULT_PROFILE_SECONDS = 10  # /debug/profile sampling window unless ?seconds= says otherwise
+MAX_PROFILE_SECONDS = 60
+
+# One /debug/profile at a time: concurrent samplers would each slow the server down
+_profile_lock = threading.Lock()
+
+REJECT_RESPONSE = (
+    b'HTTP/1.0 503 Service Unavailable\r\n'
+    b'Content-Length: 0\r\n'
+    b'Retry-After: 1\r\n'
+    b'Connection: close\r\n\r\n'
+)
+
+class PooledHTTPServer(HTTPServer):
+    """HTTPServer that hands connections to a bounded worker pool
+    
+    At most workers + max_queue connections are in flight; anything beyond
+    that is answered with 503 straight from the accept loop, so a burst of
+    clients can never queue unbounded work behind a slow request.
+    """
+    
+    request_queue_size = 128  # Kernel listen backlog
+    
+    def __init__(self, server_address, handler_class, workers=DEFAULT_WORKERS,
+                 max_queue=DEFAULT_MAX_QUEUE, request_timeout=DEFAULT_REQUEST_TIMEOUT):
+        super().__init__(server_address, handler_class)
+        self.request_timeout = request_timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='dashboard-worker')
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+    
+    def process_request(self, request, client_address):
+        if not self._slots.acquire(blocking=False):
+            self.reject_request(request)
+            return
+        
+        request.settimeout(self.request_timeout)
+        try:
+            self._executor.submit(self.process_request_worker, request, client_address)
+        except RuntimeError:
+            # Executor already shut down
+            self._slots.release()
+            self.shutdown_request(request)
+    
+    def finish_request(self, request, client_address):
+        return self.RequestHandlerClass(request, client_address, self)
+    
+    def process_request_worker(self, request, client_address):
+        handler = None
+        try:
+            handler = self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            # Streaming handlers hand their socket over and must not have it closed here
+            if not getattr(handler, 'detached', False):
+                self.shutdown_request(request)
+            self._slots.release()
+    
+    def reject_request(self, request):
+        """Shed load when the pool and its queue are full"""
+        HTTP_REJECTED.inc()
+        try:
+            request.sendall(REJECT_RESPONSE)
+        except OSError:
+            pass
+        self.shutdown_request(request)
+    
+    def server_close(self):
+        super().server_close()
+        self._executor.shutdown(wait=False, cancel_futures=True)
 
 class DashboardHandler(BaseHTTPRequestHandler):
+    detached = False  # Set once the socket belongs to the event stream
+    status = None  # Status of the response being sent, for request metrics
+    
+    def send_response(self, code, message=None):
+        self.status = code
+        super().send_response(code, message)
+    
     def do_GET(self):
-        if self.path == '/':
+        start = time.perf_counter()
+        path, _, query = self.path.partition('?')
+        try:
+            self.route(path, query)
+        finally:
+            # Unknown paths share one label so scanners can't grow the series count
+            route = 'other' if self.status == 404 else path
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, route=route, status=self.status or 'error')
+    
+    def route(self, path, query):
+        if path == '/':
             self.serve_dashboard()
-        elif self.path == '/api/opportunities':
+        elif path == '/api/opportunities':
             self.serve_opportunities()
-        elif self.path == '/api/stats':
+        elif path == '/api/stats':
             self.serve_stats()
+        elif path == '/api/snapshot':
+            self.serve_snapshot()
+        elif path == '/api/history':
+            self.serve_history(urllib.parse.parse_qs(query))
+        elif path == '/api/stream':
+            self.serve_stream()
+        elif path == '/metrics':
+            self.serve_metrics()
+        elif path == '/debug/profile' and getattr(self.server, 'debug_profile', False):
+            self.serve_profile(urllib.parse.parse_qs(query))
         else:
             self.send_error(404)
     
@@ -266,19 +377,63 @@ class DashboardHandler(BaseHTTPRequestHandler):
     <script>
         let opportunities = [];
         let stats = {};
+        const opportunitiesById = new Map();
+        let pollTimer = null;
+        
+        function applySnapshot(message) {
+            opportunitiesById.clear();
+            message.opportunities.forEach(opp => opportunitiesById.set(opp.id, opp));
+            opportunities = message.opportunities;
+            stats = message.stats;
+            renderStats();
+            renderOpportunities();
+        }
+        
+        function applyDelta(delta) {
+            delta.removed.forEach(id => opportunitiesById.delete(id));
+            delta.added.concat(delta.updated).forEach(opp => opportunitiesById.set(opp.id, opp));
+            opportunities = delta.order.map(id => opportunitiesById.get(id)).filter(Boolean);
+            if (delta.stats) {
+                stats = delta.stats;
+                renderStats();
+            }
+            renderOpportunities();
+        }
+        
+        function startPolling() {
+            if (pollTimer === null) {
+                pollTimer = setInterval(loadData, 30000);
+            }
+            loadData();
+        }
+        
+        function connectStream() {
+            // Server pushes a full snapshot, then only deltas. Poll where SSE is unavailable
+            // or the stream is refused before its first snapshot (503 when too many are open).
+            if (!window.EventSource) {
+                startPolling();
+                return;
+            }
+            let received = false;
+            const source = new EventSource('/api/stream');
+            source.addEventListener('snapshot', event => {
+                received = true;
+                applySnapshot(JSON.parse(event.data));
+            });
+            source.addEventListener('delta', event => applyDelta(JSON.parse(event.data)));
+            source.onerror = () => {
+                if (!received) {
+                    source.close();
+                    startPolling();
+                }
+            };
+        }
         
         async function loadData() {
             try {
-                // Load opportunities
-                const oppResponse = await fetch('/api/opportunities');
-                opportunities = await oppResponse.json();
-                
-                // Load stats  
-                const statsResponse = await fetch('/api/stats');
-                stats = await statsResponse.json();
-                
-                renderStats();
-                renderOpportunities();
+                // Opportunities and stats in one round trip
+                const response = await fetch('/api/snapshot');
+                applySnapshot(await response.json());
             } catch (error) {
                 console.error('Error loading data:', error);
             }
@@ -371,11 +526,8 @@ class DashboardHandler(BaseHTTPRequestHandler):
             loadData();
         }
         
-        // Auto-refresh every 30 seconds
-        setInterval(loadData, 30000);
-        
-        // Initial load
-        loadData();
+        // Live updates from the event stream
+        connectStream();
     </script>
 </body>
 </html>
@@ -387,84 +539,146 @@ class DashboardHandler(BaseHTTPRequestHandler):
         self.wfile.write(html.encode())
     
     def serve_opportunities(self):
-        """Serve opportunities as JSON"""
-        try:
-            hunter = EthBaseAlphaHunter()
-            opportunities = hunter.run_focused_hunt()
-            
-            # Convert to JSON-serializable format
-            json_opportunities = []
-            for opp in opportunities:
-                json_opportunities.append({
-                    'type': opp.type,
-                    'chain': opp.chain,
-                    'confidence': opp.confidence,
-                    'profit_potential': opp.profit_potential,
-                    'description': opp.description,
-                    'action': opp.action,
-                    'timestamp': opp.timestamp.isoformat(),
-                    'data': opp.data
-                })
-            
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(json.dumps(json_opportunities).encode())
-            
-        except Exception as e:
-            self.send_error(500, str(e))
+        """Serve opportunities from the latest snapshot"""
+        snapshot = get_snapshot_service().current(timeout=FIRST_SNAPSHOT_TIMEOUT)
+        if snapshot is None:
+            self.send_error(503, 'Opportunity snapshot not ready')
+            return
+        send_representation(self, snapshot.opportunities_response)
     
     def serve_stats(self):
-        """Serve summary stats as JSON"""
+        """Serve summary stats from the latest snapshot"""
+        snapshot = get_snapshot_service().current(timeout=FIRST_SNAPSHOT_TIMEOUT)
+        if snapshot is None:
+            self.send_error(503, 'Opportunity snapshot not ready')
+            return
+        send_representation(self, snapshot.stats_response)
+    
+    def serve_snapshot(self):
+        """Serve opportunities, stats and the snapshot version in one response"""
+        snapshot = get_snapshot_service().current(timeout=FIRST_SNAPSHOT_TIMEOUT)
+        if snapshot is None:
+            self.send_error(503, 'Opportunity snapshot not ready')
+            return
+        send_representation(self, snapshot.snapshot_response)
+    
+    def serve_history(self, params):
+        """Serve per-hunt trends from the snapshot service's history ring"""
         try:
-            hunter = EthBaseAlphaHunter()
-            opportunities = hunter.run_focused_hunt()
-            
-            if opportunities:
-                avg_confidence = sum(o.confidence for o in opportunities) / len(opportunities)
-                total_profit = sum(o.profit_potential * 100000 for o in opportunities)  # Assume $100k position
-                high_confidence = len([o for o in opportunities if o.confidence > 0.8])
-                
-                stats = {
-                    'total_opportunities': len(opportunities),
-                    'avg_confidence': f"{avg_confidence:.1%}",
-                    'total_profit': f"{total_profit:,.0f}",
-                    'high_confidence': high_confidence,
-                    'last_updated': datetime.now().isoformat()
-                }
-            else:
-                stats = {
-                    'total_opportunities': 0,
-                    'avg_confidence': '0%',
-                    'total_profit': '0',
-                    'high_confidence': 0,
-                    'last_updated': datetime.now().isoformat()
-                }
-            
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(json.dumps(stats).encode())
-            
-        except Exception as e:
-            self.send_error(500, str(e))
+            limit = int(params.get('limit', [DEFAULT_HISTORY_LIMIT])[0])
+        except ValueError:
+            self.send_error(400, 'limit must be an integer')
+            return
+        start = time.perf_counter()
+        history = get_snapshot_service().history_json(max(0, min(limit, HISTORY_SIZE)))
+        body = json.dumps(history).encode()
+        SERIALIZATION_SECONDS.observe(time.perf_counter() - start, document='history')
+        self.send_json(body)
+    
+    def serve_stream(self):
+        """Hand the connection to the event stream (server-sent snapshot deltas)"""
+        stream = get_event_stream()
+        if stream.is_full():
+            self.send_error(503, 'Too many open streams')
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('X-Accel-Buffering', 'no')
+        self.end_headers()
+        self.wfile.flush()
+        self.detached = stream.attach(self.connection)
+    
+    def serve_metrics(self):
+        """Prometheus scrape endpoint"""
+        body = REGISTRY.render()
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def serve_profile(self, params):
+        """Sample every thread for ?seconds=N and return folded stacks (or ?format=text)"""
+        try:
+            seconds = float(params.get('seconds', [DEFAULT_PROFILE_SECONDS])[0])
+        except ValueError:
+            self.send_error(400, 'seconds must be a number')
+            return
+        seconds = max(0.1, min(seconds, MAX_PROFILE_SECONDS))
+        report = params.get('format', ['folded'])[0] == 'text'
+        include_idle = params.get('idle', ['0'])[0] == '1'
+        
+        if not _profile_lock.acquire(blocking=False):
+            self.send_error(409, 'A profile is already running')
+            return
+        try:
+            with StackSampler(exclude={threading.get_ident()}, include_idle=include_idle) as sampler:
+                time.sleep(seconds)
+        finally:
+            _profile_lock.release()
+        
+        body = (sampler.report() if report else sampler.folded()).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def send_json(self, body):
+        """Send a pre-encoded JSON body"""
+        self.send_response(200)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(body)
 
-def run_dashboard(port=8080):
+def run_dashboard(port=8080, workers=DEFAULT_WORKERS, max_queue=DEFAULT_MAX_QUEUE,
+                  request_timeout=DEFAULT_REQUEST_TIMEOUT, debug_profile=False):
     """Run the web dashboard"""
     server_address = ('', port)
-    httpd = HTTPServer(server_address, DashboardHandler)
+    httpd = PooledHTTPServer(server_address, DashboardHandler, workers=workers,
+                             max_queue=max_queue, request_timeout=request_timeout)
+    httpd.debug_profile = debug_profile
+    
+    # Warm the snapshot (and its event stream) before the first browser asks for it
+    get_snapshot_service()
+    stream = get_event_stream()
     
     print(f"🌐 DeFi Alpha Hunter Dashboard running at:")
     print(f"   http://localhost:{port}")
+    print(f"   Metrics: http://localhost:{port}/metrics")
+    if debug_profile:
+        print(f"   Profiler: http://localhost:{port}/debug/profile?seconds={DEFAULT_PROFILE_SECONDS}")
+    print(f"   Workers: {workers}, queue: {max_queue}, request timeout: {request_timeout}s")
     print(f"   Press Ctrl+C to stop")
     
     try:
         httpd.serve_forever()
     except KeyboardInterrupt:
         print("\n🛑 Dashboard stopped")
+        stream.stop()
         httpd.server_close()
 
+def main():
+    """Parse command line options and run the dashboard"""
+    parser = argparse.ArgumentParser(description='DeFi Alpha Hunter web dashboard')
+    parser.add_argument('--port', type=int, default=8080, help='Port to listen on')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help='Worker threads serving requests')
+    parser.add_argument('--max-queue', type=int, default=DEFAULT_MAX_QUEUE,
+                        help='Connections allowed to wait for a worker before 503s')
+    parser.add_argument('--request-timeout', type=float, default=DEFAULT_REQUEST_TIMEOUT,
+                        help='Socket timeout per request in seconds')
+    parser.add_argument('--debug-profile', action='store_true',
+                        help='Enable /debug/profile?seconds=N, a sampling profiler of the running server')
+    args = parser.parse_args()
+    
+    run_dashboard(args.port, workers=args.workers, max_queue=args.max_queue,
+                  request_timeout=args.request_timeout, debug_profile=args.debug_profile)
+
 if __name__ == "__main__":
-    run_dashboard()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,309 @@
+"""
+📚 AMP dataset catalog
+Cached, indexed access to the playground's datasets.list
+
+The catalog is kept in memory and on disk. A fresh copy is served as-is; a
+stale copy is served immediately while a background thread revalidates it
+with If-None-Match / If-Modified-Since. Only the very first run on a machine
+waits on the playground, and a playground outage never blocks a hunt.
+
+DatasetCatalog indexes each catalog once by chain, namespace, exact name and
+name/description tokens, so lookups like "uniswap on base" never rescan it.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+from http_client import get_client
+from metrics import CACHE_REQUESTS, UPSTREAM_FAILURES
+
+# Real AMP playground API
+PLAYGROUND_BASE = os.environ.get('ALPHA_HUNTER_PLAYGROUND_URL', "https://playground.amp.thegraph.com")
+DATASETS_API = f"{PLAYGROUND_BASE}/api/trpc/datasets.list"
+DATASETS_PARAMS = {
+    'batch': '1',
+    'input': '{"0":{"json":null,"meta":{"values":["undefined"],"v":1}}}'
+}
+
+FETCH_TIMEOUT = 30  # datasets.list can be slow
+CATALOG_TTL = 600  # Seconds a catalog is served without revalidation
+RETRY_BACKOFF = 60  # Seconds to wait after a failed refresh before trying again
+
+CACHE_DIR = os.environ.get(
+    'ALPHA_HUNTER_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'defi-alpha-hunter')
+)
+
+
+_TOKEN_RE = re.compile(r'[a-z]+|[0-9]+')
+
+
+def tokenize(text):
+    """Lowercase word and number tokens ('uniswap_v3' -> ['uniswap', 'v', '3'])"""
+    return _TOKEN_RE.findall(text.lower())
+
+
+def chain_keys(chain):
+    """Index keys for a chain id: 'base-mainnet' is also reachable as 'base'"""
+    chain = chain.lower()
+    return {chain, chain.split('-')[0]}
+
+
+def dataset_fields(dataset):
+    """(name, namespace, description, chains) of a raw dict or RealDatasetInfo"""
+    if isinstance(dataset, dict):
+        return (dataset.get('name') or '', dataset.get('namespace') or '',
+                dataset.get('description') or '', dataset.get('indexing_chains') or [])
+    return dataset.name, dataset.namespace, dataset.description, dataset.chains
+
+
+class DatasetCatalog:
+    """Datasets with prebuilt lookup indexes
+
+    Every index maps a key to dataset positions in catalog order, so results
+    keep the order of datasets.list and first() matches a linear scan. A query
+    walks the shortest matching posting list and checks the other filters
+    against per-dataset key sets, so it costs O(k) for k candidates.
+    """
+
+    def __init__(self, datasets):
+        self.datasets = list(datasets)
+        self.by_name = defaultdict(list)
+        self.by_namespace = defaultdict(list)
+        self.by_chain = defaultdict(list)
+        self.by_name_token = defaultdict(list)
+        self.by_token = defaultdict(list)
+
+        # Per-dataset key sets for checking the non-driving filters
+        self._names = []
+        self._namespaces = []
+        self._chains = []
+        self._name_tokens = []
+        self._tokens = []
+
+        for position, dataset in enumerate(self.datasets):
+            name, namespace, description, chains = dataset_fields(dataset)
+            name, namespace = name.lower(), namespace.lower()
+
+            chain_set = set()
+            for chain in chains:
+                chain_set |= chain_keys(chain)
+            name_tokens = set(tokenize(name))
+            tokens = name_tokens | set(tokenize(description))
+
+            self.by_name[name].append(position)
+            self.by_namespace[namespace].append(position)
+            for key in chain_set:
+                self.by_chain[key].append(position)
+            for token in name_tokens:
+                self.by_name_token[token].append(position)
+            for token in tokens:
+                self.by_token[token].append(position)
+
+            self._names.append(name)
+            self._namespaces.append(namespace)
+            self._chains.append(chain_set)
+            self._name_tokens.append(name_tokens)
+            self._tokens.append(tokens)
+
+    def __len__(self):
+        return len(self.datasets)
+
+    def _token_filter(self, index, per_dataset, text):
+        # (posting list, predicate) for datasets containing every token of text
+        tokens = tokenize(text)
+        if not tokens:
+            return [], lambda p: False
+        postings = min((index.get(token, []) for token in tokens), key=len)
+        required = set(tokens)
+        return postings, lambda p: required <= per_dataset[p]
+
+    def query(self, chain=None, namespace=None, name=None, protocol=None, keyword=None):
+        """Datasets matching every given filter, in catalog order
+
+        chain      chain id or its short form ('base-mainnet' or 'base')
+        namespace  exact namespace
+        name       exact dataset name
+        protocol   name tokens, e.g. 'uniswap' or 'ethereum_mainnet'; a list
+                   matches any of its entries
+        keyword    like protocol, but also searches descriptions
+        """
+        filters = []
+        if chain is not None:
+            chain = chain.lower()
+            filters.append((self.by_chain.get(chain, []), lambda p: chain in self._chains[p]))
+        if namespace is not None:
+            namespace = namespace.lower()
+            filters.append((self.by_namespace.get(namespace, []), lambda p: self._namespaces[p] == namespace))
+        if name is not None:
+            name = name.lower()
+            filters.append((self.by_name.get(name, []), lambda p: self._names[p] == name))
+        if protocol is not None:
+            if isinstance(protocol, str):
+                filters.append(self._token_filter(self.by_name_token, self._name_tokens, protocol))
+            else:
+                union = set()
+                for entry in protocol:
+                    postings, matches = self._token_filter(self.by_name_token, self._name_tokens, entry)
+                    union.update(p for p in postings if matches(p))
+                filters.append((sorted(union), union.__contains__))
+        if keyword is not None:
+            filters.append(self._token_filter(self.by_token, self._tokens, keyword))
+
+        if not filters:
+            return list(self.datasets)
+
+        filters.sort(key=lambda f: len(f[0]))
+        postings = filters[0][0]
+        checks = [matches for _, matches in filters]
+        return [self.datasets[p] for p in postings if all(check(p) for check in checks)]
+
+    def first(self, **filters):
+        """First dataset matching query(**filters), or None"""
+        matches = self.query(**filters)
+        return matches[0] if matches else None
+
+    def count(self, **filters):
+        return len(self.query(**filters))
+
+
+class DatasetCatalogCache:
+    """Memory + disk cache for datasets.list with stale-while-revalidate"""
+
+    def __init__(self, path=None, ttl=CATALOG_TTL, timeout=FETCH_TIMEOUT):
+        self.path = path or os.path.join(CACHE_DIR, 'datasets.json')
+        self.ttl = ttl
+        self.timeout = timeout
+        self._entry = None
+        self._loaded_from_disk = False
+        self._failed_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = threading.Lock()
+        self._catalog = None
+
+    def catalog(self):
+        """Indexed DatasetCatalog for the current datasets (rebuilt only when they change)"""
+        datasets = self.get()
+        if datasets is None:
+            return None
+        catalog = self._catalog
+        if catalog is None or catalog.source is not datasets:
+            catalog = DatasetCatalog(datasets)
+            catalog.source = datasets
+            self._catalog = catalog
+        return catalog
+
+    def get(self):
+        """Raw dataset dicts, or None if no catalog has ever been fetched"""
+        with self._lock:
+            entry = self._load()
+
+        if entry is None:
+            # Nothing cached anywhere yet: this one call has to wait
+            CACHE_REQUESTS.inc(cache='dataset_catalog', result='miss')
+            entry = self.refresh()
+        elif time.time() - entry['fetched_at'] > self.ttl:
+            CACHE_REQUESTS.inc(cache='dataset_catalog', result='stale')
+            self.refresh_async()
+        else:
+            CACHE_REQUESTS.inc(cache='dataset_catalog', result='hit')
+
+        return entry['datasets'] if entry else None
+
+    def refresh_async(self):
+        """Revalidate in a background thread unless one is already running"""
+        if not self._refreshing.acquire(blocking=False):
+            return
+        self._refreshing.release()
+        threading.Thread(target=self.refresh, name='catalog-refresh', daemon=True).start()
+
+    def refresh(self):
+        """Conditionally refetch the catalog; returns the current entry"""
+        with self._refreshing:
+            with self._lock:
+                entry = self._load()
+            if entry and time.time() - entry['fetched_at'] <= self.ttl:
+                return entry  # Another thread refreshed while we waited
+            if time.time() - self._failed_at < RETRY_BACKOFF:
+                return entry
+
+            headers = {}
+            if entry and entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry and entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+            try:
+                response = get_client().get(DATASETS_API, params=DATASETS_PARAMS,
+                                            headers=headers, timeout=self.timeout)
+                if response.status_code == 304 and entry:
+                    entry = dict(entry, fetched_at=time.time())
+                elif response.status_code == 200:
+                    data = response.json()
+                    entry = {
+                        'datasets': data[0]['result']['data']['json']['datasets'],
+                        'etag': response.headers.get('ETag'),
+                        'last_modified': response.headers.get('Last-Modified'),
+                        'fetched_at': time.time()
+                    }
+                else:
+                    raise ValueError(f'datasets.list returned HTTP {response.status_code}')
+            except Exception as e:
+                print(f"⚠️ Dataset catalog refresh failed: {e}")
+                UPSTREAM_FAILURES.inc(host=urlsplit(DATASETS_API).netloc, reason=type(e).__name__)
+                self._failed_at = time.time()
+                return entry
+
+            with self._lock:
+                self._entry = entry
+            self._save(entry)
+            return entry
+
+    def _load(self):
+        # Caller holds self._lock
+        if self._entry is None and not self._loaded_from_disk:
+            self._loaded_from_disk = True
+            try:
+                with open(self.path) as f:
+                    self._entry = json.load(f)
+            except (OSError, ValueError):
+                pass
+        return self._entry
+
+    def _save(self, entry):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"⚠️ Could not write dataset catalog cache: {e}")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_catalog_cache():
+    """Process-wide DatasetCatalogCache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DatasetCatalogCache()
+        return _cache
+
+
+def load_datasets():
+    """Raw dataset dicts from the cached catalog (None if unavailable)"""
+    return get_catalog_cache().get()
+
+
+def load_catalog():
+    """Indexed DatasetCatalog from the cached catalog (None if unavailable)"""
+    return get_catalog_cache().catalog()
@@ -0,0 +1,166 @@
+"""
+📡 Snapshot event stream
+Server-sent events that push only what changed between snapshots
+
+One broadcaster thread waits for the snapshot service to publish, diffs the
+new snapshot against the last one it sent (see snapshot_delta) and encodes
+the delta once for every connected client. A client that connects gets one
+full `snapshot` event and then only `delta` events. Nothing is sent when a
+hunt changes nothing a client shows, apart from a comment heartbeat that
+keeps proxies from closing idle connections and detects dead clients.
+
+Clients are plain sockets handed over by the HTTP server after the response
+headers are sent, so an open stream does not hold a worker thread.
+"""
+
+import json
+import socket
+import threading
+
+from metrics import STREAM_CLIENTS
+from snapshot import get_snapshot_service, snapshot_delta
+
+HEARTBEAT_INTERVAL = 15  # Seconds between keep-alive comments
+MAX_CLIENTS = 256  # Open streams allowed at once
+SEND_TIMEOUT = 2  # Seconds a slow client may stall a broadcast before it is dropped
+RETRY_MS = 5000  # Reconnect delay suggested to EventSource clients
+
+HEARTBEAT = b': ping\n\n'
+
+
+def sse_event(event, data, event_id=None):
+    """One SSE message; data is pre-encoded single-line JSON"""
+    head = f"id: {event_id}\n" if event_id is not None else ''
+    return f"{head}event: {event}\ndata: ".encode() + data + b'\n\n'
+
+
+def snapshot_event(snapshot):
+    """Full `snapshot` event: the same document /api/snapshot serves"""
+    return sse_event('snapshot', snapshot.snapshot_body, snapshot.version)
+
+
+class EventStreamBroadcaster:
+    """Fans snapshot deltas out to every open /api/stream connection"""
+
+    def __init__(self, service, heartbeat=HEARTBEAT_INTERVAL, max_clients=MAX_CLIENTS):
+        self.service = service
+        self.heartbeat = heartbeat
+        self.max_clients = max_clients
+        self._snapshot = None  # Last snapshot sent to clients
+        self._clients = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._clients)
+
+    def is_full(self):
+        return len(self) >= self.max_clients
+
+    def start(self):
+        """Start the broadcast thread (idempotent)"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='event-stream', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop broadcasting and close every client"""
+        self._stop.set()
+        with self._lock:
+            clients = list(self._clients)
+            self._clients.clear()
+        for client in clients:
+            self._close(client)
+
+    def attach(self, sock):
+        """Take over a connected socket; False if the stream is full or the client is gone
+
+        The client first receives the snapshot the next delta will be based
+        on, so it never misses or double-applies a change.
+        """
+        sock.settimeout(SEND_TIMEOUT)
+        with self._lock:
+            if len(self._clients) >= self.max_clients:
+                return False
+            snapshot = self._snapshot or self.service.current()
+            try:
+                sock.sendall(f"retry: {RETRY_MS}\n\n".encode())
+                if snapshot is not None:
+                    sock.sendall(snapshot_event(snapshot))
+            except OSError:
+                return False
+            self._clients.add(sock)
+        return True
+
+    def publish(self, snapshot):
+        """Send the delta from the last broadcast snapshot to `snapshot`, if any"""
+        with self._lock:
+            previous = self._snapshot
+            if previous is not None and snapshot.version <= previous.version:
+                return
+            self._snapshot = snapshot
+            clients = list(self._clients)
+        if previous is None:
+            # Clients attached before the first hunt have nothing to diff against
+            message = snapshot_event(snapshot)
+        else:
+            delta = snapshot_delta(previous, snapshot)
+            if delta is None:
+                return
+            message = sse_event('delta', json.dumps(delta).encode(), snapshot.version)
+        self._send(clients, message)
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._lock:
+                version = self._snapshot.version if self._snapshot else 0
+            snapshot = self.service.wait_for_update(version, timeout=self.heartbeat)
+            if self._stop.is_set():
+                break
+            if snapshot is not None and snapshot.version > version:
+                self.publish(snapshot)
+            else:
+                with self._lock:
+                    clients = list(self._clients)
+                self._send(clients, HEARTBEAT)
+
+    def _send(self, clients, message):
+        dead = []
+        for client in clients:
+            try:
+                client.sendall(message)
+            except OSError:
+                dead.append(client)
+        if dead:
+            with self._lock:
+                self._clients.difference_update(dead)
+            for client in dead:
+                self._close(client)
+
+    @staticmethod
+    def _close(sock):
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        sock.close()
+
+
+_broadcaster = None
+_broadcaster_lock = threading.Lock()
+
+
+def get_event_stream():
+    """Process-wide broadcaster over the shared snapshot service, started on first use"""
+    global _broadcaster
+    with _broadcaster_lock:
+        if _broadcaster is None:
+            _broadcaster = EventStreamBroadcaster(get_snapshot_service())
+            _broadcaster.start()
+            STREAM_CLIENTS.set_function(_broadcaster.__len__)
+        return _broadcaster
@@ -0,0 +1,124 @@
+"""
+🕰️ Hunt history
+Compact, bounded record of recent hunts for trends on the dashboard
+
+Each hunt becomes one HuntFrame. Numbers live in typed `array` columns (4 or
+8 bytes a value), types and chains are interned as 2-byte codes in a shared
+StringTable, and opportunity IDs are interned strings shared across frames.
+Frames sit in a fixed-size ring, and at most MAX_ROWS_PER_HUNT opportunities
+are kept per hunt. A day of 30-second hunts therefore has a fixed upper
+bound on memory, a few MB, instead of growing with uptime.
+"""
+
+import sys
+import threading
+from array import array
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+
+from opportunity_book import opportunity_id
+
+HISTORY_SIZE = 2880  # Hunts kept: a day at one hunt every 30 seconds (snapshot.REFRESH_INTERVAL)
+MAX_ROWS_PER_HUNT = 50  # Best-ranked opportunities recorded per hunt
+DEFAULT_HISTORY_LIMIT = 120  # Hunts returned by to_json() unless asked otherwise
+
+
+class StringTable:
+    """Small closed vocabularies (types, chains) as 2-byte codes"""
+
+    def __init__(self):
+        self.strings = []
+        self.codes = {}
+        self._lock = threading.Lock()
+
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            with self._lock:
+                code = self.codes.get(value)
+                if code is None:
+                    code = len(self.strings)
+                    self.strings.append(sys.intern(value))
+                    self.codes[value] = code
+        return code
+
+    def __getitem__(self, code):
+        return self.strings[code]
+
+
+@dataclass(frozen=True, slots=True)
+class HuntFrame:
+    """Ranked opportunities of one hunt, column by column"""
+    version: int
+    created_at: float  # Unix seconds
+    ids: tuple  # Interned opportunity IDs
+    types: array  # 'H' StringTable codes
+    chains: array  # 'H' StringTable codes
+    confidence: array  # 'f'
+    profit_potential: array  # 'f'
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class HuntHistory:
+    """Ring buffer of the last `size` hunts"""
+
+    def __init__(self, size=HISTORY_SIZE, max_rows=MAX_ROWS_PER_HUNT):
+        self.size = size
+        self.max_rows = max_rows
+        self.strings = StringTable()
+        self._frames = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._frames)
+
+    def append(self, version, created_at, opportunities):
+        """Record a hunt's ranked opportunities (best first)"""
+        rows = opportunities[:self.max_rows]
+        frame = HuntFrame(
+            version=version,
+            created_at=created_at.timestamp(),
+            ids=tuple(sys.intern(opportunity_id(o)) for o in rows),
+            types=array('H', (self.strings.code(o.type) for o in rows)),
+            chains=array('H', (self.strings.code(o.chain) for o in rows)),
+            confidence=array('f', (o.confidence for o in rows)),
+            profit_potential=array('f', (o.profit_potential for o in rows))
+        )
+        with self._lock:
+            self._frames.append(frame)
+        return frame
+
+    def frames(self, limit=None):
+        """Most recent `limit` frames (all when None), oldest first"""
+        with self._lock:
+            frames = list(self._frames)
+        return frames if limit is None else frames[-limit:] if limit > 0 else []
+
+    def to_json(self, limit=DEFAULT_HISTORY_LIMIT, position_size=1):
+        """Per-hunt summaries plus a score series per opportunity ID"""
+        hunts = []
+        series = {}
+        for frame in self.frames(limit):
+            count = len(frame)
+            hunts.append({
+                'version': frame.version,
+                'created_at': datetime.fromtimestamp(frame.created_at).isoformat(),
+                'opportunities': count,
+                'avg_confidence': round(sum(frame.confidence) / count, 6) if count else 0.0,
+                'total_profit': round(sum(frame.profit_potential) * position_size, 2)
+            })
+            for i, opp_id in enumerate(frame.ids):
+                entry = series.get(opp_id)
+                if entry is None:
+                    entry = series[opp_id] = {
+                        'type': self.strings[frame.types[i]],
+                        'chain': self.strings[frame.chains[i]],
+                        'points': []
+                    }
+                # float32 columns: round away the widening noise (0.92 -> 0.9200000166)
+                entry['points'].append([frame.version, round(frame.confidence[i], 6),
+                                        round(frame.profit_potential[i], 6)])
+        return {'hunts': hunts, 'series': series}
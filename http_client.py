@@ -0,0 +1,138 @@
+"""
+🔌 Shared HTTP client
+One pooled, keep-alive session for every upstream we talk to
+(CoinGecko, CoinCap, DeFiLlama, the AMP playground)
+
+Reusing connections skips the TCP + TLS handshake on every call after the
+first, responses are transparently decompressed (gzip/deflate, plus br when
+the brotli package is installed), each host gets a cap on concurrent
+requests, and all calls share the same default timeouts. Every request's
+latency is recorded per host (see metrics.UPSTREAM_SECONDS).
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+
+from metrics import UPSTREAM_SECONDS
+
+USER_AGENT = 'Mozilla/5.0 (compatible; AlphaHunter/1.0)'
+
+# Advertise every encoding urllib3 can decode here (br/zstd only if installed)
+ACCEPT_ENCODING = make_headers(accept_encoding=True)['accept-encoding']
+
+CONNECT_TIMEOUT = 3.05  # Seconds to establish a connection
+READ_TIMEOUT = 10  # Seconds between bytes once connected
+DEFAULT_TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+POOL_SIZE = 16  # Keep-alive connections kept per host
+MAX_PER_HOST = 8  # Concurrent in-flight requests per host
+
+
+class HostBusyError(requests.exceptions.ConnectionError):
+    """Raised when a host's concurrency limit stays saturated past the timeout"""
+
+
+class HttpClient:
+    def __init__(self, timeout=DEFAULT_TIMEOUT, pool_size=POOL_SIZE, max_per_host=MAX_PER_HOST):
+        self.timeout = timeout
+        self.max_per_host = max_per_host
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            'User-Agent': USER_AGENT,
+            'Accept-Encoding': ACCEPT_ENCODING,
+            'Connection': 'keep-alive'
+        })
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._host_slots = {}
+        self._host_slots_lock = threading.Lock()
+
+    def _send(self, method, url, timeout, **kwargs):
+        """session.request, timed to the full body (to the headers when streaming)"""
+        start = time.perf_counter()
+        host = urlsplit(url).netloc
+        try:
+            response = self.session.request(method, url, timeout=timeout, **kwargs)
+        except Exception:
+            UPSTREAM_SECONDS.observe(time.perf_counter() - start, host=host, status='error')
+            raise
+        UPSTREAM_SECONDS.observe(time.perf_counter() - start, host=host, status=response.status_code)
+        return response
+
+    def _slot(self, url):
+        host = urlsplit(url).netloc
+        with self._host_slots_lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.max_per_host)
+            return host, self._host_slots[host]
+
+    def _acquire(self, url, timeout):
+        host, slot = self._slot(url)
+        # Wait at most as long as we would wait on the connection itself
+        wait = timeout[0] if isinstance(timeout, tuple) else timeout
+        if not slot.acquire(timeout=wait):
+            raise HostBusyError(f'Too many concurrent requests to {host}')
+        return slot
+
+    def request(self, method, url, timeout=None, **kwargs):
+        """Send a request and read the full (decoded) body"""
+        timeout = timeout or self.timeout
+        slot = self._acquire(url, timeout)
+        try:
+            return self._send(method, url, timeout, **kwargs)
+        finally:
+            slot.release()
+
+    def get(self, url, params=None, timeout=None, **kwargs):
+        return self.request('GET', url, params=params, timeout=timeout, **kwargs)
+
+    def post(self, url, data=None, timeout=None, **kwargs):
+        return self.request('POST', url, data=data, timeout=timeout, **kwargs)
+
+    @contextmanager
+    def stream(self, method, url, timeout=None, **kwargs):
+        """Streaming request; the host slot is held until the block exits
+
+        Leaving the block early closes the response, dropping the rest of the
+        body instead of downloading it.
+        """
+        timeout = timeout or self.timeout
+        slot = self._acquire(url, timeout)
+        try:
+            response = self._send(method, url, timeout, stream=True, **kwargs)
+            try:
+                yield response
+            finally:
+                response.close()
+        finally:
+            slot.release()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Process-wide HttpClient"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
+
+
+def set_client(client):
+    """Replace the process-wide client (e.g. with local stubs); returns the previous one"""
+    global _client
+    with _client_lock:
+        previous, _client = _client, client
+        return previous
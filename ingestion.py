@@ -0,0 +1,306 @@
+"""
+📥 Incremental block-range ingestion
+Pulls only new blocks from AMP and keeps the rows the strategies read
+
+Each (dataset, table) feed has a block watermark: the highest block number
+already ingested. A sync asks AMP for `block_num > watermark` only, so its
+cost follows the number of new blocks rather than the size of a wall-clock
+window. The very first sync of a feed bootstraps from a short time window
+instead. Watermarks are persisted to disk, and rows are appended to a bounded
+in-memory RowStore that outlives individual hunters.
+
+Rows and subscriber state do not survive a restart, so a feed's first sync
+in a process bootstraps again unless the RowStore already holds its rows.
+Otherwise a restarted process would resume past the window its consumers
+need and price from nothing until new blocks arrived.
+
+A sync commits rows batch by batch as the stream arrives, advancing the
+watermark with each batch, so memory stays at one batch however many blocks
+are behind. Batches are cut on block boundaries: an interrupted query keeps
+every whole block already committed, and the next sync resumes after them.
+Subscribers see each committed batch exactly once, which lets streaming
+consumers (like the whale tracker) follow high-volume tables without the
+RowStore keeping them. Each feed syncs under its own lock, so different
+feeds sync in parallel.
+
+A feed may carry a SQL filter (the whale watchlist for transactions), so
+AMP drops rows no consumer wants before they are sent.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from amp_client import DEFAULT_BATCH_SIZE, AmpClient
+from dataset_catalog import CACHE_DIR
+
+BLOCK_COLUMN = 'block_num'
+BOOTSTRAP_WINDOW = "INTERVAL '1 hour'"  # First sync of a feed only
+MAX_ROWS_PER_FEED = 50000  # Oldest rows are dropped beyond this
+RETRY_BACKOFF = 60  # Seconds to skip a feed after a failed sync
+
+SWAP_COLUMNS = (
+    'pool_address', 'token0', 'token1', 'amount0', 'amount1',
+    'sqrt_price_x96', 'block_num', 'block_timestamp', 'transaction_hash'
+)
+
+ADDRESS_RE = re.compile(r'0x[0-9a-fA-F]{40}')
+
+TRANSACTION_COLUMNS = (
+    'from_address', 'to_address', 'value', 'block_num', 'block_timestamp', 'transaction_hash'
+)
+
+
+@dataclass(frozen=True)
+class Feed:
+    """One AMP table ingested incrementally"""
+    dataset: str  # 'namespace/name'
+    table: str
+    columns: Tuple[str, ...] = ()  # Empty selects every column
+    retain: bool = True  # Keep rows in the RowStore (False: subscribers only)
+    where: str = ''  # Extra SQL condition on the table's rows
+
+    @property
+    def key(self):
+        return f"{self.dataset}.{self.table}"
+
+
+def block_range_query(feed, after_block=None, bootstrap_window=BOOTSTRAP_WINDOW):
+    """SQL for the rows of `feed` past `after_block`, oldest block first
+
+    Without a watermark the query falls back to the last `bootstrap_window`
+    of blocks.
+    """
+    columns = ', '.join(feed.columns) if feed.columns else '*'
+    if after_block is None:
+        condition = f"block_timestamp > NOW() - {bootstrap_window}"
+    else:
+        condition = f"{BLOCK_COLUMN} > {int(after_block)}"
+    if feed.where:
+        condition += f" AND ({feed.where})"
+    return (f'SELECT {columns} FROM "{feed.dataset}@latest".{feed.table} '
+            f'WHERE {condition} ORDER BY {BLOCK_COLUMN}')
+
+
+class BlockWatermarks:
+    """Last ingested block per feed, persisted as JSON"""
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(CACHE_DIR, 'watermarks.json')
+        self._blocks = None
+        self._lock = threading.Lock()
+
+    def get(self, feed) -> Optional[int]:
+        with self._lock:
+            return self._load().get(feed.key)
+
+    def advance(self, feed, block):
+        """Move a feed's watermark forward (never backwards) and persist it"""
+        with self._lock:
+            blocks = self._load()
+            if blocks.get(feed.key) is not None and blocks[feed.key] >= block:
+                return
+            blocks[feed.key] = int(block)
+            snapshot = dict(blocks)
+        self._save(snapshot)
+
+    def reset(self, feed=None):
+        """Forget one feed's watermark (or all of them) so it bootstraps again"""
+        with self._lock:
+            blocks = self._load()
+            if feed is None:
+                blocks.clear()
+            else:
+                blocks.pop(feed.key, None)
+            snapshot = dict(blocks)
+        self._save(snapshot)
+
+    def _load(self):
+        # Caller holds self._lock
+        if self._blocks is None:
+            try:
+                with open(self.path) as f:
+                    self._blocks = json.load(f)
+            except (OSError, ValueError):
+                self._blocks = {}
+        return self._blocks
+
+    def _save(self, blocks):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(blocks, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"⚠️ Could not write block watermarks: {e}")
+
+
+class RowStore:
+    """Bounded, append-only rows per feed, shared by every hunter"""
+
+    def __init__(self, max_rows=MAX_ROWS_PER_FEED):
+        self.max_rows = max_rows
+        self._rows = {}
+        self._lock = threading.Lock()
+
+    def append(self, feed, rows):
+        with self._lock:
+            if feed.key not in self._rows:
+                self._rows[feed.key] = deque(maxlen=self.max_rows)
+            self._rows[feed.key].extend(rows)
+
+    def rows(self, feed):
+        """Copy of a feed's rows, oldest first"""
+        with self._lock:
+            return list(self._rows.get(feed.key, ()))
+
+    def has_rows(self, feed):
+        with self._lock:
+            return bool(self._rows.get(feed.key))
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(rows) for rows in self._rows.values())
+
+
+class Ingestor:
+    """Syncs feeds from AMP into a RowStore, one new block range at a time"""
+
+    def __init__(self, client=None, watermarks=None, store=None):
+        self.client = client if client is not None else AmpClient()
+        self.watermarks = watermarks if watermarks is not None else BlockWatermarks()
+        self.store = store if store is not None else RowStore()
+        self._failed_at = {}
+        self._subscribers = {}
+        self._synced = set()  # Feeds synced by this process
+        self._feed_locks = {}
+        self._lock = threading.Lock()
+
+    def _feed_lock(self, feed):
+        with self._lock:
+            if feed.key not in self._feed_locks:
+                self._feed_locks[feed.key] = threading.Lock()
+            return self._feed_locks[feed.key]
+
+    def subscribe(self, feed, callback):
+        """Call callback(rows) with every batch of new rows committed for feed
+
+        A new subscriber of a retained feed first gets the rows already held.
+        """
+        with self._feed_lock(feed):
+            with self._lock:
+                callbacks = self._subscribers.setdefault(feed.key, [])
+                if callback in callbacks:
+                    return
+                callbacks.append(callback)
+            held = self.store.rows(feed) if feed.retain else []
+            if held:
+                callback(held)
+
+    def sync(self, feed, batch_size=DEFAULT_BATCH_SIZE):
+        """Ingest the blocks of `feed` past its watermark; returns rows added
+
+        Rows are committed batch by batch. Failures are logged, keep what was
+        already committed and skip the feed for RETRY_BACKOFF seconds.
+        """
+        if time.time() - self._failed_at.get(feed.key, 0) < RETRY_BACKOFF:
+            return 0
+
+        # One sync per feed at a time, so two hunts never fetch the same range
+        with self._feed_lock(feed):
+            after_block = self.watermarks.get(feed)
+            if after_block is not None and feed.key not in self._synced and not self.store.has_rows(feed):
+                # Nothing in memory from before a restart: bootstrap instead of resuming
+                self.watermarks.reset(feed)
+                after_block = None
+
+            added = 0
+            held = []  # Rows of the newest block so far, which may continue in the next batch
+            try:
+                for batch in self.client.batches(block_range_query(feed, after_block), batch_size):
+                    rows = held + batch
+                    last_block = rows[-1].get(BLOCK_COLUMN)
+                    split = len(rows)
+                    while split and rows[split - 1].get(BLOCK_COLUMN) == last_block:
+                        split -= 1
+                    held = rows[split:]
+                    if split:
+                        added += self._commit(feed, rows[:split])
+                if held:
+                    added += self._commit(feed, held)
+            except Exception as e:
+                print(f"⚠️ Ingestion of {feed.key} failed after {added} rows: {e}")
+                self._failed_at[feed.key] = time.time()
+            return added
+
+    def _commit(self, feed, rows):
+        # Caller holds the feed's lock; rows end on a block boundary
+        self._synced.add(feed.key)
+        if feed.retain:
+            self.store.append(feed, rows)
+        blocks = [row[BLOCK_COLUMN] for row in rows if row.get(BLOCK_COLUMN) is not None]
+        if blocks:
+            self.watermarks.advance(feed, max(blocks))
+        with self._lock:
+            callbacks = list(self._subscribers.get(feed.key, ()))
+        for callback in callbacks:
+            try:
+                callback(rows)
+            except Exception as e:
+                print(f"⚠️ Subscriber of {feed.key} failed: {e}")
+        return len(rows)
+
+    def sync_all(self, feeds):
+        """Sync several feeds; returns {feed key: rows added}"""
+        return {feed.key: self.sync(feed) for feed in feeds}
+
+    def rows(self, feed):
+        return self.store.rows(feed)
+
+
+_ingestor = None
+_ingestor_lock = threading.Lock()
+
+
+def get_ingestor():
+    """Process-wide Ingestor"""
+    global _ingestor
+    with _ingestor_lock:
+        if _ingestor is None:
+            _ingestor = Ingestor()
+        return _ingestor
+
+
+def dataset_id(dataset):
+    """'namespace/name' of a raw dataset dict or RealDatasetInfo"""
+    if isinstance(dataset, dict):
+        return f"{dataset.get('namespace')}/{dataset.get('name')}"
+    return f"{dataset.namespace}/{dataset.name}"
+
+
+def swap_feed(dataset):
+    """event__swap feed for a Uniswap dataset"""
+    return Feed(dataset_id(dataset), 'event__swap', SWAP_COLUMNS)
+
+
+def address_filter(addresses):
+    """SQL condition matching transactions from or to any of `addresses`"""
+    values = ', '.join(f"'{address.lower()}'" for address in addresses if ADDRESS_RE.fullmatch(address))
+    if not values:
+        return 'FALSE'
+    return f"lower(from_address) IN ({values}) OR lower(to_address) IN ({values})"
+
+
+def transactions_feed(dataset, addresses=()):
+    """transactions feed for a raw chain dataset, streamed to subscribers only
+
+    With `addresses`, only transactions touching them are fetched.
+    """
+    where = address_filter(addresses) if addresses else ''
+    return Feed(dataset_id(dataset), 'transactions', TRANSACTION_COLUMNS, retain=False, where=where)
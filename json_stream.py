@@ -0,0 +1,109 @@
+"""
+🌊 Streaming JSON helpers
+Read large JSON arrays one element at a time as the bytes arrive
+
+DeFiLlama's /protocols endpoint returns thousands of protocols, but we only
+ever look at the first few. Parsing incrementally lets us stop reading (and
+close the connection) as soon as we have the prefix we need.
+"""
+
+import codecs
+import json
+
+from http_client import get_client
+
+CHUNK_SIZE = 16384  # Bytes read from the socket per step
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+_DELIMITERS = _WHITESPACE + ',]'
+
+
+def iter_json_array(chunks):
+    """Yield the elements of a top-level JSON array from an iterable of byte chunks
+
+    Only the element currently being decoded is buffered, so memory stays at
+    one element plus one chunk however long the array is. Raises ValueError if
+    the stream is not an array or ends before the array is closed.
+    """
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    started = False
+
+    def drain(final):
+        # Yield every complete element in buffer; returns True once ']' is seen
+        nonlocal buffer, started
+        pos = 0
+        size = len(buffer)
+
+        while True:
+            while pos < size and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos >= size:
+                break
+
+            char = buffer[pos]
+            if not started:
+                if char != '[':
+                    raise ValueError('Expected a JSON array')
+                started = True
+                pos += 1
+                continue
+            if char == ',':
+                pos += 1
+                continue
+            if char == ']':
+                return True
+
+            try:
+                element, end = _decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if final:
+                    raise ValueError('Truncated or malformed JSON array')
+                break
+
+            # A bare number or literal is only complete once a delimiter follows it
+            if not final and not isinstance(element, (dict, list, str)):
+                if end == size or buffer[end] not in _DELIMITERS:
+                    break
+
+            pos = end
+            yield element
+
+        buffer = buffer[pos:]
+        return False
+
+    for chunk in chunks:
+        buffer += utf8.decode(chunk)
+        if (yield from drain(final=False)):
+            return
+
+    buffer += utf8.decode(b'', final=True)
+    if not (yield from drain(final=True)):
+        raise ValueError('Truncated JSON array')
+
+
+def project(item, fields):
+    """Keep only the given keys of a dict element"""
+    if fields and isinstance(item, dict):
+        return {key: item[key] for key in fields if key in item}
+    return item
+
+
+def fetch_json_array_prefix(url, limit, fields=None, timeout=6):
+    """Fetch the first `limit` elements of a remote JSON array
+
+    The connection is closed as soon as the prefix has been read, so the rest
+    of the payload is never downloaded or parsed. Returns None on a non-200.
+    """
+    items = []
+    with get_client().stream('GET', url, timeout=timeout) as response:
+        if response.status_code != 200:
+            return None
+
+        for item in iter_json_array(response.iter_content(CHUNK_SIZE)):
+            items.append(project(item, fields))
+            if len(items) >= limit:
+                break
+
+    return items
@@ -0,0 +1,500 @@
+"""
+⚡ Liquidation cascade simulator
+Health factors for every lending position across a grid of ETH prices
+
+Positions are held column-wise in NumPy arrays: ETH-priced and USD-priced
+collateral, ETH- and USD-denominated debt, liquidation threshold, bonus and
+close factor. A health factor is linear in the ETH price on both sides, so
+simulate() solves every position's thresholds in one vectorized pass and
+places them on the price grid with searchsorted. No price x position matrix
+is ever built, and a few hundred thousand positions evaluate in
+milliseconds. The result is a LiquidationCurve: debt at risk, USD
+liquidatable and bonus capturable per protocol, as a function of the ETH
+price.
+
+LiquidationIndex answers the point query "what is at risk if ETH hits X?"
+without a grid. Positions are sorted by their own liquidation price with
+prefix sums alongside, so a query is a bisect plus a lookup. Updates land in
+a small delta buffer that is merged in later; a batch of positions (an
+initial load) is classified and merged in one vectorized pass instead.
+"""
+
+import itertools
+import threading
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+
+DEFAULT_CLOSE_FACTOR = 0.5  # Share of debt one liquidation may repay (Aave V2 / Compound V2)
+
+
+@dataclass
+class LiquidationCurve:
+    """Liquidation totals per grid price (rows) and protocol (columns)"""
+    prices: np.ndarray  # (G,) ascending ETH prices
+    protocols: List[str]
+    debt_at_risk: np.ndarray  # (G, P) full debt of positions with health factor < 1
+    liquidatable_usd: np.ndarray  # (G, P) debt repayable at the close factor
+    bonus_usd: np.ndarray  # (G, P) bonus capturable, capped by the collateral left
+    positions: np.ndarray  # (G, P) positions with health factor < 1
+
+    def column(self, protocol):
+        return self.protocols.index(protocol)
+
+    def at(self, price, protocol=None):
+        """Totals at the highest grid price <= price (dict of floats)"""
+        row = max(0, int(np.searchsorted(self.prices, price, side='right')) - 1)
+        columns = slice(None) if protocol is None else self.column(protocol)
+        return {
+            'price': float(self.prices[row]),
+            'debt_at_risk': float(np.sum(self.debt_at_risk[row, columns])),
+            'liquidatable_usd': float(np.sum(self.liquidatable_usd[row, columns])),
+            'bonus_usd': float(np.sum(self.bonus_usd[row, columns])),
+            'positions': int(np.sum(self.positions[row, columns]))
+        }
+
+    def trigger_price(self, min_debt, protocol=None):
+        """Highest grid price with at least min_debt at risk, or None"""
+        at_risk = self.debt_at_risk if protocol is None else self.debt_at_risk[:, [self.column(protocol)]]
+        hits = np.flatnonzero(at_risk.sum(axis=1) >= min_debt)
+        return float(self.prices[hits[-1]]) if len(hits) else None
+
+
+def liquidation_condition(collateral_eth, collateral_usd, debt_eth, debt_usd, liquidation_threshold):
+    """health factor < 1  <=>  (ce*p + cu) * threshold < de*p + du  <=>  slope * p < intercept"""
+    slope = collateral_eth * liquidation_threshold - debt_eth
+    intercept = debt_usd - collateral_usd * liquidation_threshold
+    return slope, intercept
+
+
+class PositionBook:
+    """Lending positions as parallel NumPy columns"""
+
+    COLUMNS = ('collateral_eth', 'collateral_usd', 'debt_eth', 'debt_usd',
+               'liquidation_threshold', 'liquidation_bonus', 'close_factor')
+
+    def __init__(self, protocols, protocol, collateral_eth, collateral_usd, debt_eth, debt_usd,
+                 liquidation_threshold, liquidation_bonus, close_factor=None):
+        self.protocols = list(protocols)
+        self.protocol = np.asarray(protocol, dtype=np.int32)
+        count = len(self.protocol)
+        self.collateral_eth = np.asarray(collateral_eth, dtype=np.float64)
+        self.collateral_usd = np.asarray(collateral_usd, dtype=np.float64)
+        self.debt_eth = np.asarray(debt_eth, dtype=np.float64)
+        self.debt_usd = np.asarray(debt_usd, dtype=np.float64)
+        self.liquidation_threshold = np.asarray(liquidation_threshold, dtype=np.float64)
+        self.liquidation_bonus = np.asarray(liquidation_bonus, dtype=np.float64)
+        self.close_factor = np.broadcast_to(
+            np.asarray(DEFAULT_CLOSE_FACTOR if close_factor is None else close_factor, dtype=np.float64),
+            (count,)
+        )
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build from position dicts with a 'protocol' name and the COLUMNS fields
+
+        Missing amounts default to 0 and a missing close_factor to
+        DEFAULT_CLOSE_FACTOR.
+        """
+        protocols = {}
+        codes = []
+        columns = {name: [] for name in cls.COLUMNS}
+        for row in rows:
+            codes.append(protocols.setdefault(row['protocol'], len(protocols)))
+            for name in cls.COLUMNS:
+                value = row.get(name)
+                columns[name].append(DEFAULT_CLOSE_FACTOR if value is None and name == 'close_factor'
+                                     else float(value or 0))
+        return cls(protocols, codes, **columns)
+
+    def __len__(self):
+        return len(self.protocol)
+
+    def health_factors(self, eth_price):
+        """Health factor of every position at one ETH price (inf without debt)"""
+        collateral = (self.collateral_eth * eth_price + self.collateral_usd) * self.liquidation_threshold
+        debt = self.debt_eth * eth_price + self.debt_usd
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(debt > 0, collateral / debt, np.inf)
+
+    def liquidation_condition(self):
+        """(slope, intercept): a position is liquidatable at price p iff slope * p < intercept"""
+        return liquidation_condition(self.collateral_eth, self.collateral_usd, self.debt_eth,
+                                     self.debt_usd, self.liquidation_threshold)
+
+    def simulate(self, prices) -> LiquidationCurve:
+        """Liquidation curve over a grid of ETH prices"""
+        prices = np.sort(np.asarray(prices, dtype=np.float64))
+        count, protocol = len(prices), self.protocol
+        ce, cu, de, du = self.collateral_eth, self.collateral_usd, self.debt_eth, self.debt_usd
+        cf, bonus = self.close_factor, self.liquidation_bonus
+
+        underwater = _below(prices, *self.liquidation_condition())
+        # The bonus is capped by the collateral left after seizing the repaid debt...
+        capped = _below(prices, ce - cf * de * (1 + bonus), cf * du * (1 + bonus) - cu)
+        # ...and is nothing once that collateral is gone
+        wiped = _below(prices, ce - cf * de, cf * du - cu)
+
+        full_bonus = _intersect(underwater, _complement(capped, count))
+        partial_bonus = _intersect(_intersect(underwater, capped), _complement(wiped, count))
+
+        protocols = len(self.protocols)
+        debt_at_risk, liquidatable, positions = _interval_sums(
+            prices, underwater, protocol, protocols,
+            (de, du), (cf * de, cf * du), (None, np.ones(len(self)))
+        )
+        (full,) = _interval_sums(prices, full_bonus, protocol, protocols, (cf * bonus * de, cf * bonus * du))
+        (partial,) = _interval_sums(prices, partial_bonus, protocol, protocols, (ce - cf * de, cu - cf * du))
+
+        return LiquidationCurve(
+            prices=prices,
+            protocols=self.protocols,
+            debt_at_risk=debt_at_risk,
+            liquidatable_usd=liquidatable,
+            bonus_usd=np.clip(full + partial, 0.0, None),
+            positions=np.rint(positions).astype(np.int64)
+        )
+
+
+# Every condition here has the form slope * p < intercept, which on an ascending
+# grid holds on a prefix (slope > 0) or suffix (slope < 0) of it. Positions are
+# therefore reduced to [lo, hi) row intervals, and per-price totals come from
+# difference arrays: O(n + G) instead of materialising a G x n matrix.
+
+def _grid_index(prices, values):
+    """Insertion points of values in the ascending grid (searchsorted 'left')
+
+    Evenly spaced grids are indexed arithmetically and nudged by one where
+    rounding lands on the wrong side; searchsorted on unsorted values is
+    several times slower.
+    """
+    count = len(prices)
+    step = (prices[-1] - prices[0]) / (count - 1) if count > 1 else 0.0
+    if step <= 0 or not np.allclose(np.diff(prices), step, rtol=1e-9, atol=0):
+        return np.searchsorted(prices, values, 'left')
+
+    with np.errstate(invalid='ignore'):
+        # NaN (0/0 from flat conditions) casts to garbage; callers overwrite those rows
+        index = np.ceil(np.clip((values - prices[0]) / step, -1, count)).astype(np.int64)
+    np.clip(index, 0, count, out=index)
+    index += (index < count) & (prices[np.minimum(index, count - 1)] < values)
+    index -= (index > 0) & (prices[np.maximum(index - 1, 0)] >= values)
+    return index
+
+
+def _below(prices, slope, intercept):
+    """[lo, hi) grid rows where slope * price < intercept, per position"""
+    count = len(prices)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        critical = intercept / slope
+    left = _grid_index(prices, critical)
+    right = left + ((left < count) & (prices[np.minimum(left, count - 1)] == critical))
+
+    lo = np.where(slope < 0, right, 0)
+    hi = np.where(slope > 0, left, count)
+    flat = slope == 0
+    if flat.any():
+        # Constant condition: the whole grid when 0 < intercept, otherwise none of it
+        never = flat & (intercept <= 0)
+        lo[flat] = 0
+        hi[never] = 0
+    return lo, hi
+
+
+def _complement(interval, count):
+    # Prefix <-> suffix; empty intervals become the whole grid
+    lo, hi = interval
+    prefix = (lo == 0) & (hi > lo)
+    return np.where(prefix, hi, 0), np.where(prefix, count, np.where(hi > lo, lo, count))
+
+
+def _intersect(first, second):
+    return np.maximum(first[0], second[0]), np.minimum(first[1], second[1])
+
+
+def _interval_sums(prices, interval, protocol, protocols, *terms):
+    """(G, P) sums of slope * price + intercept over the positions covering each row
+
+    Each term is a (slope, intercept) pair of per-position columns; a None
+    slope means a constant term.
+    """
+    count = len(prices)
+    lo, hi = interval
+    hi = np.maximum(lo, hi)  # Empty intervals add and remove at the same row
+    start = lo * protocols + protocol
+    end = hi * protocols + protocol
+    size = (count + 1) * protocols
+
+    def rows(weights):
+        diff = np.bincount(start, weights, minlength=size) - np.bincount(end, weights, minlength=size)
+        return np.cumsum(diff.reshape(count + 1, protocols), axis=0)[:count]
+
+    return [(rows(intercept) if slope is None else prices[:, None] * rows(slope) + rows(intercept))
+            for slope, intercept in terms]
+
+
+# Side of the liquidation price on which a position is liquidatable
+FALLING = 0  # price < liquidation price (ETH collateral against USD debt)
+RISING = 1  # price > liquidation price (ETH debt against USD collateral)
+NEVER = -1  # Not liquidatable at any price
+
+# Per-position weights summed by the index, as (slope, intercept) pairs in price:
+# debt, collateral, liquidatable debt, position count
+_WEIGHTS = 8
+
+DELTA_LIMIT = 4096  # Pending updates before they are merged into the sorted arrays
+
+
+def _position_weights(collateral_eth, collateral_usd, debt_eth, debt_usd, close_factor):
+    zero = np.zeros_like(np.asarray(debt_usd, dtype=np.float64))
+    return np.stack(np.broadcast_arrays(
+        debt_eth, debt_usd, collateral_eth, collateral_usd,
+        close_factor * debt_eth, close_factor * debt_usd, zero, zero + 1.0
+    ), axis=-1).astype(np.float64)
+
+
+def _totals(price, sums):
+    return {
+        'price': float(price),
+        'debt_at_risk': float(price * sums[0] + sums[1]),
+        'collateral_at_risk': float(price * sums[2] + sums[3]),
+        'liquidatable_usd': float(price * sums[4] + sums[5]),
+        'positions': int(round(sums[7]))
+    }
+
+
+class _SortedSide:
+    """Liquidation prices of one protocol/side in ascending order, with prefix sums"""
+
+    def __init__(self, prices=None, serials=None, weights=None):
+        self.prices = np.empty(0) if prices is None else prices
+        self.serials = np.empty(0, dtype=np.int64) if serials is None else serials
+        weights = np.empty((0, _WEIGHTS)) if weights is None else weights
+        self.weights = weights
+        self.prefix = np.vstack([np.zeros((1, _WEIGHTS)), np.cumsum(weights, axis=0)])
+
+    def __len__(self):
+        return len(self.prices)
+
+    def sums(self, price, side):
+        """Summed weights of entries liquidatable at price: one bisect, two lookups"""
+        if side == FALLING:
+            return self.prefix[-1] - self.prefix[np.searchsorted(self.prices, price, 'right')]
+        return self.prefix[np.searchsorted(self.prices, price, 'left')]
+
+    def merged(self, prices, serials, weights, removed):
+        """New side with `removed` serials dropped and the given entries merged in
+
+        Existing entries are already sorted, so only the (small) new batch is
+        sorted; it is spliced in with searchsorted + insert in O(n + k log k).
+        """
+        keep = ~np.isin(self.serials, removed) if len(removed) else slice(None)
+        base_prices, base_serials, base_weights = self.prices[keep], self.serials[keep], self.weights[keep]
+
+        order = np.argsort(prices, kind='stable')
+        prices, serials, weights = prices[order], serials[order], weights[order]
+        at = np.searchsorted(base_prices, prices, 'right')
+        return _SortedSide(
+            np.insert(base_prices, at, prices),
+            np.insert(base_serials, at, serials),
+            np.insert(base_weights, at, weights, axis=0)
+        )
+
+
+class LiquidationIndex:
+    """Positions sorted by individual liquidation price, for O(log n) at-risk queries
+
+    "How much is liquidatable if ETH hits X?" is one bisect into each
+    protocol's sorted liquidation prices plus a prefix-sum lookup. Updates go
+    to a small delta buffer that queries scan alongside the sorted arrays.
+    Once the buffer reaches delta_limit entries it is merged in without
+    re-sorting what is already sorted.
+    """
+
+    def __init__(self, delta_limit=DELTA_LIMIT):
+        self.delta_limit = delta_limit
+        self._sides = {}  # (protocol, side) -> _SortedSide
+        self._entries = {}  # position id -> (serial, protocol, side, price, weights)
+        self._added = {}  # serial -> entry, not yet merged
+        self._removed = {}  # serial -> entry, merged but since removed
+        self._delta = None  # Cached arrays of the delta buffer
+        self._serial = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_book(cls, book, ids=None, delta_limit=DELTA_LIMIT):
+        """Index every position of a PositionBook (ids default to row numbers)"""
+        index = cls(delta_limit)
+        index.update_book(book, range(len(book)) if ids is None else ids)
+        return index
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def protocols(self):
+        return sorted({entry[1] for entry in self._entries.values()})
+
+    def update(self, position_id, row):
+        """Insert or replace a position (row fields as in PositionBook.from_rows)"""
+        value = lambda name: float(row.get(name) or 0)
+        close_factor = row.get('close_factor')
+        close_factor = DEFAULT_CLOSE_FACTOR if close_factor is None else float(close_factor)
+        slope, intercept = liquidation_condition(
+            value('collateral_eth'), value('collateral_usd'), value('debt_eth'),
+            value('debt_usd'), value('liquidation_threshold')
+        )
+        sides, prices = _classify(np.array([slope]), np.array([intercept]))
+        weights = _position_weights(value('collateral_eth'), value('collateral_usd'),
+                                    value('debt_eth'), value('debt_usd'), close_factor)
+
+        with self._lock:
+            self._remove(position_id)
+            self._serial += 1
+            entry = (self._serial, row['protocol'], int(sides[0]), prices[0], weights)
+            self._entries[position_id] = entry
+            if entry[2] != NEVER:
+                self._added[entry[0]] = entry
+            self._changed()
+
+    def update_book(self, book, ids, removed=()):
+        """Insert or replace every position of a PositionBook, and drop `removed` ids
+
+        ids (unique, one per book row) name the positions. The whole batch is
+        classified in one vectorized pass and merged into the sorted arrays
+        once, so loading many positions costs no more per row than from_book.
+        """
+        ids = list(ids)
+        slope, intercept = book.liquidation_condition()
+        sides, prices = _classify(slope, intercept)
+        weights = _position_weights(book.collateral_eth, book.collateral_usd, book.debt_eth,
+                                    book.debt_usd, book.close_factor)
+
+        with self._lock:
+            for position_id in itertools.chain(removed, ids):
+                self._remove(position_id)
+            self._merge()
+
+            serials = np.arange(self._serial + 1, self._serial + 1 + len(book), dtype=np.int64)
+            self._serial += len(book)
+            for serial, position_id, code, side, price, row_weights in zip(
+                    serials.tolist(), ids, book.protocol.tolist(), sides.tolist(), prices.tolist(), weights):
+                self._entries[position_id] = (serial, book.protocols[code], side, price, row_weights)
+
+            for code, protocol in enumerate(book.protocols):
+                for side in (FALLING, RISING):
+                    rows = np.flatnonzero((book.protocol == code) & (sides == side))
+                    if len(rows):
+                        self._sides[protocol, side] = self._sides.get((protocol, side), _SortedSide()).merged(
+                            prices[rows], serials[rows], weights[rows], ())
+
+    def remove(self, position_id):
+        """Drop a position (no-op if unknown)"""
+        with self._lock:
+            self._remove(position_id)
+            self._changed()
+
+    def _remove(self, position_id):
+        # Caller holds self._lock and calls _changed() (or _merge()) afterwards
+        entry = self._entries.pop(position_id, None)
+        if entry is None or entry[2] == NEVER:
+            return
+        if self._added.pop(entry[0], None) is None:
+            self._removed[entry[0]] = entry
+
+    def _changed(self):
+        self._delta = None
+        if len(self._added) + len(self._removed) >= self.delta_limit:
+            self._merge()
+
+    def merge(self):
+        """Fold pending updates into the sorted arrays now"""
+        with self._lock:
+            self._merge()
+
+    def _merge(self):
+        if not self._added and not self._removed:
+            return
+        removed = np.fromiter(self._removed, dtype=np.int64, count=len(self._removed))
+        groups = {}
+        for serial, (_, protocol, side, price, weights) in self._added.items():
+            groups.setdefault((protocol, side), []).append((price, serial, weights))
+        for key in set(groups) | set(self._sides):
+            entries = groups.get(key, [])
+            self._sides[key] = self._sides.get(key, _SortedSide()).merged(
+                np.array([e[0] for e in entries], dtype=np.float64),
+                np.array([e[1] for e in entries], dtype=np.int64),
+                np.array([e[2] for e in entries], dtype=np.float64).reshape(-1, _WEIGHTS),
+                removed
+            )
+        self._added.clear()
+        self._removed.clear()
+        self._delta = None
+
+    def _delta_arrays(self):
+        # (protocols, sides, prices, weights with removals negated) of the delta buffer
+        if self._delta is None:
+            entries = [(e, 1.0) for e in self._added.values()] + [(e, -1.0) for e in self._removed.values()]
+            self._delta = (
+                np.array([e[1] for e, _ in entries], dtype=object),
+                np.array([e[2] for e, _ in entries], dtype=np.int64),
+                np.array([e[3] for e, _ in entries], dtype=np.float64),
+                np.array([e[4] * sign for e, sign in entries], dtype=np.float64).reshape(-1, _WEIGHTS)
+            )
+        return self._delta
+
+    def at_risk(self, price, protocol=None):
+        """Debt, collateral and liquidatable USD of positions underwater at `price`"""
+        with self._lock:
+            sums = np.zeros(_WEIGHTS)
+            for (side_protocol, side), sorted_side in self._sides.items():
+                if protocol is None or side_protocol == protocol:
+                    sums += sorted_side.sums(price, side)
+
+            protocols, sides, prices, weights = self._delta_arrays()
+            if len(prices):
+                hit = np.where(sides == FALLING, price < prices, price > prices)
+                if protocol is not None:
+                    hit &= protocols == protocol
+                sums += weights[hit].sum(axis=0)
+
+        return _totals(price, sums)
+
+
+def _classify(slope, intercept):
+    """(sides, liquidation prices) for slope * p < intercept conditions
+
+    Flat conditions that always hold become FALLING at +inf; those that
+    never hold get side NEVER and are not indexed.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        prices = np.where(slope != 0, intercept / slope, np.inf)
+    sides = np.where(slope > 0, FALLING, np.where(slope < 0, RISING, np.where(intercept > 0, FALLING, NEVER)))
+    return sides, prices
+
+
+def price_grid(current_price, max_drop=0.3, max_rise=0.0, steps=301):
+    """Evenly spaced ETH prices from a max_drop crash to a max_rise rally"""
+    return np.linspace(current_price * (1 - max_drop), current_price * (1 + max_rise), steps)
+
+
+def reference_positions(risks, liquidation_threshold=0.825):
+    """Position rows reproducing aggregate risk figures
+
+    Each aggregate (protocol, total_at_risk, trigger_price, positions_count,
+    avg_liquidation_bonus) becomes positions_count equal ETH-collateral,
+    USD-debt positions that all cross a health factor of 1 at trigger_price.
+    """
+    rows = []
+    for risk in risks:
+        debt = risk['total_at_risk'] / risk['positions_count']
+        collateral = debt / (liquidation_threshold * risk['trigger_price'])
+        rows.extend({
+            'protocol': risk['protocol'],
+            'collateral_eth': collateral,
+            'debt_usd': debt,
+            'liquidation_threshold': liquidation_threshold,
+            'liquidation_bonus': risk['avg_liquidation_bonus']
+        } for _ in range(risk['positions_count']))
+    return rows
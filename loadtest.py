@@ -0,0 +1,546 @@
+#!/usr/bin/env python3
+"""
+🚦 Dashboard load test
+How many concurrent viewers one dashboard (or Vercel API) process sustains
+
+The server runs in its own process, run_dashboard() via dashboard.py or the
+api/ handlers behind a small router that mimics vercel.json. Its upstreams
+are an in-process upstream_sim, so results do not depend on the internet.
+Each simulated viewer is a thread doing what the served page does:
+
+    page   GET /, then /api/stream (SSE). If the stream is refused or missing
+           (Vercel), GET /api/snapshot every poll interval with If-None-Match.
+    split  GET /, /api/opportunities and /api/stats, then both again every
+           poll interval (the page before /api/snapshot existed).
+
+Viewers are added in stages (--clients 10,50,100). While a stage runs, a
+line every few seconds shows throughput, p50/p95/p99 latency, error rate,
+open streams and the server's RSS and CPU. At the end, each stage is
+checked against the latency and error SLOs, and the largest stage that met
+both is reported as the sustainable number of viewers.
+
+    python loadtest.py                                 # dashboard, 10 -> 200 viewers
+    python loadtest.py --target vercel --pattern split
+    python loadtest.py --clients 100,400 --poll-interval 5 --upstream-latency lognormal:80:600
+
+Server RSS and CPU are read from /proc, so they are Linux-only.
+"""
+
+import argparse
+import http.client
+import importlib.util
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import NamedTuple
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_CLIENTS = '10,50,100,200'
+STAGE_DURATION = 60  # Seconds each stage runs once its viewers are connected
+RAMP = 10  # Seconds over which a stage's new viewers arrive
+POLL_INTERVAL = 30  # Seconds between polls, as in the page
+REPORT_INTERVAL = 5  # Seconds between progress lines
+SAMPLE_INTERVAL = 1  # Seconds between server RSS / CPU samples
+REQUEST_TIMEOUT = 10
+STREAM_RETRY = 5  # Seconds before a dropped stream reconnects (the server's retry:)
+STARTUP_TIMEOUT = 120  # The dashboard hunts once before it serves a snapshot
+SLO_P99_MS = 1000
+MAX_ERROR_RATE = 0.01
+
+ACCEPT_ENCODING = 'gzip, deflate, br'
+
+
+class Sample(NamedTuple):
+    at: float  # perf_counter when the request finished
+    endpoint: str
+    seconds: float
+    status: int  # 0 when no response arrived
+    error: str = None
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, math.ceil(pct / 100 * len(values)) - 1))]
+
+
+def summarize(samples, seconds):
+    """Throughput, latency percentiles and error rate of a list of samples"""
+    latencies = sorted(s.seconds * 1000 for s in samples)
+    errors = sum(1 for s in samples if s.error)
+    return {
+        'requests': len(samples),
+        'rps': round(len(samples) / seconds, 2) if seconds > 0 else 0.0,
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'errors': errors,
+        'error_rate': round(errors / len(samples), 4) if samples else 0.0,
+    }
+
+
+class Recorder:
+    """Samples from every viewer, plus stream bookkeeping"""
+
+    def __init__(self):
+        self.samples = []
+        self.events = 0  # SSE snapshot / delta events received
+        self.fallbacks = 0  # Viewers that fell back to polling
+        self.streams = 0  # Streams open right now
+        self._lock = threading.Lock()
+
+    def add(self, sample):
+        with self._lock:
+            self.samples.append(sample)
+
+    def count(self, name, delta=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + delta)
+
+    def between(self, start, end=None):
+        with self._lock:
+            samples = list(self.samples)
+        return [s for s in samples if s.at >= start and (end is None or s.at < end)]
+
+
+class ServerProcess:
+    """The server under test, with RSS and CPU read from /proc"""
+
+    def __init__(self, command, env, log_path):
+        self.log_path = log_path
+        self._log = open(log_path, 'w')
+        self.process = subprocess.Popen(command, env=env, cwd=ROOT, stdout=self._log, stderr=subprocess.STDOUT)
+        self.pid = self.process.pid
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self._log.close()
+
+
+def rss_mib(pid):
+    """Resident set size of `pid` in MiB, or None where /proc is unavailable"""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def cpu_seconds(pid):
+    """User + system CPU time of `pid`, or None where /proc is unavailable"""
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            # The command name may contain spaces; fields resume after its ')'
+            fields = f.read().rsplit(')', 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class ResourceSampler(threading.Thread):
+    """Samples the server's RSS and CPU share every `interval` seconds"""
+
+    def __init__(self, pid, stop, interval=SAMPLE_INTERVAL):
+        super().__init__(name='loadtest-sampler', daemon=True)
+        self.pid = pid
+        self.stop = stop
+        self.interval = interval
+        self.series = []  # (perf_counter, rss MiB, CPU %)
+
+    def run(self):
+        last_at, last_cpu = time.perf_counter(), cpu_seconds(self.pid)
+        while not self.stop.wait(self.interval):
+            at, cpu = time.perf_counter(), cpu_seconds(self.pid)
+            share = None
+            if cpu is not None and last_cpu is not None:
+                share = 100 * (cpu - last_cpu) / (at - last_at)
+            self.series.append((at, rss_mib(self.pid), share))
+            last_at, last_cpu = at, cpu
+
+    def between(self, start, end=None):
+        return [s for s in self.series if s[0] >= start and (end is None or s[0] < end)]
+
+
+class Viewer(threading.Thread):
+    """One browser tab on the dashboard"""
+
+    def __init__(self, host, port, pattern, poll_interval, recorder, stop):
+        super().__init__(name='loadtest-viewer', daemon=True)
+        self.host = host
+        self.port = port
+        self.pattern = pattern
+        self.poll_interval = poll_interval
+        self.recorder = recorder
+        self.stop = stop
+        self.etags = {}
+        self._stream = None
+
+    def run(self):
+        self.get('/', 'html')
+        if self.pattern == 'page' and self.follow_stream():
+            return
+        while not self.stop.is_set():
+            if self.pattern == 'split':
+                self.get('/api/opportunities', 'opportunities')
+                self.get('/api/stats', 'stats')
+            else:
+                self.get('/api/snapshot', 'snapshot')
+            self.stop.wait(self.poll_interval)
+
+    def get(self, path, endpoint):
+        """One GET on a fresh connection (the servers speak HTTP/1.0), revalidating by ETag"""
+        headers = {'Accept-Encoding': ACCEPT_ENCODING}
+        if path in self.etags:
+            headers['If-None-Match'] = self.etags[path]
+        start = time.perf_counter()
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=REQUEST_TIMEOUT)
+        try:
+            connection.request('GET', path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException) as e:
+            self.recorder.add(Sample(time.perf_counter(), endpoint, time.perf_counter() - start, 0, type(e).__name__))
+            return
+        finally:
+            connection.close()
+        if response.getheader('ETag'):
+            self.etags[path] = response.getheader('ETag')
+        error = f'HTTP {response.status}' if response.status >= 400 else None
+        self.recorder.add(Sample(time.perf_counter(), endpoint, time.perf_counter() - start, response.status, error))
+
+    def follow_stream(self):
+        """Read /api/stream until stopped; False if there is no stream to read
+
+        The recorded latency is the time to the first full event. A stream
+        that drops after it was open reconnects after STREAM_RETRY seconds,
+        as EventSource does.
+        """
+        while not self.stop.is_set():
+            start = time.perf_counter()
+            connection = http.client.HTTPConnection(self.host, self.port, timeout=REQUEST_TIMEOUT)
+            try:
+                connection.request('GET', '/api/stream', headers={'Accept': 'text/event-stream'})
+                # http.client lets go of the socket once it sees an until-close response
+                self._stream = connection.sock
+                response = connection.getresponse()
+                if response.status != 200 or not (response.getheader('Content-Type') or '').startswith('text/event-stream'):
+                    # Full (503) on the dashboard, the index.html catch-all on Vercel
+                    response.read()
+                    self.recorder.count('fallbacks')
+                    return False
+                self._stream.settimeout(None)  # Heartbeats keep it alive; close() shuts it down
+                self.recorder.count('streams')
+                try:
+                    self.read_events(response, start)
+                finally:
+                    self.recorder.count('streams', -1)
+                error = 'disconnected'
+            except (OSError, http.client.HTTPException) as e:
+                error = type(e).__name__
+            finally:
+                connection.close()
+            if self.stop.is_set():
+                break
+            self.recorder.add(Sample(time.perf_counter(), 'stream', time.perf_counter() - start, 0, error))
+            self.stop.wait(STREAM_RETRY)
+        return True
+
+    def read_events(self, response, start):
+        first = True
+        event = None
+        while True:
+            line = response.readline()
+            if not line:
+                return
+            line = line.rstrip(b'\r\n')
+            if line.startswith(b'event:'):
+                event = line[6:].strip()
+            elif not line and event:
+                if first:
+                    self.recorder.add(Sample(time.perf_counter(), 'stream', time.perf_counter() - start, 200))
+                    first = False
+                self.recorder.count('events')
+                event = None
+
+    def close(self):
+        """Drop an open stream so run() can finish"""
+        sock = self._stream
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+def _load_api_module(name):
+    # api/ is a directory of Vercel functions, not a package
+    path = os.path.join(ROOT, 'api', f'{name}.py')
+    spec = importlib.util.spec_from_file_location(f'vercel_api_{name}', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def serve_vercel(port):
+    """Serve api/*.py and index.html the way vercel.json routes them, until killed
+
+    All functions share one process here, so they also share market_data's
+    cache, which separate Vercel instances would not.
+    """
+    from http.server import ThreadingHTTPServer
+    from responses import Representation, send_representation
+
+    functions = {f'/api/{name}': _load_api_module(name) for name in ('opportunities', 'stats', 'snapshot')}
+    with open(os.path.join(ROOT, 'index.html'), 'rb') as f:
+        page = Representation(f.read())
+    page.content_type = 'text/html'
+
+    class VercelRouter(*(module.handler for module in functions.values())):
+        def do_GET(self):
+            function = functions.get(urlsplit(self.path).path.rstrip('/'))
+            if function is not None:
+                function.handler.do_GET(self)
+            else:
+                send_representation(self, page)  # The "/(.*)" -> /index.html rewrite
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), VercelRouter)
+    server.daemon_threads = True
+    print(f"🌐 Vercel routes on http://127.0.0.1:{port}", flush=True)
+    server.serve_forever()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_ready(host, port, server, timeout=STARTUP_TIMEOUT):
+    """Block until GET /api/snapshot answers 200"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server is not None and server.process.poll() is not None:
+            raise RuntimeError(f'Server exited with {server.process.returncode}; see {server.log_path}')
+        connection = http.client.HTTPConnection(host, port, timeout=REQUEST_TIMEOUT)
+        try:
+            connection.request('GET', '/api/snapshot')
+            response = connection.getresponse()
+            response.read()
+            if response.status == 200:
+                return
+        except (OSError, http.client.HTTPException):
+            pass
+        finally:
+            connection.close()
+        time.sleep(0.5)
+    raise RuntimeError(f'Server not ready after {timeout}s')
+
+
+def resource_summary(series):
+    rss = [s[1] for s in series if s[1] is not None]
+    cpu = [s[2] for s in series if s[2] is not None]
+    return {
+        'rss_mib': round(rss[-1], 1) if rss else None,
+        'rss_peak_mib': round(max(rss), 1) if rss else None,
+        'cpu_pct': round(sum(cpu) / len(cpu), 1) if cpu else None,
+    }
+
+
+def _fmt(value, unit=''):
+    return 'n/a' if value is None else f'{value:.1f}{unit}'
+
+
+def run_stages(args, host, port, pid):
+    stop = threading.Event()
+    recorder = Recorder()
+    sampler = ResourceSampler(pid, stop) if pid else None
+    if sampler:
+        sampler.start()
+
+    viewers = []
+    stages = []
+    began = time.perf_counter()
+    try:
+        for clients in args.clients:
+            added = max(0, clients - len(viewers))
+            print(f"\n👥 Stage: {clients} viewers (+{added} over {args.ramp:g}s, then {args.stage_duration:g}s more)")
+            stage_start = time.perf_counter()
+            events = recorder.events
+            for i in range(added):
+                viewer = Viewer(host, port, args.pattern, args.poll_interval, recorder, stop)
+                viewer.start()
+                viewers.append(viewer)
+                time.sleep(args.ramp / added)
+
+            # Arrivals are part of the load: streamed viewers make no requests once connected
+            stage_end = time.perf_counter() + args.stage_duration
+            window_start = stage_start
+            while time.perf_counter() < stage_end:
+                time.sleep(min(args.report_interval, max(0.0, stage_end - time.perf_counter())))
+                now = time.perf_counter()
+                window = summarize(recorder.between(window_start, now), now - window_start)
+                resources = resource_summary(sampler.between(window_start, now)) if sampler else {}
+                print(f"   {now - began:6.0f}s  {window['rps']:7.1f} req/s  "
+                      f"p50 {window['p50_ms']:7.1f}  p95 {window['p95_ms']:7.1f}  p99 {window['p99_ms']:7.1f} ms  "
+                      f"errors {window['error_rate']:6.2%}  streams {recorder.streams:4d}  "
+                      f"rss {_fmt(resources.get('rss_mib'), ' MiB')}  cpu {_fmt(resources.get('cpu_pct'), '%')}")
+                window_start = now
+
+            stage = summarize(recorder.between(stage_start, stage_end), stage_end - stage_start)
+            stage.update(clients=clients, streams=recorder.streams, fallbacks=recorder.fallbacks,
+                         events=recorder.events - events, seconds=round(stage_end - stage_start, 1))
+            stage.update(resource_summary(sampler.between(stage_start, stage_end)) if sampler else {})
+            stage['sustained'] = stage['p99_ms'] <= args.slo_p99_ms and stage['error_rate'] <= args.max_error_rate
+            stages.append(stage)
+    finally:
+        stop.set()
+        for viewer in viewers:
+            viewer.close()
+        for viewer in viewers:
+            viewer.join(timeout=REQUEST_TIMEOUT)
+
+    endpoints = defaultdict(list)
+    for sample in recorder.samples:
+        endpoints[sample.endpoint].append(sample)
+    elapsed = time.perf_counter() - began
+    return {
+        'stages': stages,
+        'endpoints': {name: summarize(samples, elapsed) for name, samples in sorted(endpoints.items())},
+        'errors': dict(Counter(s.error for s in recorder.samples if s.error)),
+        'events': recorder.events,
+        'fallbacks': recorder.fallbacks,
+        'resources': [list(s) for s in sampler.series] if sampler else [],
+    }
+
+
+def print_report(results, args):
+    print(f"\n📊 Stages (SLO: p99 <= {args.slo_p99_ms:g} ms, errors <= {args.max_error_rate:.1%})")
+    print(f"   {'viewers':>7}  {'req/s':>7}  {'p50':>7}  {'p95':>7}  {'p99':>7}  {'errors':>7}  "
+          f"{'streams':>7}  {'events':>7}  {'rss peak':>9}  {'cpu':>6}")
+    for stage in results['stages']:
+        print(f"   {stage['clients']:7d}  {stage['rps']:7.1f}  {stage['p50_ms']:7.1f}  {stage['p95_ms']:7.1f}  "
+              f"{stage['p99_ms']:7.1f}  {stage['error_rate']:7.2%}  {stage['streams']:7d}  {stage['events']:7d}  "
+              f"{_fmt(stage.get('rss_peak_mib'), ' MiB'):>9}  {_fmt(stage.get('cpu_pct'), '%'):>6}  "
+              f"{'✅' if stage['sustained'] else '❌'}")
+
+    print("\n🔎 Endpoints (whole run)")
+    for name, summary in results['endpoints'].items():
+        print(f"   {name:<14} {summary['requests']:7d} req  p50 {summary['p50_ms']:7.1f}  "
+              f"p95 {summary['p95_ms']:7.1f}  p99 {summary['p99_ms']:7.1f} ms  errors {summary['error_rate']:.2%}")
+    if results['errors']:
+        print(f"   Errors: {', '.join(f'{k} x{v}' for k, v in results['errors'].items())}")
+    print(f"   SSE events received: {results['events']}, viewers polling instead of streaming: {results['fallbacks']}")
+
+    sustained = [s['clients'] for s in results['stages'] if s['sustained']]
+    failed = [s['clients'] for s in results['stages'] if not s['sustained']]
+    if not sustained:
+        print("\n❌ No stage met the SLO")
+    elif failed and min(failed) < max(sustained):
+        print(f"\n⚠️ Sustained {max(sustained)} viewers, but missed the SLO at {min(failed)} along the way")
+    else:
+        print(f"\n✅ Sustained up to {max(sustained)} concurrent viewers"
+              + (f" (missed the SLO at {min(failed)})" if failed else ''))
+
+
+def main():
+    """Parse command line options, start the server and run the stages"""
+    parser = argparse.ArgumentParser(description='Load test the DeFi Alpha Hunter dashboard or Vercel API')
+    parser.add_argument('--target', choices=('dashboard', 'vercel'), default='dashboard',
+                        help='Server to start: run_dashboard() or the api/ handlers')
+    parser.add_argument('--url', help='Load an already running server instead of starting one')
+    parser.add_argument('--pid', type=int, help='Process to sample RSS / CPU from when using --url')
+    parser.add_argument('--clients', default=DEFAULT_CLIENTS,
+                        type=lambda value: sorted(int(n) for n in value.split(',')),
+                        help=f'Viewers per stage, comma separated (default {DEFAULT_CLIENTS})')
+    parser.add_argument('--stage-duration', type=float, default=STAGE_DURATION, help='Measured seconds per stage')
+    parser.add_argument('--ramp', type=float, default=RAMP, help="Seconds over which a stage's viewers arrive")
+    parser.add_argument('--pattern', choices=('page', 'split'), default='page',
+                        help='page: stream, else poll /api/snapshot; split: poll /api/opportunities + /api/stats')
+    parser.add_argument('--poll-interval', type=float, default=POLL_INTERVAL, help='Seconds between polls')
+    parser.add_argument('--report-interval', type=float, default=REPORT_INTERVAL, help='Seconds between progress lines')
+    parser.add_argument('--workers', type=int, help='Dashboard worker threads')
+    parser.add_argument('--max-queue', type=int, help='Dashboard accept queue')
+    parser.add_argument('--upstream-latency', default='0',
+                        help='upstream_sim latency, e.g. lognormal:80:600 (see upstream_sim.py)')
+    parser.add_argument('--upstream-error-rate', type=float, default=0.0, help='upstream_sim error rate')
+    parser.add_argument('--live-upstreams', action='store_true', help='Use the real upstreams instead of upstream_sim')
+    parser.add_argument('--slo-p99-ms', type=float, default=SLO_P99_MS, help='p99 a stage must stay under')
+    parser.add_argument('--max-error-rate', type=float, default=MAX_ERROR_RATE, help='Error rate a stage must stay under')
+    parser.add_argument('--json', help='Also write the results to this JSON file')
+    parser.add_argument('--serve-vercel', type=int, metavar='PORT', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve_vercel:
+        serve_vercel(args.serve_vercel)
+        return
+
+    sim = server = None
+    try:
+        if args.url:
+            parts = urlsplit(args.url)
+            host, port, pid = parts.hostname, parts.port or 80, args.pid
+            print(f"🎯 Target: {args.url}")
+        else:
+            env = dict(os.environ, ALPHA_HUNTER_CACHE_DIR=tempfile.mkdtemp(prefix='alpha-hunter-load-'),
+                       PYTHONUNBUFFERED='1')
+            if not args.live_upstreams:
+                from upstream_sim import Faults, Latency, UpstreamSimulator
+                faults = Faults(Latency.parse(args.upstream_latency), args.upstream_error_rate)
+                sim = UpstreamSimulator(faults).start()
+                env.update(sim.environ())
+                print(f"🌩️ Upstreams: upstream_sim at {sim.url} ({faults})")
+
+            host, port = '127.0.0.1', free_port()
+            if args.target == 'dashboard':
+                command = [sys.executable, 'dashboard.py', '--port', str(port)]
+                if args.workers:
+                    command += ['--workers', str(args.workers)]
+                if args.max_queue:
+                    command += ['--max-queue', str(args.max_queue)]
+            else:
+                command = [sys.executable, os.path.abspath(__file__), '--serve-vercel', str(port)]
+            server = ServerProcess(command, env, os.path.join(env['ALPHA_HUNTER_CACHE_DIR'], 'server.log'))
+            pid = server.pid
+            print(f"🎯 Target: {args.target} at http://{host}:{port} (pid {pid}, log {server.log_path})")
+
+        print("⏳ Waiting for the first snapshot...")
+        wait_ready(host, port, server)
+        results = run_stages(args, host, port, pid)
+    finally:
+        if server:
+            server.stop()
+        if sim:
+            sim.stop()
+
+    print_report(results, args)
+    if args.json:
+        results['config'] = {k: v for k, v in vars(args).items() if k != 'serve_vercel'}
+        if sim:
+            results['upstreams'] = sim.stats_json()
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
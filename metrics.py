@@ -0,0 +1,247 @@
+"""
+📏 Metrics
+Counters, gauges and histograms, exposed in the Prometheus text format
+
+Every metric the hunter records is defined at the bottom of this module,
+and the instrumented modules import the ones they update. The dashboard
+serves REGISTRY.render() at /metrics. Recording a value costs a dict lookup
+under a lock, so instrumentation can sit on hot paths.
+
+Serverless invocations cannot be scraped, so the Vercel handlers report
+their timings per response in a Server-Timing header instead. Code records
+them with add_timing(), which does nothing outside a server_timing() block.
+"""
+
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Prometheus' default buckets (seconds): request-sized work
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Hunts and strategies run for seconds, minutes at worst
+HUNT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+# Encoding a body takes micro- to milliseconds
+SERIALIZATION_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{value}"' for name, value in extra]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Registry:
+    """Metrics rendered together at one endpoint"""
+
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if any(m.name == metric.name for m in self._metrics):
+                raise ValueError(f'Metric {metric.name} already registered')
+            self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            lines.extend(metric.samples())
+        return ('\n'.join(lines) + '\n').encode()
+
+
+REGISTRY = Registry()
+
+
+class Metric:
+    type = 'untyped'
+
+    def __init__(self, name, help, labels=(), registry=REGISTRY):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        self._values = {}  # Label values -> value
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f'{self.name} takes labels {self.labelnames}, got {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f'{self.name}{_labels(self.labelnames, key)} {_format_value(value)}' for key, value in values]
+
+
+class Counter(Metric):
+    """Monotonic count per label set"""
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """Current value per label set, or a function read at scrape time"""
+    type = 'gauge'
+
+    def __init__(self, name, help, labels=(), registry=REGISTRY):
+        super().__init__(name, help, labels, registry)
+        self._function = None
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, function):
+        """Report function() (unlabelled gauges only); None values are skipped"""
+        if self.labelnames:
+            raise ValueError(f'{self.name} has labels; set_function needs an unlabelled gauge')
+        self._function = function
+
+    def samples(self):
+        if self._function is None:
+            return super().samples()
+        value = self._function()
+        return [] if value is None else [f'{self.name} {_format_value(value)}']
+
+
+class Histogram(Metric):
+    """Observation counts in cumulative buckets, plus their sum and count"""
+    type = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS, registry=REGISTRY):
+        super().__init__(name, help, labels, registry)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a with-block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        with self._lock:
+            values = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items())
+        lines = []
+        for key, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket in zip(self.buckets, counts):
+                cumulative += bucket
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames, key, [("le", _format_value(bound))])} '
+                             f'{cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, key)} {_format_value(total)}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, key)} {count}')
+        return lines
+
+
+_timings = threading.local()
+
+
+@contextmanager
+def server_timing():
+    """Collect add_timing() calls made on this thread; yields the entry list"""
+    entries = []
+    previous = getattr(_timings, 'entries', None)
+    _timings.entries = entries
+    try:
+        yield entries
+    finally:
+        _timings.entries = previous
+
+
+def add_timing(name, seconds=None, description=None):
+    """Record a Server-Timing entry if this thread is inside server_timing()"""
+    entries = getattr(_timings, 'entries', None)
+    if entries is not None:
+        entries.append((name, seconds, description))
+
+
+def format_server_timing(entries):
+    """Server-Timing header value: 'market;dur=1.2, eth;dur=180.4;desc="CoinGecko"'"""
+    parts = []
+    for name, seconds, description in entries:
+        part = name
+        if seconds is not None:
+            part += f';dur={seconds * 1000:.1f}'
+        if description:
+            part += f';desc="{_escape(description)}"'
+        parts.append(part)
+    return ', '.join(parts)
+
+
+# Upstreams
+UPSTREAM_SECONDS = Histogram(
+    'alpha_hunter_upstream_request_seconds',
+    'Upstream HTTP request latency (to the headers for streamed bodies) by host and status, "error" if none came',
+    ('host', 'status'))
+UPSTREAM_FAILURES = Counter(
+    'alpha_hunter_upstream_failures_total',
+    'Upstream fetches that failed and fell back to another source or cached data',
+    ('host', 'reason'))
+
+# Hunts
+HUNT_SECONDS = Histogram('alpha_hunter_hunt_seconds', 'Duration of a full hunt', buckets=HUNT_BUCKETS)
+HUNT_OPPORTUNITIES = Gauge('alpha_hunter_hunt_opportunities', 'Ranked opportunities found by the last hunt')
+STRATEGY_SECONDS = Histogram('alpha_hunter_strategy_seconds', 'Run time of each strategy',
+                             ('strategy',), buckets=HUNT_BUCKETS)
+STRATEGY_OPPORTUNITIES = Gauge('alpha_hunter_strategy_opportunities',
+                               'Opportunities each strategy found in the last hunt', ('strategy',))
+STRATEGY_FAILURES = Counter('alpha_hunter_strategy_failures_total',
+                            'Strategies that raised or missed their deadline', ('strategy',))
+
+# Caches and encoding
+CACHE_REQUESTS = Counter('alpha_hunter_cache_requests_total', 'Cache lookups by cache and result (hit, miss, stale)',
+                         ('cache', 'result'))
+SERIALIZATION_SECONDS = Histogram('alpha_hunter_serialization_seconds', 'Time to encode a response document',
+                                  ('document',), buckets=SERIALIZATION_BUCKETS)
+
+# Dashboard server
+HTTP_REQUEST_SECONDS = Histogram('alpha_hunter_http_request_seconds', 'Dashboard request latency by route and status',
+                                 ('route', 'status'))
+HTTP_REJECTED = Counter('alpha_hunter_http_rejected_total',
+                        'Connections answered 503 because every worker and queue slot was taken')
+SNAPSHOT_AGE = Gauge('alpha_hunter_snapshot_age_seconds', 'Age of the snapshot the dashboard is serving')
+STREAM_CLIENTS = Gauge('alpha_hunter_stream_clients', 'Open /api/stream connections')
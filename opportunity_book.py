@@ -0,0 +1,202 @@
+"""
+📒 Ranked opportunity book
+Incrementally ranked opportunities keyed by a stable ID
+
+Opportunities are scored once on insert (confidence x profit potential by
+default) and pushed onto max-heaps: one for everything, one per chain and one
+per type. Re-adding an ID replaces its entry, in place when its score is
+unchanged, and replaced, removed or expired entries are dropped lazily from
+the heaps. top(k) walks the heap best-first, so the best k of n entries cost
+O(k log k); a full listing is one sort of the live entries.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from dataclasses import replace
+
+# data keys that identify what an opportunity is about, most specific first
+SUBJECT_KEYS = ('whale', 'token', 'protocol', 'pair', 'address')
+
+
+def opportunity_id(opp):
+    """Stable 'type:chain:subject' ID, e.g. CROSS_CHAIN_ARBITRAGE:Base→Ethereum:WETH"""
+    data = opp.data or {}
+    subject = next((str(data[key]).lower() if key == 'whale' else str(data[key])
+                    for key in SUBJECT_KEYS if data.get(key) is not None), opp.description)
+    return f"{opp.type}:{opp.chain}:{subject}"
+
+
+def default_score(opp):
+    return opp.confidence * opp.profit_potential
+
+
+class OpportunityBook:
+    """Opportunities ranked by score, with top-k, per-chain and per-type views"""
+
+    def __init__(self, score=default_score, ttl=None):
+        self.score = score
+        self.ttl = ttl  # Default lifetime in seconds (None: until removed)
+        self._entries = {}  # id -> (score, sequence, opportunity, expires_at)
+        self._all = []
+        self._by_chain = {}
+        self._by_type = {}
+        self._expiry = []  # (expires_at, sequence, id)
+        self._sequence = itertools.count()
+        self._stale = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, opportunity_id):
+        return opportunity_id in self._entries
+
+    def get(self, opportunity_id):
+        entry = self._entries.get(opportunity_id)
+        return entry[2] if entry else None
+
+    def add(self, opp, ttl=None, now=None):
+        """Insert or replace an opportunity; returns its ID"""
+        key = opportunity_id(opp)
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time() if now is None else now
+        with self._lock:
+            self._insert(key, opp, now + ttl if ttl is not None else None)
+        return key
+
+    def update(self, opp_id, **changes):
+        """Replace fields of a stored opportunity (e.g. confidence) and re-rank it"""
+        with self._lock:
+            entry = self._entries.get(opp_id)
+            if entry is None:
+                raise KeyError(opp_id)
+            self._insert(opp_id, replace(entry[2], **changes), entry[3])
+
+    def remove(self, opp_id):
+        with self._lock:
+            if self._entries.pop(opp_id, None) is not None:
+                self._stale += 1
+
+    def retain(self, ids):
+        """Remove every entry whose ID is not in the set `ids`; returns how many"""
+        with self._lock:
+            gone = [key for key in self._entries if key not in ids]
+            for key in gone:
+                del self._entries[key]
+            self._stale += len(gone)
+            self._compact()
+        return len(gone)
+
+    def expire(self, now=None):
+        """Drop entries whose lifetime has passed; returns how many"""
+        now = time.time() if now is None else now
+        expired = 0
+        with self._lock:
+            while self._expiry and self._expiry[0][0] <= now:
+                expires_at, sequence, key = heapq.heappop(self._expiry)
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] == sequence and entry[3] == expires_at:
+                    del self._entries[key]
+                    self._stale += 1
+                    expired += 1
+            self._compact()
+        return expired
+
+    def top(self, k=None, chain=None, opp_type=None):
+        """Best k opportunities (all when k is None), optionally for one chain and/or type"""
+        with self._lock:
+            if k is None:
+                entries = [entry for entry in self._entries.values()
+                           if (chain is None or entry[2].chain == chain)
+                           and (opp_type is None or entry[2].type == opp_type)]
+                entries.sort(key=lambda entry: (-entry[0], entry[1]))
+                return [entry[2] for entry in entries]
+            accept = None
+            if chain is not None:
+                heap = self._by_chain.get(chain, [])
+                if opp_type is not None:
+                    accept = lambda opp: opp.type == opp_type
+            elif opp_type is not None:
+                heap = self._by_type.get(opp_type, [])
+            else:
+                heap = self._all
+            return list(self._best(heap, k, accept))
+
+    def chains(self):
+        with self._lock:
+            return {chain: sum(1 for _ in self._live(heap)) for chain, heap in self._by_chain.items()}
+
+    def types(self):
+        with self._lock:
+            return {opp_type: sum(1 for _ in self._live(heap)) for opp_type, heap in self._by_type.items()}
+
+    def _insert(self, key, opp, expires_at):
+        # Caller holds self._lock
+        score = self.score(opp)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == score:
+            # Same rank: swap the opportunity in place, its heap items stay valid
+            self._entries[key] = (score, entry[1], opp, expires_at)
+            if expires_at is not None and expires_at != entry[3]:
+                heapq.heappush(self._expiry, (expires_at, entry[1], key))
+            return
+        if entry is not None:
+            self._stale += 1
+        sequence = next(self._sequence)
+        self._entries[key] = (score, sequence, opp, expires_at)
+
+        item = (-score, sequence, key)
+        heapq.heappush(self._all, item)
+        heapq.heappush(self._by_chain.setdefault(opp.chain, []), item)
+        heapq.heappush(self._by_type.setdefault(opp.type, []), item)
+        if expires_at is not None:
+            heapq.heappush(self._expiry, (expires_at, sequence, key))
+        self._compact()
+
+    def _is_live(self, item):
+        entry = self._entries.get(item[2])
+        return entry is not None and entry[1] == item[1]
+
+    def _live(self, heap):
+        return (item for item in heap if self._is_live(item))
+
+    def _best(self, heap, k, accept=None):
+        # Best-first walk of the heap array: a side heap of frontier nodes
+        # yields items in score order without popping from the book's heap
+        if not heap or k <= 0:
+            return
+        frontier = [(heap[0], 0)]
+        found = 0
+        while frontier and found < k:
+            item, i = heapq.heappop(frontier)
+            if self._is_live(item):
+                opp = self._entries[item[2]][2]
+                if accept is None or accept(opp):
+                    found += 1
+                    yield opp
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child], child))
+
+    def _compact(self):
+        # Rebuild the heaps once dead items outnumber live ones (O(n), amortised)
+        if self._stale <= max(64, len(self._entries)):
+            return
+        live = [(-score, sequence, key) for key, (score, sequence, _, _) in self._entries.items()]
+        self._all = live
+        heapq.heapify(self._all)
+        self._by_chain = {}
+        self._by_type = {}
+        for item in live:
+            opp = self._entries[item[2]][2]
+            self._by_chain.setdefault(opp.chain, []).append(item)
+            self._by_type.setdefault(opp.type, []).append(item)
+        for heap in itertools.chain(self._by_chain.values(), self._by_type.values()):
+            heapq.heapify(heap)
+        self._expiry = [(expires_at, sequence, key)
+                        for key, (_, sequence, _, expires_at) in self._entries.items()
+                        if expires_at is not None]
+        heapq.heapify(self._expiry)
+        self._stale = 0
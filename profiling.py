@@ -0,0 +1,219 @@
+"""
+🔬 Profiling
+CPU, allocation and sampled-stack profiles of hunts, without code changes
+
+StackSampler wakes up every few milliseconds and records the Python stack of
+every busy thread. Sampling measures wall-clock time, including time spent
+waiting on upstreams, and sees the strategy worker threads as well as the
+caller. It writes folded stacks, one "frame;frame;frame count" line per
+distinct stack, which flamegraph.pl, speedscope and inferno all read.
+
+profile_runs() calls a function a number of times under cProfile,
+tracemalloc and a StackSampler. It writes:
+
+    profile.txt     per-function report: cumulative and own time, allocation
+                    peaks per run and the sites that kept memory across runs
+    profile.pstats  the raw cProfile data (python -m pstats, snakeviz)
+    profile.folded  sampled stacks for a flame graph
+
+cProfile only sees the thread that called profile_runs(). Work done in
+other threads (parallel hunts) shows up in the sampled stacks only.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+SAMPLE_INTERVAL = 0.005  # Seconds between stack samples
+MAX_STACK_DEPTH = 128  # Frames kept per sample, innermost first
+TRACEMALLOC_FRAMES = 1  # Frames per allocation; more frames slow every allocation down
+REPORT_FUNCTIONS = 40  # Functions listed per pstats table
+REPORT_ALLOCATION_SITES = 20
+
+# Innermost frames of threads parked with nothing to do: pool workers waiting
+# for a task, accept loops, Event/Condition waits. Skipped unless asked for.
+IDLE_FRAMES = {
+    ('thread.py', '_worker'),
+    ('threading.py', 'wait'),
+    ('selectors.py', 'select'),
+    ('queue.py', 'get'),
+}
+
+
+def frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Samples every thread's stack from a background thread
+
+    Use it as a context manager, or call start() and stop(). Each sample
+    counts once for the stack it lands in, and stacks are rooted at their
+    thread's name so per-thread work stays apart in a flame graph.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL, exclude=(), include_idle=False):
+        self.interval = interval
+        self.exclude = set(exclude)  # Thread idents not to sample
+        self.include_idle = include_idle
+        self.stacks = Counter()
+        self.samples = 0
+        self.idle = 0  # Thread samples skipped as idle
+        self.started_at = None
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        self._stop.clear()
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.elapsed = time.perf_counter() - self.started_at
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or ident in self.exclude:
+                    continue
+                code = frame.f_code
+                if not self.include_idle and (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                    self.idle += 1
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    stack.append(frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f'thread-{ident}'))
+                self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def folded(self):
+        """Folded stacks, heaviest first"""
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+    def top_functions(self, limit=REPORT_FUNCTIONS):
+        """[(frame, samples on top of the stack, samples anywhere in it)], busiest first"""
+        own = Counter()
+        total = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(';')[1:]  # Drop the thread-name root
+            if not frames:
+                continue
+            own[frames[-1]] += count
+            for frame in set(frames):
+                total[frame] += count
+        return [(frame, own[frame], total[frame]) for frame, _ in own.most_common(limit)]
+
+    def report(self, limit=REPORT_FUNCTIONS):
+        """Plain-text summary of the busiest functions"""
+        ticks = sum(self.stacks.values()) or 1
+        lines = [f"{self.samples} samples every {self.interval * 1000:g} ms over {self.elapsed:.1f}s "
+                 f"({self.idle} idle thread samples skipped)",
+                 f"{'own':>7} {'total':>7}  function"]
+        for frame, own, total in self.top_functions(limit):
+            lines.append(f"{own / ticks:7.1%} {total / ticks:7.1%}  {frame}")
+        return '\n'.join(lines) + '\n'
+
+
+def _format_size(size):
+    return f"{size / 1024 / 1024:.2f} MiB" if abs(size) >= 1024 * 1024 else f"{size / 1024:.1f} KiB"
+
+
+def _snapshot():
+    # Leave out tracemalloc's and the profiler's own bookkeeping
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    ))
+
+
+def profile_runs(run, iterations=1, output_dir='.', interval=SAMPLE_INTERVAL):
+    """Call run() `iterations` times under cProfile, tracemalloc and a StackSampler
+
+    Writes profile.txt, profile.pstats and profile.folded to output_dir and
+    returns their paths.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    profiler = cProfile.Profile()
+    sampler = StackSampler(interval)
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+
+    runs = []  # (seconds, peak bytes, retained bytes)
+    try:
+        baseline = _snapshot()
+        previous_size = tracemalloc.get_traced_memory()[0]
+        with sampler:
+            for _ in range(iterations):
+                tracemalloc.reset_peak()
+                start = time.perf_counter()
+                profiler.enable()
+                try:
+                    run()
+                finally:
+                    profiler.disable()
+                elapsed = time.perf_counter() - start
+                size, peak = tracemalloc.get_traced_memory()
+                runs.append((elapsed, peak - previous_size, size - previous_size))
+                previous_size = size
+        final = _snapshot()
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+
+    paths = {name: os.path.join(output_dir, f'profile.{name}') for name in ('txt', 'pstats', 'folded')}
+    profiler.dump_stats(paths['pstats'])
+    with open(paths['folded'], 'w') as f:
+        f.write(sampler.folded())
+
+    report = io.StringIO()
+    report.write(f"🔬 {iterations} run(s) of {getattr(run, '__qualname__', run)}\n\n")
+    report.write(f"{'run':>4} {'seconds':>9} {'peak alloc':>12} {'retained':>12}\n")
+    for i, (elapsed, peak, retained) in enumerate(runs, 1):
+        report.write(f"{i:4d} {elapsed:9.3f} {_format_size(peak):>12} {_format_size(retained):>12}\n")
+    report.write("\nTimes include cProfile, tracemalloc and sampling overhead; compare runs with each other, "
+                 "not with unprofiled hunts.\n")
+
+    for title, key in (('cumulative time', 'cumulative'), ('own time', 'tottime')):
+        report.write(f"\n== CPU: top {REPORT_FUNCTIONS} functions by {title} (calling thread) ==\n")
+        stats = pstats.Stats(profiler, stream=report)
+        stats.sort_stats(key).print_stats(REPORT_FUNCTIONS)
+
+    report.write("\n== Memory: sites holding the most memory after the last run ==\n")
+    for stat in final.statistics('lineno')[:REPORT_ALLOCATION_SITES]:
+        report.write(f"{_format_size(stat.size):>12} {stat.count:9d} blocks  {stat.traceback}\n")
+    report.write("\n== Memory: growth since before the first run ==\n")
+    for stat in final.compare_to(baseline, 'lineno')[:REPORT_ALLOCATION_SITES]:
+        if stat.size_diff:
+            report.write(f"{_format_size(stat.size_diff):>12} {stat.count_diff:+9d} blocks  {stat.traceback}\n")
+
+    report.write("\n== Sampled stacks (all threads, wall clock) ==\n")
+    report.write(sampler.report())
+    report.write(f"Folded stacks: {paths['folded']}\n")
+
+    with open(paths['txt'], 'w') as f:
+        f.write(report.getvalue())
+    return paths
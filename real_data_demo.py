@@ -9,15 +9,13 @@ and real dataset information we discovered.
 NO FAKE DATA - Shows actual dataset schemas and real query examples
 """
 
-import requests
 import json
 from datetime import datetime
 from dataclasses import dataclass
 from typing import List, Dict
 
-# Real AMP playground API
-PLAYGROUND_BASE = "https://playground.amp.thegraph.com"
-DATASETS_API = f"{PLAYGROUND_BASE}/api/trpc/datasets.list"
+from dataset_catalog import DatasetCatalog, load_datasets
+from ingestion import BlockWatermarks, block_range_query, swap_feed
 
 @dataclass
 class RealDatasetInfo:
@@ -31,21 +29,16 @@ class RealDatasetInfo:
 class PlaygroundRealDataDemo:
     def __init__(self):
         self.real_datasets = []
+        self.catalog = DatasetCatalog([])
         
     def load_real_datasets(self):
         """Load actual dataset information from playground"""
         print("🔍 Loading REAL Dataset Information from AMP Playground...")
         
         try:
-            params = {
-                'batch': '1',
-                'input': '{"0":{"json":null,"meta":{"values":["undefined"],"v":1}}}'
-            }
-            
-            response = requests.get(DATASETS_API, params=params, timeout=30)
-            if response.status_code == 200:
-                data = response.json()
-                datasets = data[0]['result']['data']['json']['datasets']
+            # Cached catalog; refreshed in the background when stale
+            datasets = load_datasets()
+            if datasets is not None:
                 
                 # Parse real dataset information
                 for dataset in datasets:
@@ -59,6 +52,9 @@ class PlaygroundRealDataDemo:
                     )
                     self.real_datasets.append(real_dataset)
                 
+                # Index once for the protocol/chain lookups below
+                self.catalog = DatasetCatalog(self.real_datasets)
+                
                 print(f"✅ Loaded {len(self.real_datasets)} REAL datasets")
                 return True
                 
@@ -72,35 +68,26 @@ class PlaygroundRealDataDemo:
         print("="*60)
         
         # Find Uniswap datasets
-        uniswap_eth = next((d for d in self.real_datasets if 'uniswap' in d.name.lower() and 'ethereum' in d.chains), None)
-        uniswap_base = next((d for d in self.real_datasets if 'uniswap' in d.name.lower() and 'base' in d.chains), None)
+        uniswap_eth = self.catalog.first(protocol='uniswap', chain='ethereum')
+        uniswap_base = self.catalog.first(protocol='uniswap', chain='base')
         
         if uniswap_eth and uniswap_base:
             print(f"🦄 Found REAL Uniswap datasets:")
             print(f"   ETH: {uniswap_eth.namespace}/{uniswap_eth.name}")
             print(f"   Base: {uniswap_base.namespace}/{uniswap_base.name}")
             
-            print(f"\n📊 REAL QUERY for Cross-Chain Arbitrage:")
+            print(f"\n📊 REAL QUERY for Cross-Chain Arbitrage (incremental):")
+            watermarks = BlockWatermarks()
             print(f"```sql")
-            print(f"-- Get latest ETH Uniswap swaps")
-            print(f"SELECT pool_address, token0, token1, amount0, amount1, ")
-            print(f"       sqrt_price_x96, block_timestamp, transaction_hash")
-            print(f"FROM \"{uniswap_eth.namespace}/{uniswap_eth.name}@latest\".event__swap")
-            print(f"WHERE block_timestamp > NOW() - INTERVAL '1 hour'")
-            print(f"  AND ABS(amount0) > 1000000000000000000  -- > 1 ETH equivalent")
-            print(f"ORDER BY block_timestamp DESC LIMIT 20;")
-            print(f"")
-            print(f"-- Get latest Base Uniswap swaps")
-            print(f"SELECT pool_address, token0, token1, amount0, amount1,")
-            print(f"       sqrt_price_x96, block_timestamp, transaction_hash") 
-            print(f"FROM \"{uniswap_base.namespace}/{uniswap_base.name}@latest\".event__swap")
-            print(f"WHERE block_timestamp > NOW() - INTERVAL '1 hour'")
-            print(f"  AND ABS(amount0) > 1000000000000000000  -- > 1 ETH equivalent")
-            print(f"ORDER BY block_timestamp DESC LIMIT 20;")
+            for label, dataset in (('ETH', uniswap_eth), ('Base', uniswap_base)):
+                feed = swap_feed(dataset)
+                watermark = watermarks.get(feed)
+                print(f"-- New {label} Uniswap swaps since block {watermark if watermark is not None else '(first sync: last hour)'}")
+                print(f"{block_range_query(feed, watermark)};")
             print(f"```")
             
             print(f"\n🎯 REAL ARBITRAGE LOGIC:")
-            print(f"1. Execute both queries in playground")
+            print(f"1. Execute both queries; only blocks past each watermark are scanned")
             print(f"2. Compare sqrt_price_x96 for same token pairs")
             print(f"3. Calculate price differences accounting for decimals")
             print(f"4. Find opportunities > 0.1% profit after gas/bridge fees")
@@ -114,8 +101,8 @@ class PlaygroundRealDataDemo:
         print("="*60)
         
         # Find raw blockchain datasets
-        eth_mainnet = next((d for d in self.real_datasets if 'ethereum_mainnet' in d.name.lower()), None)
-        base_mainnet = next((d for d in self.real_datasets if 'base_mainnet' in d.name.lower()), None)
+        eth_mainnet = self.catalog.first(protocol='ethereum_mainnet')
+        base_mainnet = self.catalog.first(protocol='base_mainnet')
         
         if eth_mainnet:
             print(f"⚡ Found REAL Ethereum dataset: {eth_mainnet.namespace}/{eth_mainnet.name}")
@@ -149,7 +136,7 @@ class PlaygroundRealDataDemo:
         print("="*60)
         
         # Find Aave dataset
-        aave_dataset = next((d for d in self.real_datasets if 'aave' in d.name.lower()), None)
+        aave_dataset = self.catalog.first(protocol='aave')
         
         if aave_dataset:
             print(f"🏦 Found REAL Aave dataset: {aave_dataset.namespace}/{aave_dataset.name}")
@@ -181,7 +168,7 @@ class PlaygroundRealDataDemo:
         print("="*60)
         
         # Find Base analytics datasets
-        base_datasets = [d for d in self.real_datasets if 'base' in d.name.lower() and 'analytics' in d.name.lower()]
+        base_datasets = self.catalog.query(protocol='base analytics')
         
         if base_datasets:
             for dataset in base_datasets:
@@ -253,8 +240,8 @@ class PlaygroundRealDataDemo:
         
         print("\n🎯 REAL ALPHA OPPORTUNITIES:")
         total_datasets = len(self.real_datasets)
-        eth_datasets = len([d for d in self.real_datasets if 'ethereum' in d.chains])
-        base_datasets = len([d for d in self.real_datasets if 'base' in d.chains])
+        eth_datasets = self.catalog.count(chain='ethereum')
+        base_datasets = self.catalog.count(chain='base')
         
         print(f"   📊 {total_datasets} real blockchain datasets available")
         print(f"   ⚡ {eth_datasets} Ethereum datasets (where big money lives)")
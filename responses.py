@@ -0,0 +1,183 @@
+"""
+🗜️ Cacheable JSON responses
+ETags, conditional GETs and compressed variants, encoded once per change
+
+A Representation wraps one encoded JSON body. Its ETag is a hash of the
+body, and each compressed variant is produced the first time a client asks
+for it and then kept. Documents that carry a rebuild timestamp hash a
+validator() of their content without it instead, under a weak ETag, so a
+rebuild that changed nothing else still answers pollers with a 304.
+
+The snapshot service and the market data cache build one Representation per
+change, so hashing and compression cost follows the rate of change instead
+of the number of requests. A client that sends a matching If-None-Match
+gets an empty 304.
+
+Brotli is used when the optional `brotli` package is installed; gzip
+always works.
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+
+from metrics import CACHE_REQUESTS
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5  # Fast enough to run once per snapshot, well ahead of gzip on JSON
+MIN_COMPRESS_SIZE = 512  # Smaller bodies are sent as-is
+
+CACHE_CONTROL = 'no-cache'  # Clients may keep bodies but must revalidate them
+
+# Server preference when a client accepts several encodings equally
+SUPPORTED_ENCODINGS = ('br', 'gzip') if brotli else ('gzip',)
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    raise ValueError(f'Unsupported encoding: {encoding}')
+
+
+def negotiate(accept_encoding, supported=SUPPORTED_ENCODINGS):
+    """Best content coding for an Accept-Encoding header, or None for identity"""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        q = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key.lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[name.strip().lower()] = q
+
+    best = None
+    best_q = 0.0
+    for encoding in supported:
+        q = weights.get(encoding, weights.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def snapshot_document(version, opportunities_body, stats_body):
+    """/api/snapshot body spliced from already-encoded opportunities and stats"""
+    return (b'{"version": ' + str(version).encode() +
+            b', "opportunities": ' + opportunities_body +
+            b', "stats": ' + stats_body + b'}')
+
+
+def validator(document, volatile=()):
+    """ETag input for a JSON document: its encoding without the `volatile` keys
+
+    Keys are dropped from a dict, or from each dict in a list.
+    """
+    def strip(item):
+        return {k: v for k, v in item.items() if k not in volatile} if isinstance(item, dict) else item
+    document = [strip(item) for item in document] if isinstance(document, list) else strip(document)
+    return json.dumps(document, sort_keys=True, default=str).encode()
+
+
+def etag_matches(if_none_match, etags):
+    """True if an If-None-Match header matches any of `etags` (weak comparison)"""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag == '*':
+            return True
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag in etags:
+            return True
+    return False
+
+
+class Representation:
+    """One JSON body with its ETag and lazily compressed variants"""
+
+    content_type = 'application/json'
+
+    def __init__(self, body, validator=None):
+        """validator: bytes to derive a weak ETag from instead of the body"""
+        self.body = body
+        self.digest = hashlib.blake2b(body if validator is None else validator, digest_size=12).hexdigest()
+        self.weak = validator is not None
+        self.etag = self.variant_etag(None)
+        self._variants = {}
+        self._lock = threading.Lock()
+
+    def etags(self):
+        """Opaque tags of the identity body and every variant, for weak comparison"""
+        return {self._tag(None), *(self._tag(encoding) for encoding in SUPPORTED_ENCODINGS)}
+
+    def _tag(self, encoding):
+        return f'"{self.digest}"' if encoding is None else f'"{self.digest}-{encoding}"'
+
+    def variant_etag(self, encoding):
+        return f'W/{self._tag(encoding)}' if self.weak else self._tag(encoding)
+
+    def encoded(self, encoding):
+        """(body, encoding) for the negotiated encoding; identity for small bodies
+
+        Only compressed variants count towards the compressed_body cache.
+        """
+        if encoding in (None, 'identity') or len(self.body) < MIN_COMPRESS_SIZE:
+            return self.body, None
+        variant = self._variants.get(encoding)
+        if variant is None:
+            with self._lock:
+                variant = self._variants.get(encoding)
+                if variant is None:
+                    CACHE_REQUESTS.inc(cache='compressed_body', result='miss')
+                    variant = self._variants[encoding] = compress(self.body, encoding)
+                    return variant, encoding
+        CACHE_REQUESTS.inc(cache='compressed_body', result='hit')
+        return variant, encoding
+
+
+def send_representation(handler, representation, cache_control=CACHE_CONTROL, extra_headers=None):
+    """Answer a GET on a BaseHTTPRequestHandler with a 200 or 304 for representation"""
+    headers = handler.headers
+    body, encoding = representation.encoded(negotiate(headers.get('Accept-Encoding')))
+    etag = representation.variant_etag(encoding)
+
+    if etag_matches(headers.get('If-None-Match'), representation.etags()):
+        CACHE_REQUESTS.inc(cache='client_etag', result='hit')
+        handler.send_response(304)
+        handler.send_header('ETag', etag)
+        handler.send_header('Cache-Control', cache_control)
+        handler.send_header('Vary', 'Accept-Encoding')
+        handler.send_header('Access-Control-Allow-Origin', '*')
+        for name, value in (extra_headers or {}).items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        return
+
+    CACHE_REQUESTS.inc(cache='client_etag', result='miss')
+    handler.send_response(200)
+    handler.send_header('Content-type', representation.content_type)
+    handler.send_header('Content-Length', str(len(body)))
+    if encoding:
+        handler.send_header('Content-Encoding', encoding)
+    handler.send_header('ETag', etag)
+    handler.send_header('Cache-Control', cache_control)
+    handler.send_header('Vary', 'Accept-Encoding')
+    handler.send_header('Access-Control-Allow-Origin', '*')
+    for name, value in (extra_headers or {}).items():
+        handler.send_header(name, value)
+    handler.end_headers()
+    handler.wfile.write(body)
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+📸 Opportunity Snapshot Service
+Runs the ETH-Base hunt on a schedule and publishes one immutable result
+
+Every dashboard endpoint reads the latest snapshot instead of running its own
+hunt, so a page load costs a pointer read no matter how many tabs are open.
+"""
+
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import MappingProxyType
+from typing import Mapping, Optional, Tuple
+
+from alpha_hunter import EthBaseAlphaHunter
+from history import DEFAULT_HISTORY_LIMIT, HISTORY_SIZE, HuntHistory
+from metrics import SERIALIZATION_SECONDS, SNAPSHOT_AGE
+from opportunity_book import opportunity_id
+from responses import Representation, snapshot_document, validator
+
+REFRESH_INTERVAL = 30  # Seconds between background hunts (matches dashboard polling)
+POSITION_SIZE = 100000  # Assume $100k position for profit estimates
+
+# Fields rewritten by every hunt; they alone are not a change (deltas, ETags)
+VOLATILE_OPPORTUNITY_KEYS = frozenset({'timestamp'})
+VOLATILE_STATS_KEYS = frozenset({'last_updated'})
+
+
+@dataclass(frozen=True)
+class OpportunitySnapshot:
+    version: int
+    created_at: datetime
+    opportunities: Tuple[Mapping, ...]
+    stats: Mapping
+    opportunities_body: bytes
+    stats_body: bytes
+    snapshot_body: bytes  # {"version", "opportunities", "stats"} in one document
+    opportunities_response: Representation  # ETag and compressed variants of the body
+    stats_response: Representation
+    snapshot_response: Representation
+    strategy_timings: Mapping = field(default_factory=lambda: MappingProxyType({}))
+    missing_strategies: Tuple[str, ...] = ()
+
+
+def serialize_opportunity(opp):
+    """Convert an AlphaOpportunity to a JSON-serializable dict"""
+    return {
+        'id': opportunity_id(opp),
+        'type': opp.type,
+        'chain': opp.chain,
+        'confidence': opp.confidence,
+        'profit_potential': opp.profit_potential,
+        'description': opp.description,
+        'action': opp.action,
+        'timestamp': opp.timestamp.isoformat(),
+        'data': opp.data
+    }
+
+
+def compute_stats(opportunities, now):
+    """Summary stats shown in the dashboard header"""
+    if not opportunities:
+        return {
+            'total_opportunities': 0,
+            'avg_confidence': '0%',
+            'total_profit': '0',
+            'high_confidence': 0,
+            'last_updated': now.isoformat()
+        }
+
+    avg_confidence = sum(o.confidence for o in opportunities) / len(opportunities)
+    total_profit = sum(o.profit_potential * POSITION_SIZE for o in opportunities)
+    high_confidence = len([o for o in opportunities if o.confidence > 0.8])
+
+    return {
+        'total_opportunities': len(opportunities),
+        'avg_confidence': f"{avg_confidence:.1%}",
+        'total_profit': f"{total_profit:,.0f}",
+        'high_confidence': high_confidence,
+        'last_updated': now.isoformat()
+    }
+
+
+def build_snapshot(version, opportunities, now=None, timings=None, missing=()):
+    """Freeze ranked opportunities into a snapshot with pre-encoded bodies"""
+    start = time.perf_counter()
+    now = now or datetime.now()
+    json_opportunities = [serialize_opportunity(opp) for opp in opportunities]
+    stats = compute_stats(opportunities, now)
+    opportunities_body = json.dumps(json_opportunities).encode()
+    stats_body = json.dumps(stats).encode()
+    snapshot_body = snapshot_document(version, opportunities_body, stats_body)
+    opportunities_validator = validator(json_opportunities, VOLATILE_OPPORTUNITY_KEYS)
+    stats_validator = validator(stats, VOLATILE_STATS_KEYS)
+    SERIALIZATION_SECONDS.observe(time.perf_counter() - start, document='snapshot')
+
+    return OpportunitySnapshot(
+        version=version,
+        created_at=now,
+        opportunities=tuple(MappingProxyType(o) for o in json_opportunities),
+        stats=MappingProxyType(stats),
+        opportunities_body=opportunities_body,
+        stats_body=stats_body,
+        snapshot_body=snapshot_body,
+        opportunities_response=Representation(opportunities_body, opportunities_validator),
+        stats_response=Representation(stats_body, stats_validator),
+        # The version changes with every hunt too
+        snapshot_response=Representation(snapshot_body, opportunities_validator + b'\n' + stats_validator),
+        strategy_timings=MappingProxyType(dict(timings or {})),
+        missing_strategies=tuple(missing)
+    )
+
+
+def _content(item, volatile):
+    return {key: value for key, value in item.items() if key not in volatile}
+
+
+def snapshot_delta(previous, current):
+    """What changed between two snapshots, or None if nothing a client shows did
+
+    Opportunities are matched by ID. Their timestamps (and the stats'
+    last_updated) change on every hunt, so they alone don't count as a change.
+    `order` is the current ranking as a list of IDs.
+    """
+    before = {o['id']: o for o in previous.opportunities} if previous else {}
+    after = {o['id']: o for o in current.opportunities}
+
+    added = [dict(o) for key, o in after.items() if key not in before]
+    volatile = VOLATILE_OPPORTUNITY_KEYS
+    updated = [dict(o) for key, o in after.items()
+               if key in before and _content(o, volatile) != _content(before[key], volatile)]
+    removed = [key for key in before if key not in after]
+    order = list(after)
+    stats_changed = previous is None or (
+        _content(current.stats, VOLATILE_STATS_KEYS) != _content(previous.stats, VOLATILE_STATS_KEYS))
+
+    if not (added or updated or removed or stats_changed) and order == list(before):
+        return None
+    return {
+        'version': current.version,
+        'added': added,
+        'updated': updated,
+        'removed': removed,
+        'order': order,
+        'stats': dict(current.stats) if stats_changed else None
+    }
+
+
+class SnapshotService:
+    """Background hunt loop that publishes the latest OpportunitySnapshot"""
+
+    def __init__(self, interval=REFRESH_INTERVAL, hunter_factory=EthBaseAlphaHunter,
+                 history_size=HISTORY_SIZE):
+        self.interval = interval
+        self.hunter_factory = hunter_factory
+        self._hunter = None
+        self._hunt_lock = threading.Lock()
+        self.history = HuntHistory(history_size)
+        self._snapshot = None
+        self._version = 0
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._published = threading.Condition(self._lock)
+        self._thread = None
+
+    def start(self):
+        """Start the background refresh thread (idempotent)"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='snapshot-refresh', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        """Stop the background thread after the current hunt finishes"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    @property
+    def hunter(self):
+        """The hunter every refresh runs on, created on first use"""
+        with self._lock:
+            if self._hunter is None:
+                self._hunter = self.hunter_factory()
+            return self._hunter
+
+    def refresh(self):
+        """Run one hunt and publish its snapshot
+
+        Hunts run one at a time on the same hunter, so its opportunity book,
+        lending positions and liquidation index carry over between them.
+        """
+        with self._hunt_lock:
+            result = self.hunter.run_hunt(parallel=True)
+
+            with self._lock:
+                self._version += 1
+                snapshot = build_snapshot(self._version, result.opportunities,
+                                          timings=result.timings, missing=result.missing)
+                self._snapshot = snapshot
+                self.history.append(snapshot.version, snapshot.created_at, result.opportunities)
+                self._published.notify_all()
+
+        self._ready.set()
+        return snapshot
+
+    def current(self, timeout=None) -> Optional[OpportunitySnapshot]:
+        """Latest snapshot, waiting up to timeout for the first one"""
+        if self._snapshot is None and timeout:
+            self._ready.wait(timeout)
+        return self._snapshot
+
+    def wait_for_update(self, after_version, timeout=None) -> Optional[OpportunitySnapshot]:
+        """Block until a snapshot newer than after_version is published (or timeout)
+
+        Returns the latest snapshot either way; callers compare its version.
+        """
+        with self._published:
+            self._published.wait_for(
+                lambda: self._snapshot is not None and self._snapshot.version > after_version, timeout)
+            return self._snapshot
+
+    def age(self):
+        """Seconds since the current snapshot was built, or None before the first"""
+        snapshot = self._snapshot
+        return (datetime.now() - snapshot.created_at).total_seconds() if snapshot else None
+
+    def history_json(self, limit=DEFAULT_HISTORY_LIMIT):
+        """Recent hunts as JSON-ready trends (see HuntHistory.to_json)"""
+        return self.history.to_json(limit, position_size=POSITION_SIZE)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"❌ Snapshot refresh failed: {e}")
+            self._stop.wait(self.interval)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_snapshot_service():
+    """Process-wide snapshot service, started on first use"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = SnapshotService()
+            _service.start()
+            SNAPSHOT_AGE.set_function(_service.age)
+        return _service
+
+
+def set_snapshot_service(service):
+    """Replace the process-wide snapshot service (not started); returns the previous one"""
+    global _service
+    with _service_lock:
+        previous, _service = _service, service
+        return previous
@@ -0,0 +1,205 @@
+"""
+🦄 Uniswap V3 pricing engine
+Column-at-a-time price decoding for event__swap rows on ETH and Base
+
+sqrt_price_x96 is a uint160, which overflows every NumPy integer type. Values
+are converted straight to float64 (Python ints and decimal strings both round
+correctly at any width) and scaled by an exact power of two, so whole columns
+decode without int64 wrap-around or a per-row Decimal loop. Pools from both
+chains are then keyed by token-symbol pair and joined to compute spreads.
+
+LatestPairPrices keeps that reduction current as swap batches are ingested,
+so a hunt joins a handful of per-pair prices instead of re-decoding every
+held row.
+"""
+
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+
+Q96_INVERSE = 2.0 ** -96  # Exact in float64
+
+
+def sqrt_price_x96_to_ratio(values):
+    """sqrt_price_x96 column -> float64 sqrt(token1/token0) in raw units
+
+    Accepts float/int arrays, or object/str columns of full-width uint160
+    values; every element is rounded once, correctly, whatever its width.
+    Never cast these columns to int64/uint64 first - that silently wraps.
+    """
+    return np.asarray(values).astype(np.float64) * Q96_INVERSE
+
+
+def sqrt_price_x96_to_price(values, decimals0, decimals1):
+    """Decimal-adjusted price of token0 in token1 for a column of sqrt_price_x96
+
+    decimals0 / decimals1 may be scalars or columns of the same length.
+    """
+    ratio = sqrt_price_x96_to_ratio(values)
+    scale = np.power(10.0, np.asarray(decimals0, dtype=np.float64) - np.asarray(decimals1, dtype=np.float64))
+    return ratio * ratio * scale
+
+
+def spread_bps(prices_a, prices_b):
+    """Absolute spread between two price columns in basis points of the cheaper side"""
+    prices_a = np.asarray(prices_a, dtype=np.float64)
+    prices_b = np.asarray(prices_b, dtype=np.float64)
+    return np.abs(prices_a - prices_b) / np.minimum(prices_a, prices_b) * 10000
+
+
+@dataclass
+class PairPrices:
+    """Latest price per token pair on one chain (columns share an index)"""
+    pairs: np.ndarray  # 'BASE/QUOTE' labels, sorted
+    prices: np.ndarray  # QUOTE per BASE
+    blocks: np.ndarray  # Block of the swap the price came from
+    swaps: np.ndarray  # Swaps the pair's price was reduced from
+
+
+def pair_prices(swaps, tokens, block_column='block_num'):
+    """Reduce a batch of swap rows to the latest price per token pair
+
+    swaps   list of event__swap row dicts (token0, token1, sqrt_price_x96, block)
+    tokens  {lowercase address: (symbol, decimals)} for this chain
+
+    Swaps on tokens outside `tokens` are dropped. Pairs are oriented by symbol
+    so a WETH/USDC pool and a USDC/WETH pool land on the same key on both
+    chains.
+    """
+    if not swaps:
+        empty = np.array([], dtype=object)
+        return PairPrices(empty, np.array([]), np.array([], dtype=np.int64), np.array([], dtype=np.int64))
+
+    token0 = np.array([row['token0'] for row in swaps], dtype=object)
+    token1 = np.array([row['token1'] for row in swaps], dtype=object)
+    sqrt_prices = np.array([row['sqrt_price_x96'] for row in swaps], dtype=object)
+    blocks = np.array([row.get(block_column) or 0 for row in swaps], dtype=np.int64)
+
+    # Resolve each distinct address once, then broadcast via the inverse index
+    addresses, inverse = np.unique(np.concatenate([token0, token1]).astype(str), return_inverse=True)
+    known = np.array([address.lower() in tokens for address in addresses])
+    symbols = np.array([tokens[a.lower()][0] if k else '' for a, k in zip(addresses, known)], dtype=object)
+    decimals = np.array([tokens[a.lower()][1] if k else 0 for a, k in zip(addresses, known)], dtype=np.float64)
+
+    count = len(swaps)
+    index0, index1 = inverse[:count], inverse[count:]
+    mask = known[index0] & known[index1]
+    if not mask.any():
+        return pair_prices([], tokens)
+
+    index0, index1 = index0[mask], index1[mask]
+    prices = sqrt_price_x96_to_price(sqrt_prices[mask], decimals[index0], decimals[index1])
+    blocks = blocks[mask]
+    symbol0, symbol1 = symbols[index0], symbols[index1]
+
+    # Orient every pair as BASE/QUOTE with BASE < QUOTE alphabetically
+    flip = symbol0 > symbol1
+    prices = np.where(flip, 1.0 / prices, prices)
+    base = np.where(flip, symbol1, symbol0)
+    quote = np.where(flip, symbol0, symbol1)
+    labels = base + '/' + quote
+
+    # Latest swap per pair: sort by (pair, block) and take the last of each run
+    pair_keys, pair_codes, pair_counts = np.unique(labels.astype(str), return_inverse=True, return_counts=True)
+    order = np.lexsort((blocks, pair_codes))
+    last = order[np.cumsum(pair_counts) - 1]
+
+    return PairPrices(
+        pairs=pair_keys.astype(object),
+        prices=prices[last],
+        blocks=blocks[last],
+        swaps=pair_counts
+    )
+
+
+class LatestPairPrices:
+    """Latest price per token pair on one chain, updated one swap batch at a time
+
+    Subscribe consume() to a swap feed. Each batch is reduced with
+    pair_prices() and merged in, keeping the price from the newest block, so
+    state is one entry per pair however many swaps stream through.
+    """
+
+    def __init__(self, tokens, block_column='block_num'):
+        self.tokens = tokens
+        self.block_column = block_column
+        self._latest = {}  # Pair -> [price, block, swaps]
+        self._lock = threading.Lock()
+
+    def consume(self, rows):
+        batch = pair_prices(rows, self.tokens, self.block_column)
+        with self._lock:
+            for pair, price, block, swaps in zip(batch.pairs, batch.prices, batch.blocks, batch.swaps):
+                latest = self._latest.get(pair)
+                if latest is None:
+                    self._latest[pair] = [float(price), int(block), int(swaps)]
+                    continue
+                if block >= latest[1]:
+                    latest[0], latest[1] = float(price), int(block)
+                latest[2] += int(swaps)
+
+    def prices(self) -> PairPrices:
+        """Current prices as PairPrices columns"""
+        with self._lock:
+            items = sorted((pair, tuple(latest)) for pair, latest in self._latest.items())
+        return PairPrices(
+            pairs=np.array([pair for pair, _ in items], dtype=object),
+            prices=np.array([latest[0] for _, latest in items], dtype=np.float64),
+            blocks=np.array([latest[1] for _, latest in items], dtype=np.int64),
+            swaps=np.array([latest[2] for _, latest in items], dtype=np.int64)
+        )
+
+    def __len__(self):
+        with self._lock:
+            return len(self._latest)
+
+
+def cross_chain_spreads(eth_swaps, base_swaps, eth_tokens, base_tokens, min_bps=0.0):
+    """Join ETH and Base pools by token pair and compute bps spreads
+
+    Returns dicts sorted by spread (widest first) for pairs quoted on both chains
+    with a spread of at least min_bps.
+    """
+    return join_spreads(pair_prices(eth_swaps, eth_tokens), pair_prices(base_swaps, base_tokens), min_bps)
+
+
+def join_spreads(eth, base, min_bps=0.0):
+    """cross_chain_spreads() over PairPrices that are already reduced"""
+    pairs, eth_index, base_index = np.intersect1d(
+        eth.pairs.astype(str), base.pairs.astype(str), return_indices=True
+    )
+    if len(pairs) == 0:
+        return []
+
+    eth_prices = eth.prices[eth_index]
+    base_prices = base.prices[base_index]
+    spreads = spread_bps(eth_prices, base_prices)
+
+    keep = np.flatnonzero(spreads >= min_bps)
+    keep = keep[np.argsort(-spreads[keep])]
+
+    return [
+        {
+            'pair': str(pairs[i]),
+            'eth_price': float(eth_prices[i]),
+            'base_price': float(base_prices[i]),
+            'profit_bps': float(spreads[i]),
+            'eth_block': int(eth.blocks[eth_index[i]]),
+            'base_block': int(base.blocks[base_index[i]]),
+            'swaps': int(eth.swaps[eth_index[i]] + base.swaps[base_index[i]])
+        }
+        for i in keep
+    ]
+
+
+_latest_prices = {}
+_latest_prices_lock = threading.Lock()
+
+
+def get_latest_prices(key, tokens):
+    """Process-wide LatestPairPrices for one swap feed key"""
+    with _latest_prices_lock:
+        if key not in _latest_prices:
+            _latest_prices[key] = LatestPairPrices(tokens)
+        return _latest_prices[key]
@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+🌩️ Upstream simulator
+A local HTTP stand-in for every upstream, with latency and fault injection
+
+upstream_stubs answers in-process and always instantly. This server answers
+over real sockets instead, so the dashboard, the Vercel handlers and the
+hunter can be pointed at it and run end to end with their real timeouts,
+connection pools and fallbacks. Each upstream lives under its own prefix:
+
+    /coingecko/simple/price               CoinGecko ETH price
+    /coincap/assets/ethereum              CoinCap ETH price
+    /llama/protocols                      DeFiLlama protocol list
+    /playground/api/trpc/datasets.list    AMP playground catalog (ETag / 304)
+    /amp                                  AMP JSONL server (POST SQL)
+    /_sim/stats                           Requests answered, by route and outcome
+
+Payloads come from upstream_stubs, and their sizes can be set. Every route
+can also be given:
+
+- a latency distribution: fixed, uniform, normal or lognormal
+- an error rate and the status to answer with (503, 429, ...)
+- a drop rate: the connection closes without a response
+- a truncate rate: the full Content-Length is announced but the body stops
+  part-way
+- a bandwidth cap, which shows what large payloads cost on a slow link
+
+The services read their base URLs from the environment, and the simulator
+prints the variables to export:
+
+    python upstream_sim.py --latency lognormal:80:600 --error-rate 0.05
+    python upstream_sim.py --route llama:latency=uniform:500:3000,truncate=0.2
+"""
+
+import argparse
+import json
+import math
+import random
+import socket
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field, replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from upstream_stubs import (
+    AmpStub, BLOCKS_PER_QUERY, BOOTSTRAP_BLOCKS, FILLER_DATASETS, PROTOCOL_COUNT,
+    SWAPS_PER_BLOCK, TRANSACTIONS_PER_BLOCK, catalog_datasets, coincap_payload,
+    coingecko_payload, datasets_payload, protocols_payload
+)
+
+DEFAULT_PORT = 8700
+WRITE_CHUNK = 16384  # Bytes written at a time when a bandwidth cap is set
+MAX_SQL_BYTES = 1024 * 1024
+
+# Environment variable -> path prefix it should point at
+ENVIRONMENT = {
+    'ALPHA_HUNTER_COINGECKO_API': '/coingecko',
+    'ALPHA_HUNTER_COINCAP_API': '/coincap',
+    'ALPHA_HUNTER_LLAMA_API': '/llama',
+    'ALPHA_HUNTER_PLAYGROUND_URL': '/playground',
+    'ALPHA_HUNTER_AMP_URL': '/amp',
+}
+
+# Route name -> (method, path)
+ROUTES = {
+    'coingecko': ('GET', '/coingecko/simple/price'),
+    'coincap': ('GET', '/coincap/assets/ethereum'),
+    'llama': ('GET', '/llama/protocols'),
+    'catalog': ('GET', '/playground/api/trpc/datasets.list'),
+    'amp': ('POST', '/amp'),
+}
+
+# Inverse normal CDF at 0.99, for lognormal latencies given as median and p99
+Z_99 = 2.3263478740408408
+
+
+@dataclass(frozen=True)
+class Latency:
+    """Response delay distribution, in milliseconds"""
+    kind: str = 'fixed'
+    a: float = 0.0
+    b: float = 0.0
+
+    @classmethod
+    def parse(cls, spec):
+        """'120', 'uniform:20:200', 'normal:100:30' (mean, stddev) or
+        'lognormal:80:600' (median, p99)"""
+        kind, *values = spec.split(':')
+        try:
+            if not values:
+                return cls('fixed', float(kind))
+            values = [float(v) for v in values]
+        except ValueError:
+            raise ValueError(f'Bad latency spec: {spec}')
+        if kind not in ('fixed', 'uniform', 'normal', 'lognormal') or len(values) != (1 if kind == 'fixed' else 2):
+            raise ValueError(f'Bad latency spec: {spec}')
+        if kind == 'lognormal' and not 0 < values[0] <= values[1]:
+            raise ValueError(f'lognormal latency needs 0 < median <= p99: {spec}')
+        return cls(kind, *values)
+
+    def sample(self, rng):
+        """One delay in seconds"""
+        if self.kind == 'uniform':
+            ms = rng.uniform(self.a, self.b)
+        elif self.kind == 'normal':
+            ms = rng.gauss(self.a, self.b)
+        elif self.kind == 'lognormal':
+            mu = math.log(self.a)
+            ms = rng.lognormvariate(mu, (math.log(self.b) - mu) / Z_99)
+        else:
+            ms = self.a
+        return max(0.0, ms) / 1000
+
+    def __str__(self):
+        if self.kind == 'fixed':
+            return f'{self.a:g}ms'
+        return f'{self.kind}:{self.a:g}:{self.b:g}'
+
+
+@dataclass(frozen=True)
+class Faults:
+    """What can go wrong on one route; rates are fractions of requests"""
+    latency: Latency = field(default_factory=Latency)
+    error_rate: float = 0.0
+    error_status: int = 503
+    drop_rate: float = 0.0
+    truncate_rate: float = 0.0
+    bandwidth: float = 0.0  # KiB/s, 0 for unlimited
+
+    # Option names accepted in --route specs
+    OPTIONS = {'latency': 'latency', 'errors': 'error_rate', 'status': 'error_status',
+               'drop': 'drop_rate', 'truncate': 'truncate_rate', 'bandwidth': 'bandwidth'}
+
+    def update(self, spec):
+        """Copy with 'latency=uniform:10:50,errors=0.1,...' applied"""
+        changes = {}
+        for option in filter(None, spec.split(',')):
+            key, _, value = option.partition('=')
+            name = self.OPTIONS.get(key.strip())
+            if name is None or not value:
+                raise ValueError(f'Bad route option: {option}')
+            if name == 'latency':
+                changes[name] = Latency.parse(value)
+            elif name == 'error_status':
+                changes[name] = int(value)
+            else:
+                changes[name] = float(value)
+        return replace(self, **changes)
+
+    def __str__(self):
+        parts = [f'latency {self.latency}']
+        if self.error_rate:
+            parts.append(f'{self.error_rate:.0%} {self.error_status}s')
+        if self.drop_rate:
+            parts.append(f'{self.drop_rate:.0%} dropped')
+        if self.truncate_rate:
+            parts.append(f'{self.truncate_rate:.0%} truncated')
+        if self.bandwidth:
+            parts.append(f'{self.bandwidth:g} KiB/s')
+        return ', '.join(parts)
+
+
+class UpstreamSimulator:
+    """Payloads, per-route faults and counters behind one simulator server"""
+
+    def __init__(self, faults=None, route_faults=None, protocols=PROTOCOL_COUNT, datasets=FILLER_DATASETS,
+                 swaps_per_block=SWAPS_PER_BLOCK, transactions_per_block=TRANSACTIONS_PER_BLOCK,
+                 blocks_per_query=BLOCKS_PER_QUERY, bootstrap_blocks=BOOTSTRAP_BLOCKS, seed=None):
+        faults = faults or Faults()
+        self.faults = {name: (route_faults or {}).get(name, faults) for name in ROUTES}
+        self.amp = AmpStub(blocks_per_query, bootstrap_blocks, swaps_per_block, transactions_per_block)
+        self.stats = defaultdict(Counter)  # route -> outcome -> requests
+        self.server = None
+        self.verbose = False  # Log every request
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+        # Static payloads are encoded once; they are served many times
+        self.coingecko = json.dumps(coingecko_payload()).encode()
+        self.coincap = json.dumps(coincap_payload()).encode()
+        self.protocols = json.dumps(protocols_payload(protocols)).encode()
+        self.datasets = json.dumps(datasets_payload(catalog_datasets(datasets))).encode()
+        self.datasets_etag = f'"catalog-{datasets}"'
+
+    def draw(self, faults):
+        """(delay, outcome) for one request; outcome is ok, error, drop or truncate"""
+        with self._lock:
+            delay = faults.latency.sample(self._rng)
+            roll = self._rng.random()
+        for outcome, rate in (('error', faults.error_rate), ('drop', faults.drop_rate),
+                              ('truncate', faults.truncate_rate)):
+            if roll < rate:
+                return delay, outcome
+            roll -= rate
+        return delay, 'ok'
+
+    def cut(self, size):
+        """Bytes of a `size`-byte body sent before a truncation"""
+        with self._lock:
+            return self._rng.randrange(size) if size > 1 else 0
+
+    def record(self, route, outcome):
+        with self._lock:
+            self.stats[route][outcome] += 1
+
+    def stats_json(self):
+        with self._lock:
+            return {route: dict(outcomes) for route, outcomes in self.stats.items()}
+
+    def environ(self):
+        """Environment variables that point the services at this simulator"""
+        return {name: f'{self.url}{prefix}' for name, prefix in ENVIRONMENT.items()}
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self, host='127.0.0.1', port=0):
+        """Serve from a background thread; returns self"""
+        self.server = SimulatorServer((host, port), SimulatorHandler)
+        self.server.simulator = self
+        threading.Thread(target=self.server.serve_forever, name='upstream-sim', daemon=True).start()
+        return self
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+
+class SimulatorServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients hang up mid-body all the time (prefix reads, timeouts); only report real bugs
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class SimulatorHandler(BaseHTTPRequestHandler):
+    """Routes requests to payloads and applies the route's faults"""
+
+    protocol_version = 'HTTP/1.1'  # Keep-alive, so client connection pools behave as in production
+
+    def do_GET(self):
+        self.handle_route('GET')
+
+    def do_POST(self):
+        self.handle_route('POST')
+
+    def handle_route(self, method):
+        sim = self.server.simulator
+        path = urlsplit(self.path).path.rstrip('/')
+        if method == 'GET' and path == '/_sim/stats':
+            self.send_body(200, json.dumps(sim.stats_json()).encode())
+            return
+        route = next((name for name, (m, p) in ROUTES.items() if (m, p) == (method, path)), None)
+        if route is None:
+            self.send_body(404, b'{"error": "not found"}')
+            return
+
+        # Read the request before any fault, so a keep-alive connection stays in sync
+        sql = self.read_body() if method == 'POST' else b''
+        faults = sim.faults[route]
+        delay, outcome = sim.draw(faults)
+        time.sleep(delay)
+        sim.record(route, outcome)
+
+        if outcome == 'drop':
+            self.close_connection = True
+            try:
+                self.connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            return
+        if outcome == 'error':
+            headers = {'Retry-After': '1'} if faults.error_status in (429, 503) else {}
+            self.send_body(faults.error_status, b'{"error": "simulated upstream failure"}', headers=headers)
+            return
+
+        status, body, content_type, headers = self.payload(route, sql)
+        limit = sim.cut(len(body)) if outcome == 'truncate' else None
+        self.send_body(status, body, content_type, headers, limit=limit, bandwidth=faults.bandwidth)
+
+    def payload(self, route, sql):
+        """(status, body, content type, extra headers) for a route"""
+        sim = self.server.simulator
+        if route == 'coingecko':
+            return 200, sim.coingecko, 'application/json', {}
+        if route == 'coincap':
+            return 200, sim.coincap, 'application/json', {}
+        if route == 'llama':
+            return 200, sim.protocols, 'application/json', {}
+        if route == 'catalog':
+            if self.headers.get('If-None-Match') == sim.datasets_etag:
+                return 304, b'', 'application/json', {'ETag': sim.datasets_etag}
+            return 200, sim.datasets, 'application/json', {'ETag': sim.datasets_etag}
+        rows = sim.amp.rows(sql.decode('utf-8', 'replace'))
+        return 200, b''.join(json.dumps(row).encode() + b'\n' for row in rows), 'application/x-ndjson', {}
+
+    def read_body(self):
+        length = min(int(self.headers.get('Content-Length') or 0), MAX_SQL_BYTES)
+        return self.rfile.read(length) if length else b''
+
+    def send_body(self, status, body, content_type='application/json', headers=None, limit=None, bandwidth=0):
+        """Send a response; with `limit`, stop after that many body bytes and close"""
+        self.send_response(status)
+        if status != 304:
+            self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if limit is not None:
+            self.send_header('Connection', 'close')
+            self.close_connection = True
+        self.end_headers()
+
+        body = body if limit is None else body[:limit]
+        if not bandwidth:
+            self.wfile.write(body)
+            return
+        pace = WRITE_CHUNK / (bandwidth * 1024)
+        for start in range(0, len(body), WRITE_CHUNK):
+            self.wfile.write(body[start:start + WRITE_CHUNK])
+            self.wfile.flush()
+            time.sleep(pace)
+
+    def log_message(self, format, *args):
+        if self.server.simulator.verbose:
+            super().log_message(format, *args)
+
+
+def main():
+    """Parse command line options and run the simulator until Ctrl+C"""
+    parser = argparse.ArgumentParser(description='Local upstream simulator with latency and fault injection')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to listen on')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='Port to listen on')
+    parser.add_argument('--latency', type=Latency.parse, default=Latency(),
+                        help="Default latency: ms, uniform:MIN:MAX, normal:MEAN:SD or lognormal:MEDIAN:P99")
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with --error-status')
+    parser.add_argument('--error-status', type=int, default=503, help='Status code for injected errors')
+    parser.add_argument('--drop-rate', type=float, default=0.0, help='Fraction of connections closed without a response')
+    parser.add_argument('--truncate-rate', type=float, default=0.0, help='Fraction of bodies cut off part-way')
+    parser.add_argument('--bandwidth', type=float, default=0.0, help='Per-response KiB/s cap (0 = unlimited)')
+    parser.add_argument('--route', action='append', default=[], metavar='NAME:OPTIONS',
+                        help=f"Override one route ({', '.join(ROUTES)}), e.g. "
+                             "llama:latency=uniform:500:3000,errors=0.1,status=429,drop=0.05,truncate=0.2,bandwidth=256")
+    parser.add_argument('--protocols', type=int, default=PROTOCOL_COUNT, help='Protocols in /llama/protocols')
+    parser.add_argument('--datasets', type=int, default=FILLER_DATASETS, help='Filler datasets in the catalog')
+    parser.add_argument('--swaps-per-block', type=int, default=SWAPS_PER_BLOCK, help='AMP swap rows per block')
+    parser.add_argument('--transactions-per-block', type=int, default=TRANSACTIONS_PER_BLOCK,
+                        help='AMP transaction rows per block')
+    parser.add_argument('--blocks-per-query', type=int, default=BLOCKS_PER_QUERY,
+                        help='Blocks an incremental AMP query returns')
+    parser.add_argument('--seed', type=int, help='Seed for latency and fault draws')
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+    args = parser.parse_args()
+
+    faults = Faults(args.latency, args.error_rate, args.error_status, args.drop_rate,
+                    args.truncate_rate, args.bandwidth)
+    route_faults = {}
+    for spec in args.route:
+        name, _, options = spec.partition(':')
+        if name not in ROUTES:
+            parser.error(f'Unknown route {name!r}; choose from {", ".join(ROUTES)}')
+        try:
+            route_faults[name] = route_faults.get(name, faults).update(options)
+        except ValueError as e:
+            parser.error(str(e))
+
+    sim = UpstreamSimulator(faults, route_faults, protocols=args.protocols, datasets=args.datasets,
+                            swaps_per_block=args.swaps_per_block,
+                            transactions_per_block=args.transactions_per_block,
+                            blocks_per_query=args.blocks_per_query, seed=args.seed)
+    sim.verbose = args.verbose
+    sim.start(args.host, args.port)
+
+    print(f"🌩️ Upstream simulator running at {sim.url}")
+    for name, (method, path) in ROUTES.items():
+        print(f"   {name:<10} {method:<4} {path:<38} {sim.faults[name]}")
+    print("\n   Point the services at it with:")
+    for name, value in sim.environ().items():
+        print(f"   export {name}={value}")
+    print("\n   Press Ctrl+C to stop")
+
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print(f"\n🛑 Simulator stopped: {json.dumps(sim.stats_json())}")
+        sim.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,341 @@
+"""
+🧪 Upstream stubs
+Deterministic local stand-ins for every upstream the hunter talks to
+
+StubClient has the HttpClient interface (get / post / request / stream) and
+answers from in-process routes instead of the network. Install it with
+http_client.set_client() and CoinGecko, CoinCap, DeFiLlama, the AMP
+playground's datasets.list and the AMP JSONL server all respond offline,
+with payloads shaped like the real ones:
+
+- the ETH price from CoinGecko or CoinCap
+- a full-size DeFiLlama /protocols array, sorted by TVL
+- a dataset catalog with Uniswap and raw-chain datasets for Ethereum and Base
+- an AMP JSONL server that answers block-range queries for event__swap and
+  transactions, with the chain head advancing a few blocks per query
+
+Payloads depend only on their parameters and the block numbers asked for
+(block timestamps aside, which follow the wall clock), so runs are
+repeatable.
+"""
+
+import hashlib
+import io
+import json
+import math
+import random
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+
+from requests.structures import CaseInsensitiveDict
+
+from config import WHALE_ADDRESSES
+
+ETH_PRICE = 3456.78
+BASE_ETH_PRICE = 3461.45  # Base WETH quotes a little rich, so there is a spread to find
+ETH_CHANGE_24H = 2.31
+ETH_VOLUME_24H = 15234567890.0
+
+PROTOCOL_COUNT = 3000  # Roughly the size of the real /protocols response
+FILLER_DATASETS = 60  # Catalog entries on other chains
+
+START_BLOCK = 20000000
+BLOCK_TIME = 12  # Seconds between stub blocks
+BLOCKS_PER_QUERY = 5  # Chain head advance per incremental query
+BOOTSTRAP_BLOCKS = 300  # Blocks returned when a query has no watermark
+SWAPS_PER_BLOCK = 20
+TRANSACTIONS_PER_BLOCK = 150
+WHALE_EVERY = 40  # One transaction in this many involves a watched whale
+WHALE_VALUE_ETH = 400
+
+# (symbol, decimals, Ethereum address, Base address), as in the arbitrage strategy
+TOKENS = (
+    ('USDC', 6, '0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48', '0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913'),
+    ('WETH', 18, '0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2', '0x4200000000000000000000000000000000000006'),
+)
+UNLISTED_TOKEN = '0x000000000000000000000000000000000000dead'
+
+_SOURCE_RE = re.compile(r'FROM "([^"@]+)@latest"\.(\w+)')
+_AFTER_RE = re.compile(r'block_num > (\d+)')
+_ADDRESS_IN_RE = re.compile(r'lower\(from_address\) IN \(([^)]*)\)')
+
+
+def coingecko_payload(price=ETH_PRICE):
+    return {'ethereum': {'usd': price, 'usd_24h_change': ETH_CHANGE_24H, 'usd_24h_vol': ETH_VOLUME_24H}}
+
+
+def coincap_payload(price=ETH_PRICE):
+    return {'data': {
+        'id': 'ethereum',
+        'symbol': 'ETH',
+        'priceUsd': f'{price:.8f}',
+        'changePercent24Hr': f'{ETH_CHANGE_24H:.8f}',
+        'volumeUsd24Hr': f'{ETH_VOLUME_24H:.8f}'
+    }}
+
+
+def protocols_payload(count=PROTOCOL_COUNT):
+    """DeFiLlama /protocols: `count` protocols with the real fields, largest TVL first"""
+    rng = random.Random(count)
+    protocols = []
+    for i in range(count):
+        tvl = 6e10 * math.exp(-i / 40)
+        protocols.append({
+            'id': str(i + 1),
+            'name': f'Protocol {i + 1}',
+            'slug': f'protocol-{i + 1}',
+            'symbol': f'P{i + 1}',
+            'url': f'https://protocol{i + 1}.example',
+            'description': 'Lending, trading and yield protocol used to size benchmark payloads. ' * 2,
+            'chain': 'Multi-Chain',
+            'logo': f'https://icons.llama.fi/protocol-{i + 1}.png',
+            'category': rng.choice(('Lending', 'Dexes', 'Liquid Staking', 'Bridge', 'Yield')),
+            'chains': ['Ethereum', 'Base', 'Arbitrum'][:1 + i % 3],
+            'tvl': tvl,
+            'chainTvls': {'Ethereum': tvl * 0.7, 'Base': tvl * 0.2, 'Arbitrum': tvl * 0.1},
+            'change_1h': round(rng.uniform(-1, 1), 4),
+            'change_1d': round(rng.uniform(-8, 8), 4),
+            'change_7d': round(rng.uniform(-15, 15), 4),
+            'mcap': tvl * rng.uniform(0.2, 2.0)
+        })
+    return protocols
+
+
+def catalog_datasets(filler=FILLER_DATASETS):
+    """datasets.list entries: Uniswap and raw-chain datasets for Ethereum and Base, plus filler"""
+    datasets = [
+        {'namespace': 'edgeandnode', 'name': 'ethereum_mainnet', 'indexing_chains': ['ethereum-mainnet'],
+         'description': 'Raw Ethereum mainnet blocks, transactions and logs'},
+        {'namespace': 'edgeandnode', 'name': 'uniswap_v3_ethereum', 'indexing_chains': ['ethereum-mainnet'],
+         'description': 'Uniswap V3 pool events on Ethereum'},
+        {'namespace': 'edgeandnode', 'name': 'aave_v3_ethereum', 'indexing_chains': ['ethereum-mainnet'],
+         'description': 'Aave V3 lending events on Ethereum'},
+        {'namespace': 'edgeandnode', 'name': 'base_mainnet', 'indexing_chains': ['base-mainnet'],
+         'description': 'Raw Base mainnet blocks, transactions and logs'},
+        {'namespace': 'edgeandnode', 'name': 'uniswap_v3_base', 'indexing_chains': ['base-mainnet'],
+         'description': 'Uniswap V3 pool events on Base'},
+        {'namespace': 'edgeandnode', 'name': 'aerodrome_base', 'indexing_chains': ['base-mainnet'],
+         'description': 'Aerodrome pool events on Base'},
+    ]
+    chains = ('arbitrum-one', 'optimism-mainnet', 'polygon-mainnet', 'bsc-mainnet')
+    datasets.extend({
+        'namespace': 'community',
+        'name': f'dataset_{i}',
+        'indexing_chains': [chains[i % len(chains)]],
+        'description': f'Community dataset {i} for load testing the catalog index'
+    } for i in range(filler))
+    return datasets
+
+
+def datasets_payload(datasets=None):
+    """datasets.list tRPC response wrapping `datasets`"""
+    datasets = catalog_datasets() if datasets is None else datasets
+    return [{'result': {'data': {'json': {'datasets': datasets}}}}]
+
+
+def sqrt_price_x96(price, decimals0, decimals1):
+    """uint160 sqrt_price_x96 for a decimal-adjusted token0 price in token1"""
+    ratio = price / 10.0 ** (decimals0 - decimals1)
+    return int(math.sqrt(ratio) * 2 ** 96)
+
+
+def swap_rows(chain, block, count=SWAPS_PER_BLOCK):
+    """event__swap rows of one block: WETH/USDC swaps plus a few on unlisted tokens"""
+    rng = random.Random(f'{chain}:{block}')
+    column = 2 if chain == 'ethereum' else 3
+    usdc, weth = TOKENS[0][column], TOKENS[1][column]
+    price = ETH_PRICE if chain == 'ethereum' else BASE_ETH_PRICE
+    rows = []
+    for i in range(count):
+        unlisted = i % 5 == 4
+        quote = price * (1 + rng.uniform(-0.0002, 0.0002))
+        amount = rng.uniform(0.1, 50)
+        rows.append({
+            'pool_address': f'0x{hashlib.sha1(f"{chain}:{i % 3}".encode()).hexdigest()[:40]}',
+            'token0': weth,
+            'token1': UNLISTED_TOKEN if unlisted else usdc,
+            'amount0': str(int(amount * 1e18)),
+            'amount1': str(-int(amount * quote * 1e6)),
+            'sqrt_price_x96': str(sqrt_price_x96(quote, 18, 6)),
+            'block_num': block,
+            'block_timestamp': _block_time(block),
+            'transaction_hash': f'0x{hashlib.sha256(f"{chain}:{block}:{i}".encode()).hexdigest()}'
+        })
+    return rows
+
+
+def transaction_rows(block, count=TRANSACTIONS_PER_BLOCK, whales=WHALE_ADDRESSES):
+    """transactions rows of one block; every WHALE_EVERY-th one moves WHALE_VALUE_ETH from a whale"""
+    rng = random.Random(f'tx:{block}')
+    rows = []
+    for i in range(count):
+        sequence = block * count + i
+        whale = whales[sequence // WHALE_EVERY % len(whales)] if sequence % WHALE_EVERY == 0 else None
+        value = WHALE_VALUE_ETH if whale else rng.uniform(0, 2)
+        rows.append({
+            'from_address': whale or f'0x{rng.getrandbits(160):040x}',
+            'to_address': f'0x{rng.getrandbits(160):040x}',
+            'value': str(int(value * 1e18)),
+            'block_num': block,
+            'block_timestamp': _block_time(block),
+            'transaction_hash': f'0x{rng.getrandbits(256):064x}'
+        })
+    return rows
+
+
+def _block_time(block):
+    # Bootstrap blocks lie in the past; blocks past START_BLOCK are "just mined"
+    return time.time() - max(0, START_BLOCK - block) * BLOCK_TIME
+
+
+class StubResponse:
+    """Just enough of requests.Response for the callers in this repo"""
+
+    def __init__(self, status_code=200, body=b'', headers=None):
+        self.status_code = status_code
+        self.content = body
+        self.headers = CaseInsensitiveDict(headers or {})
+        self.raw = SimpleNamespace(read=self._read_raw)
+        self._stream = io.BytesIO(body)
+        self.closed = False
+
+    @classmethod
+    def json_body(cls, payload, status_code=200, headers=None):
+        headers = dict(headers or {}, **{'Content-Type': 'application/json'})
+        return cls(status_code, json.dumps(payload).encode(), headers)
+
+    @property
+    def text(self):
+        return self.content.decode()
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size=1):
+        while not self.closed:
+            chunk = self._stream.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def _read_raw(self, amount=None, decode_content=False):
+        return self._stream.read(amount)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise ValueError(f'HTTP {self.status_code}')
+
+    def close(self):
+        self.closed = True
+
+
+class AmpStub:
+    """AMP JSONL server answering the block-range queries ingestion sends"""
+
+    def __init__(self, blocks_per_query=BLOCKS_PER_QUERY, bootstrap_blocks=BOOTSTRAP_BLOCKS,
+                 swaps_per_block=SWAPS_PER_BLOCK, transactions_per_block=TRANSACTIONS_PER_BLOCK):
+        self.blocks_per_query = blocks_per_query
+        self.bootstrap_blocks = bootstrap_blocks
+        self.swaps_per_block = swaps_per_block
+        self.transactions_per_block = transactions_per_block
+
+    def rows(self, sql):
+        """Rows answering one SQL statement; unknown tables return nothing"""
+        source = _SOURCE_RE.search(sql)
+        if source is None:
+            return []
+        dataset, table = source.groups()
+        after = _AFTER_RE.search(sql)
+        if after is None:
+            blocks = range(START_BLOCK - self.bootstrap_blocks + 1, START_BLOCK + 1)
+        else:
+            first = int(after.group(1)) + 1
+            blocks = range(first, first + self.blocks_per_query)
+
+        if table == 'event__swap':
+            chain = 'base' if 'base' in dataset else 'ethereum'
+            return [row for block in blocks for row in swap_rows(chain, block, self.swaps_per_block)]
+        if table == 'transactions':
+            rows = [row for block in blocks for row in transaction_rows(block, self.transactions_per_block)]
+            addresses = _ADDRESS_IN_RE.search(sql)
+            if addresses is not None:
+                # ingestion.address_filter: rows from or to the listed addresses
+                wanted = set(re.findall(r"'([^']*)'", addresses.group(1)))
+                rows = [row for row in rows
+                        if row['from_address'].lower() in wanted or row['to_address'].lower() in wanted]
+            return rows
+        return []
+
+    def respond(self, request):
+        body = b''.join(json.dumps(row).encode() + b'\n' for row in self.rows(request.data.decode()))
+        return StubResponse(200, body, {'Content-Type': 'application/x-ndjson'})
+
+
+def default_routes(amp=None):
+    """{(method, url): handler(request) -> StubResponse} for every upstream"""
+    # Imported here: these modules read their upstream URLs from the environment
+    # on import, and upstream_sim sets it only after importing this module
+    from amp_client import LOCAL_AMP_URL
+    from dataset_catalog import DATASETS_API
+    from market_data import COINCAP_ETH_URL, COINGECKO_ETH_URL, LLAMA_PROTOCOLS_URL
+
+    amp = amp or AmpStub()
+    protocols = json.dumps(protocols_payload()).encode()
+    datasets = json.dumps(datasets_payload()).encode()
+    datasets_etag = f'"{hashlib.sha1(datasets).hexdigest()}"'
+
+    def catalog(request):
+        if (request.headers or {}).get('If-None-Match') == datasets_etag:
+            return StubResponse(304, b'', {'ETag': datasets_etag})
+        return StubResponse(200, datasets, {'Content-Type': 'application/json', 'ETag': datasets_etag})
+
+    return {
+        ('GET', COINGECKO_ETH_URL): lambda request: StubResponse.json_body(coingecko_payload()),
+        ('GET', COINCAP_ETH_URL): lambda request: StubResponse.json_body(coincap_payload()),
+        ('GET', LLAMA_PROTOCOLS_URL): lambda request: StubResponse(200, protocols, {'Content-Type': 'application/json'}),
+        ('GET', DATASETS_API): catalog,
+        ('POST', LOCAL_AMP_URL): amp.respond,
+    }
+
+
+def _route_key(method, url):
+    parts = urlsplit(url)
+    return method.upper(), parts.netloc, parts.path.rstrip('/')
+
+
+class StubClient:
+    """HttpClient stand-in that answers from local routes; unknown URLs get a 404"""
+
+    def __init__(self, routes=None):
+        routes = default_routes() if routes is None else routes
+        self.routes = {_route_key(method, url): handler for (method, url), handler in routes.items()}
+        self.calls = Counter()  # (method, netloc, path) -> requests answered
+        self._lock = threading.Lock()
+
+    def request(self, method, url, params=None, data=None, headers=None, timeout=None, **kwargs):
+        key = _route_key(method, url)
+        with self._lock:
+            self.calls[key] += 1
+        handler = self.routes.get(key)
+        if handler is None:
+            return StubResponse(404, b'not found')
+        return handler(SimpleNamespace(method=method, url=url, params=params, data=data, headers=headers))
+
+    def get(self, url, params=None, timeout=None, **kwargs):
+        return self.request('GET', url, params=params, timeout=timeout, **kwargs)
+
+    def post(self, url, data=None, timeout=None, **kwargs):
+        return self.request('POST', url, data=data, timeout=timeout, **kwargs)
+
+    @contextmanager
+    def stream(self, method, url, timeout=None, **kwargs):
+        response = self.request(method, url, timeout=timeout, **kwargs)
+        try:
+            yield response
+        finally:
+            response.close()
@@ -0,0 +1,214 @@
+"""
+🐋 Streaming whale tracker
+Rolling per-address flow over 5 min / 1 h / 24 h for the configured whales
+
+Transaction rows are checked against a hashed watchlist built from
+config.WHALE_ADDRESSES. A row that touches no whale costs two dict lookups
+and is forgotten. A row that does is added to fixed-size time buckets, one
+ring per window. Memory is therefore O(whales x buckets) no matter how many
+transactions stream through, and old buckets expire by rotating the ring
+rather than replaying history.
+
+A WhaleSignal is emitted when a whale's total in a window crosses
+MIN_WHALE_AMOUNT. It is re-armed once the total drops back below.
+"""
+
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import numpy as np
+
+from config import MIN_WHALE_AMOUNT, WHALE_ADDRESSES
+
+# (label, window seconds, bucket seconds)
+WINDOWS = (
+    ('5m', 300, 10),
+    ('1h', 3600, 60),
+    ('24h', 86400, 900),
+)
+
+WEI_PER_ETH = 1e18
+REFERENCE_ETH_PRICE = 3456.0  # USD, until a live price is set
+
+
+@dataclass(frozen=True)
+class WhaleSignal:
+    address: str
+    window: str  # Window label, e.g. '1h'
+    amount_usd: float  # Total flow in the window when the signal fired
+    transactions: int  # Transactions in the window
+    timestamp: datetime
+    last_transaction: Optional[str] = None
+
+
+def row_time(value):
+    """Unix seconds from an epoch number, datetime or ISO-8601 string"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    if isinstance(value, str):
+        return row_time(datetime.fromisoformat(value.replace('Z', '+00:00')))
+    raise ValueError(f'Unsupported timestamp: {value!r}')
+
+
+class _RollingWindow:
+    """Bucketed ring of sums and counts for every watched address"""
+
+    def __init__(self, label, span, bucket, addresses):
+        self.label = label
+        self.bucket = bucket
+        self.size = span // bucket
+        self.sums = np.zeros((addresses, self.size))
+        self.counts = np.zeros((addresses, self.size), dtype=np.int64)
+        self.totals = np.zeros(addresses)
+        self.total_counts = np.zeros(addresses, dtype=np.int64)
+        self.crossed = np.zeros(addresses, dtype=bool)
+        self.head = None  # Newest bucket number seen
+
+    def advance(self, bucket_id):
+        """Expire buckets that fell out of the window; True if any did"""
+        if self.head is None:
+            self.head = bucket_id
+            return False
+        if bucket_id <= self.head:
+            return False
+
+        expired = min(bucket_id - self.head, self.size)
+        slots = [(self.head + k) % self.size for k in range(1, expired + 1)]
+        self.sums[:, slots] = 0
+        self.counts[:, slots] = 0
+        self.head = bucket_id
+
+        # Recomputed rather than decremented, so float error never accumulates
+        self.totals = self.sums.sum(axis=1)
+        self.total_counts = self.counts.sum(axis=1)
+        return True
+
+    def add(self, index, bucket_id, amount):
+        """Add one transaction; False if it is already older than the window"""
+        if self.head - bucket_id >= self.size:
+            return False
+        slot = bucket_id % self.size
+        self.sums[index, slot] += amount
+        self.counts[index, slot] += 1
+        self.totals[index] += amount
+        self.total_counts[index] += 1
+        return True
+
+
+class WhaleTracker:
+    """Consumes transaction rows and keeps rolling per-whale totals
+
+    Rows need from_address, to_address and block_timestamp, plus either
+    amount_usd or value (wei, valued at eth_price).
+    """
+
+    def __init__(self, addresses=WHALE_ADDRESSES, threshold=MIN_WHALE_AMOUNT,
+                 windows=WINDOWS, eth_price=REFERENCE_ETH_PRICE):
+        self.addresses = list(dict.fromkeys(a.lower() for a in addresses))
+        self.watchlist = {address: i for i, address in enumerate(self.addresses)}
+        self.threshold = threshold
+        self.eth_price = eth_price
+        self.windows = [_RollingWindow(label, span, bucket, len(self.addresses))
+                        for label, span, bucket in windows]
+        self.latest = [[None] * len(self.addresses) for _ in self.windows]
+        self.transactions_seen = 0
+        self.matches = 0
+        self._lock = threading.Lock()
+
+    def value_usd(self, row):
+        amount = row.get('amount_usd')
+        if amount is not None:
+            return float(amount)
+        return float(row.get('value') or 0) / WEI_PER_ETH * self.eth_price
+
+    def consume(self, rows) -> List[WhaleSignal]:
+        """Feed a batch of rows; returns signals fired by this batch"""
+        watchlist = self.watchlist
+        signals = []
+        seen = 0
+        with self._lock:
+            for row in rows:
+                seen += 1
+                sender = row.get('from_address')
+                receiver = row.get('to_address')
+                i = watchlist.get(sender.lower()) if sender else None
+                j = watchlist.get(receiver.lower()) if receiver else None
+                if i is None and j is None:
+                    continue
+
+                timestamp = row_time(row['block_timestamp'])
+                amount = self.value_usd(row)
+                self._advance(timestamp)
+                for index in {i, j} - {None}:
+                    self._add(index, timestamp, amount, row.get('transaction_hash'), signals)
+            self.transactions_seen += seen
+        return signals
+
+    def observe(self, row) -> List[WhaleSignal]:
+        """Feed a single row"""
+        return self.consume((row,))
+
+    def advance(self, now=None):
+        """Expire old buckets up to `now` (unix seconds) without new rows"""
+        with self._lock:
+            self._advance(now if now is not None else datetime.now(timezone.utc).timestamp())
+
+    def _advance(self, timestamp):
+        for window in self.windows:
+            if window.advance(int(timestamp // window.bucket)):
+                # Whales that fell back below the threshold can fire again
+                window.crossed &= window.totals >= self.threshold
+
+    def _add(self, index, timestamp, amount, transaction, signals):
+        self.matches += 1
+        for w, window in enumerate(self.windows):
+            if not window.add(index, int(timestamp // window.bucket), amount):
+                continue
+            if not window.crossed[index] and window.totals[index] >= self.threshold:
+                window.crossed[index] = True
+                signal = WhaleSignal(
+                    address=self.addresses[index],
+                    window=window.label,
+                    amount_usd=float(window.totals[index]),
+                    transactions=int(window.total_counts[index]),
+                    timestamp=datetime.fromtimestamp(timestamp, timezone.utc),
+                    last_transaction=transaction
+                )
+                self.latest[w][index] = signal
+                signals.append(signal)
+
+    def active_signals(self) -> List[WhaleSignal]:
+        """Latest signal per whale, shortest window first, while still above the threshold"""
+        with self._lock:
+            active = {}
+            for w, window in enumerate(self.windows):
+                for index in np.flatnonzero(window.crossed):
+                    if index not in active and self.latest[w][index] is not None:
+                        active[index] = self.latest[w][index]
+            return list(active.values())
+
+    def totals(self, address):
+        """{window label: (usd, transactions)} for one watched address"""
+        index = self.watchlist[address.lower()]
+        with self._lock:
+            return {window.label: (float(window.totals[index]), int(window.total_counts[index]))
+                    for window in self.windows}
+
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+
+def get_whale_tracker():
+    """Process-wide WhaleTracker"""
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            _tracker = WhaleTracker()
+        return _tracker